@@ -5,3 +5,10 @@ class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.accounts"
     verbose_name = "Accounts"
+
+    def ready(self):
+        from apps.accounts.principal import connect_principal_signals
+        from apps.accounts.revocation import connect_revocation_signals
+
+        connect_principal_signals()
+        connect_revocation_signals()
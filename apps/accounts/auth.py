@@ -1,9 +1,17 @@
 """Custom JWT authentication for DebtFlow frontend."""
+from django.contrib.auth import get_user_model
 from rest_framework import serializers, status
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import revocation
+from .principal import get_principal
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -12,6 +20,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
+        revocation.stamp(token)
 
         # User info
         token["username"] = user.username
@@ -36,6 +45,32 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh with the user's current claims rather than the ones copied from the refresh token.
+
+    simplejwt's refresh copies the refresh token's claims into the new tokens, so
+    with ROTATE_REFRESH_TOKENS the roles and agency granted at login would last as
+    long as the client keeps refreshing. Here the new pair is issued from the
+    database, like a login, and the refresh token it replaces is blacklisted.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        token = CustomTokenObtainPairSerializer.get_token(user)
+        data = {"access": str(token.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            data["refresh"] = str(token)
+        return data
+
+
 class UserProfileSerializer(serializers.Serializer):
     """Serializer for the /auth/me/ endpoint."""
 
@@ -57,8 +92,7 @@ class UserProfileView(APIView):
 
     def get(self, request):
         user = request.user
-        collector = getattr(user, "collector_profile", None)
-        groups = list(user.groups.values_list("name", flat=True))
+        principal = get_principal(request)
 
         data = {
             "id": user.id,
@@ -67,10 +101,26 @@ class UserProfileView(APIView):
             "first_name": user.first_name,
             "last_name": user.last_name,
             "is_superuser": user.is_superuser,
-            "groups": groups,
-            "collector_id": collector.id if collector else None,
-            "agency_id": collector.agency_id if collector else None,
+            "groups": list(principal.groups),
+            "collector_id": principal.collector_id,
+            "agency_id": principal.agency_id,
         }
 
         serializer = UserProfileSerializer(data)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class LogoutView(APIView):
+    """POST /api/v1/auth/logout/ — Revokes the access token in use and the given refresh token."""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.data.get("refresh"):
+            try:
+                RefreshToken(request.data["refresh"]).blacklist()
+            except TokenError as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if request.auth is not None:
+            revocation.deny_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
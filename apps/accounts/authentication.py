@@ -0,0 +1,60 @@
+"""DRF authentication class for API requests (kept apart from auth.py, whose views DRF settings can't import)."""
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from . import revocation
+
+# User attributes CustomTokenObtainPairSerializer puts in the token
+USER_CLAIMS = ("username", "email", "first_name", "last_name", "is_superuser")
+
+
+class TokenUser(SimpleLazyObject):
+    """request.user of a token-authenticated request.
+
+    Its id and the token's user claims are read from the token; touching
+    anything else (or passing it to a model field) loads the User row, once.
+    """
+
+    def __init__(self, token):
+        user_id = token[api_settings.USER_ID_CLAIM]
+        super().__init__(lambda: _load_user(user_id))
+        claims = {"id": user_id, "pk": user_id, "is_authenticated": True, "is_anonymous": False, "is_active": True}
+        claims.update((name, token[name]) for name in USER_CLAIMS if name in token)
+        self.__dict__["_claims"] = claims
+
+    def __bool__(self):  # `request.user and ...` checks shouldn't load it
+        return True
+
+    def __getattr__(self, name):
+        claims = self.__dict__["_claims"]
+        if name in claims:
+            return claims[name]
+        return super().__getattr__(name)
+
+
+def _load_user(user_id):
+    user_model = get_user_model()
+    try:
+        return user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+    except user_model.DoesNotExist as e:
+        raise AuthenticationFailed("User not found", code="user_not_found") from e
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT authentication without a user query per request.
+
+    The token's signature and expiry are checked as usual, revocation against
+    the Redis deny-list (revocation.py) instead of loading the user to see if
+    it is still active; request.user is a TokenUser.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if revocation.is_denied(validated_token):
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+        return TokenUser(validated_token)
@@ -1,5 +1,4 @@
 """Django-filter FilterSets for accounts."""
-from django.db import models
 from django_filters import rest_framework as filters
 
 from .models import Account
@@ -34,8 +33,5 @@ class AccountFilter(filters.FilterSet):
         ]
 
     def search_filter(self, queryset, name, value):
-        return queryset.filter(
-            models.Q(external_ref__icontains=value)
-            | models.Q(debtor__full_name__icontains=value)
-            | models.Q(debtor__email__icontains=value)
-        )
+        """Ref, debtor name, email or phone containing the value, through the trigram-indexed search document."""
+        return queryset.filter(search__haystack__contains=" ".join(value.split()).lower())
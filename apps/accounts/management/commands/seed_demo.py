@@ -10,7 +10,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from apps.accounts.models import Account, Activity, Agency, Collector, Debtor
-from apps.integrations.models import SFTPImportJob
+from apps.integrations.models import ImportRowError, SFTPImportJob
 from apps.payments.models import Payment, PaymentProcessor
 
 # ---------------------------------------------------------------------------
@@ -468,6 +468,7 @@ class Command(BaseCommand):
 
         # ----- 9. Import Jobs -----
         import_jobs = []
+        import_errors = []
         for i, fname in enumerate(IMPORT_FILES):
             days_ago = (len(IMPORT_FILES) - i) * 15 + random.randint(0, 10)
             started = now - timedelta(days=days_ago)
@@ -478,34 +479,31 @@ class Command(BaseCommand):
             status = SFTPImportJob.Status.COMPLETED
             completed = started + timedelta(minutes=random.randint(2, 15))
 
-            error_details = []
+            job = SFTPImportJob(
+                agency=agency,
+                source_host="sftp.clientdata.com",
+                file_name=fname,
+                file_path_s3=f"s3://debtflow-files/imports/{agency.id}/{fname}",
+                status=status,
+                total_records=total,
+                processed_ok=ok,
+                processed_errors=errors,
+                started_at=started,
+                completed_at=completed,
+            )
+            import_jobs.append(job)
             for e in range(errors):
-                error_details.append({
-                    "row": random.randint(2, total),
-                    "field": random.choice(["external_ref", "amount", "email", "phone"]),
-                    "error": random.choice([
+                import_errors.append(ImportRowError(
+                    job=job,
+                    line=random.randint(2, total),
+                    error_type=ImportRowError.ErrorType.VALIDATION,
+                    error=random.choice([
                         "Duplicate external_ref",
                         "Invalid amount format",
                         "Missing required field",
                         "Email format invalid",
                     ]),
-                })
-
-            import_jobs.append(
-                SFTPImportJob(
-                    agency=agency,
-                    source_host="sftp.clientdata.com",
-                    file_name=fname,
-                    file_path_s3=f"s3://debtflow-files/imports/{agency.id}/{fname}",
-                    status=status,
-                    total_records=total,
-                    processed_ok=ok,
-                    processed_errors=errors,
-                    error_details=error_details,
-                    started_at=started,
-                    completed_at=completed,
-                )
-            )
+                ))
 
         # One processing job for realism
         import_jobs.append(
@@ -522,6 +520,7 @@ class Command(BaseCommand):
         )
 
         SFTPImportJob.objects.bulk_create(import_jobs, ignore_conflicts=True)
+        ImportRowError.objects.bulk_create(import_errors)
         self.stdout.write(f"Import jobs: {len(import_jobs)} created")
 
         # ----- Summary -----
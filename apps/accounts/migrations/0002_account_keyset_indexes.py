@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-17 05:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run in a transaction; built this way, the indexes don't block writes to accounts
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='account',
+            index=models.Index(fields=['agency', 'created_at', 'id'], name='idx_account_agency_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='account',
+            index=models.Index(fields=['agency', 'current_balance', 'id'], name='idx_account_agency_balance'),
+        ),
+        AddIndexConcurrently(
+            model_name='account',
+            index=models.Index(fields=['agency', 'priority', 'id'], name='idx_account_agency_priority'),
+        ),
+        AddIndexConcurrently(
+            model_name='account',
+            index=models.Index(fields=['agency', 'status', 'id'], name='idx_account_agency_status_id'),
+        ),
+    ]
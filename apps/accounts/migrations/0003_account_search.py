@@ -0,0 +1,101 @@
+# Generated by Django 5.1.15 on 2026-10-17 05:08
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+# accounts_search_refresh(ids) (re)writes the search documents of these accounts. Statement-level triggers call it
+# with the rows an INSERT or UPDATE touched, so a bulk import refreshes its batch in one statement, and updates that
+# leave the searched columns alone (balances, status...) cost only the comparison of the transition tables.
+SEARCH_TRIGGERS = r"""
+CREATE FUNCTION accounts_search_refresh(account_ids uuid[]) RETURNS void LANGUAGE sql AS $$
+    INSERT INTO accounts_accountsearch (account_id, agency_id, external_ref, phone_digits, haystack, document)
+    SELECT a.id,
+           a.agency_id,
+           lower(a.external_ref),
+           nullif(regexp_replace(coalesce(d.phone, ''), '\D', '', 'g'), ''),
+           lower(concat_ws(' ', a.external_ref, d.full_name, d.email, d.phone)),
+           setweight(to_tsvector('simple', a.external_ref || ' ' || d.full_name), 'A')
+               || setweight(to_tsvector('simple', coalesce(d.email, '')), 'B')
+    FROM accounts_account a
+    JOIN accounts_debtor d ON d.id = a.debtor_id
+    WHERE a.id = ANY(account_ids)
+    ON CONFLICT (account_id) DO UPDATE SET
+        agency_id = EXCLUDED.agency_id,
+        external_ref = EXCLUDED.external_ref,
+        phone_digits = EXCLUDED.phone_digits,
+        haystack = EXCLUDED.haystack,
+        document = EXCLUDED.document
+$$;
+
+CREATE FUNCTION accounts_search_account_inserted() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM accounts_search_refresh(ARRAY(SELECT id FROM new_rows));
+    RETURN NULL;
+END $$;
+
+CREATE FUNCTION accounts_search_account_updated() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM accounts_search_refresh(ARRAY(
+        SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE (n.external_ref, n.agency_id, n.debtor_id) IS DISTINCT FROM (o.external_ref, o.agency_id, o.debtor_id)
+    ));
+    RETURN NULL;
+END $$;
+
+CREATE FUNCTION accounts_search_debtor_updated() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM accounts_search_refresh(ARRAY(
+        SELECT a.id FROM new_rows n JOIN old_rows o ON o.id = n.id JOIN accounts_account a ON a.debtor_id = n.id
+        WHERE (n.full_name, n.email, n.phone) IS DISTINCT FROM (o.full_name, o.email, o.phone)
+    ));
+    RETURN NULL;
+END $$;
+
+CREATE TRIGGER accounts_search_account_inserted AFTER INSERT ON accounts_account
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION accounts_search_account_inserted();
+CREATE TRIGGER accounts_search_account_updated AFTER UPDATE ON accounts_account
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION accounts_search_account_updated();
+CREATE TRIGGER accounts_search_debtor_updated AFTER UPDATE ON accounts_debtor
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION accounts_search_debtor_updated();
+"""
+
+DROP_SEARCH_TRIGGERS = """
+DROP TRIGGER accounts_search_debtor_updated ON accounts_debtor;
+DROP TRIGGER accounts_search_account_updated ON accounts_account;
+DROP TRIGGER accounts_search_account_inserted ON accounts_account;
+DROP FUNCTION accounts_search_debtor_updated();
+DROP FUNCTION accounts_search_account_updated();
+DROP FUNCTION accounts_search_account_inserted();
+DROP FUNCTION accounts_search_refresh(uuid[]);
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_account_keyset_indexes'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.BtreeGinExtension(),
+        migrations.CreateModel(
+            name='AccountSearch',
+            fields=[
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search', serialize=False, to='accounts.account')),
+                ('external_ref', models.CharField(help_text='Lowercased, for exact ref lookups', max_length=100)),
+                ('phone_digits', models.CharField(blank=True, help_text='Debtor phone, digits only', max_length=20, null=True)),
+                ('haystack', models.TextField(help_text='Lowercased ref, name, email and phone, for substring search')),
+                ('document', django.contrib.postgres.search.SearchVectorField(help_text='Ref and name (weight A), email (B), for ranked word-prefix search')),
+                ('agency', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.agency')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['agency', 'external_ref'], name='idx_search_agency_ref'), models.Index(fields=['agency', 'phone_digits'], name='idx_search_agency_phone'), django.contrib.postgres.indexes.GinIndex(fields=['agency', 'haystack'], name='idx_search_haystack', opclasses=['uuid_ops', 'gin_trgm_ops']), django.contrib.postgres.indexes.GinIndex(fields=['agency', 'document'], name='idx_search_document', opclasses=['uuid_ops', 'tsvector_ops'])],
+            },
+        ),
+        migrations.RunSQL(SEARCH_TRIGGERS, reverse_sql=DROP_SEARCH_TRIGGERS),
+        # Existing accounts are backfilled in batches by 0005, after this migration's locks are released
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-17 05:13
+
+import django.db.models.expressions
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+# Run this migration in a maintenance window. Adding a STORED generated column rewrites accounts_account, computing
+# every row's score, under an ACCESS EXCLUSIVE lock: reads and writes of accounts wait for the whole rewrite, and the
+# ALTER itself waits behind any open transaction on the table. Stop the API and the Celery workers first; on a large
+# table the rewrite takes minutes and needs disk for a second copy of the table while it runs.
+
+
+class Migration(migrations.Migration):
+    # The worklist index is then built with CREATE INDEX CONCURRENTLY, which can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0003_account_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='work_score',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.RawSQL("\n    priority * 100\n    + 10 * ln(1 + greatest(current_balance, 0))\n    - coalesce(\n        (due_date - DATE '2020-01-01')::float8,\n        extract(epoch from created_at - TIMESTAMPTZ '2020-01-01 00:00+00') / 86400\n    )\n    - 2 * extract(epoch from coalesce(last_contact_at, created_at) - TIMESTAMPTZ '2020-01-01 00:00+00') / 86400\n", ()), help_text='Call priority in the collector worklist, highest first', output_field=models.FloatField()),
+        ),
+        AddIndexConcurrently(
+            model_name='account',
+            index=models.Index(models.F('assigned_to'), models.OrderBy(models.F('work_score'), descending=True), models.OrderBy(models.F('id'), descending=True), condition=models.Q(('status__in', ['new', 'assigned', 'in_contact', 'negotiating', 'payment_plan'])), name='idx_account_worklist'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-17 05:54
+
+from django.db import migrations, transaction
+
+# Accounts whose search documents are written per transaction
+BACKFILL_BATCH = 5000
+
+
+def backfill_search(apps, schema_editor):
+    """Write the search documents of the accounts that existed before the triggers of 0003.
+
+    In id order, one committed batch at a time, so no statement rewrites the whole
+    table and no transaction holds its locks for longer than a batch. Accounts
+    written since 0003 are kept up to date by the triggers; refreshing them again
+    is harmless.
+    """
+    connection = schema_editor.connection
+    last_id = "00000000-0000-0000-0000-000000000000"
+    while True:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id FROM accounts_account WHERE id > %s ORDER BY id LIMIT %s", [last_id, BACKFILL_BATCH]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                return
+            cursor.execute("SELECT accounts_search_refresh(%s::uuid[])", [ids])
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+    # Each backfill batch commits on its own (see backfill_search)
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0004_account_work_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search, migrations.RunPython.noop),
+    ]
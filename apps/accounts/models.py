@@ -3,7 +3,9 @@ import uuid
 
 from django.conf import settings
 from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.expressions import RawSQL
 
 
 class Agency(models.Model):
@@ -71,6 +73,26 @@ class Collector(models.Model):
         return f"{self.user.get_full_name()} @ {self.agency.name}"
 
 
+# Statuses of the accounts a collector still has to work (settled, closed and disputed accounts leave the worklist)
+WORKLIST_STATUSES = ["new", "assigned", "in_contact", "negotiating", "payment_plan"]
+
+# Call priority of an account, stored by Postgres on every write (Account.work_score). Each day of
+# age weighs the same for every account, so the order never goes stale and nothing recomputes it:
+#   100 per priority level
+#   + 10 per e-fold of balance
+#   + 1 per day the due date (or, without one, the creation date) is in the past
+#   + 2 per day since the last contact (or, without one, the creation date)
+WORK_SCORE_SQL = """
+    priority * 100
+    + 10 * ln(1 + greatest(current_balance, 0))
+    - coalesce(
+        (due_date - DATE '2020-01-01')::float8,
+        extract(epoch from created_at - TIMESTAMPTZ '2020-01-01 00:00+00') / 86400
+    )
+    - 2 * extract(epoch from coalesce(last_contact_at, created_at) - TIMESTAMPTZ '2020-01-01 00:00+00') / 86400
+"""
+
+
 class Account(models.Model):
     """A delinquent account — the primary entity in the system."""
 
@@ -111,12 +133,31 @@ class Account(models.Model):
     last_contact_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    work_score = models.GeneratedField(
+        expression=RawSQL(WORK_SCORE_SQL, ()),
+        output_field=models.FloatField(),
+        db_persist=True,
+        help_text="Call priority in the collector worklist, highest first",
+    )
 
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["agency", "status", "created_at"], name="idx_account_agency_status"),
             models.Index(fields=["agency", "assigned_to"], name="idx_account_agency_collector"),
+            # Keyset pagination of account lists: one per AccountViewSet.ordering_fields, ending with the id tiebreak
+            models.Index(fields=["agency", "created_at", "id"], name="idx_account_agency_created"),
+            models.Index(fields=["agency", "current_balance", "id"], name="idx_account_agency_balance"),
+            models.Index(fields=["agency", "priority", "id"], name="idx_account_agency_priority"),
+            models.Index(fields=["agency", "status", "id"], name="idx_account_agency_status_id"),
+            # The collector worklist: one index seek per page, and for the next account to work
+            models.Index(
+                "assigned_to",
+                models.F("work_score").desc(),
+                models.F("id").desc(),
+                name="idx_account_worklist",
+                condition=models.Q(status__in=WORKLIST_STATUSES),
+            ),
             models.Index(
                 fields=["status"],
                 name="idx_account_pending",
@@ -131,6 +172,32 @@ class Account(models.Model):
         return new_status in self.VALID_TRANSITIONS.get(self.status, [])
 
 
+class AccountSearch(models.Model):
+    """Search document of an account: its ref and its debtor's name, email and phone, scoped by agency.
+
+    Written only by database triggers (migration 0003), so every write path —
+    the API, bulk imports, COPY merges — keeps it current. Read by search.py.
+    """
+
+    account = models.OneToOneField(Account, primary_key=True, on_delete=models.CASCADE, related_name="search")
+    agency = models.ForeignKey(Agency, on_delete=models.CASCADE, related_name="+", db_index=False)
+    external_ref = models.CharField(max_length=100, help_text="Lowercased, for exact ref lookups")
+    phone_digits = models.CharField(max_length=20, null=True, blank=True, help_text="Debtor phone, digits only")
+    haystack = models.TextField(help_text="Lowercased ref, name, email and phone, for substring search")
+    document = SearchVectorField(help_text="Ref and name (weight A), email (B), for ranked word-prefix search")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["agency", "external_ref"], name="idx_search_agency_ref"),
+            models.Index(fields=["agency", "phone_digits"], name="idx_search_agency_phone"),
+            GinIndex(fields=["agency", "haystack"], opclasses=["uuid_ops", "gin_trgm_ops"], name="idx_search_haystack"),
+            GinIndex(fields=["agency", "document"], opclasses=["uuid_ops", "tsvector_ops"], name="idx_search_document"),
+        ]
+
+    def __str__(self):
+        return f"Search document of {self.account_id}"
+
+
 class Activity(models.Model):
     """Timeline activity for an account (notes, status changes, etc.)."""
 
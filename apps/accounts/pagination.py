@@ -0,0 +1,163 @@
+"""Keyset (seek) pagination for list endpoints."""
+import json
+
+from django.db.models import BooleanField, Expression, F, Q, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """CursorPagination whose cursor is the whole sort key of the last row, not just its first field.
+
+    DRF's CursorPagination positions on the first ordering field and steps over
+    ties with an offset, so a page boundary inside a run of equal values (same
+    status, priority or balance) is found by scanning past the run, and rows can
+    repeat or go missing between pages. Here the ordering always ends with the
+    primary key, in the direction of its first field, and the cursor holds every
+    value of the last row, so the next page is "rows after (key, id)". With a
+    (filter column, key, id) index that is one index seek, at any depth. Ordering
+    fields must be non-null.
+    """
+
+    ordering = ("-created_at",)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            ordering += ("-id",) if ordering[0].startswith("-") else ("id",)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, current_position = (self.cursor.reverse, self.cursor.position) if self.cursor else (False, None)
+
+        # Cursor pagination always enforces an ordering.
+        order = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*order)
+        if current_position is not None:
+            queryset = queryset.filter(self._after(order, self._decode_position(current_position)))
+
+        # Fetch an extra row to know whether there is a page after this one
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_following_position = len(results) > len(self.page)
+
+        if reverse:
+            # The query ran backwards: put the page back in order
+            self.page.reverse()
+            self.has_next, self.has_previous = current_position is not None, has_following_position
+        else:
+            self.has_next, self.has_previous = has_following_position, current_position is not None
+        # Links continue from the page's first and last rows; from the cursor itself if the page is empty
+        self.next_position = self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self.next_position
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self.previous_position
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            name = order.lstrip("-")
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(str(value))
+        return json.dumps(values)
+
+    def _decode_position(self, position: str) -> list[str]:
+        try:
+            values = json.loads(position)
+        except ValueError:
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    @staticmethod
+    def _after(ordering, values) -> "RowComparison | Q":
+        """Rows after `values` in `ordering`: (a, b, id) > (va, vb, vid), each field in its own direction.
+
+        When every field sorts the same way (the usual key plus id, whose direction
+        follows the key) that is one row-value comparison, which Postgres uses as
+        the start of a scan of the matching index. A mixed-direction ordering can't
+        be written as one, so it is expanded as a > va OR (a = va AND b < vb) OR ...
+        """
+        names = [order.lstrip("-") for order in ordering]
+        descending = {order.startswith("-") for order in ordering}
+        if len(descending) == 1:
+            return RowComparison(names, values, "<" if descending.pop() else ">")
+
+        after, equal = Q(), {}
+        for order, value in zip(ordering, values, strict=True):
+            name = order.lstrip("-")
+            after |= Q(**equal, **{f"{name}__{'lt' if order.startswith('-') else 'gt'}": value})
+            equal[name] = value
+        return after
+
+
+class RowComparison(Expression):
+    """`(a, b, ...) > (va, vb, ...)` (or `<`) as a filter; each value is converted by its column's field."""
+
+    conditional = True
+    output_field = BooleanField()
+
+    def __init__(self, names, values, operator: str):
+        super().__init__()
+        self.columns = [F(name) for name in names]
+        self.values = [Value(value) for value in values]
+        self.operator = operator
+
+    def get_source_expressions(self):
+        return [*self.columns, *self.values]
+
+    def set_source_expressions(self, exprs):
+        self.columns, self.values = exprs[: len(self.columns)], exprs[len(self.columns) :]
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        resolved = self.copy()
+        resolved.columns = [column.resolve_expression(query, allow_joins, reuse, summarize) for column in self.columns]
+        resolved.values = [
+            Value(value.value, output_field=column.output_field)
+            for column, value in zip(resolved.columns, self.values, strict=True)
+        ]
+        return resolved
+
+    def as_sql(self, compiler, connection):
+        columns, values, params = [], [], []
+        for expressions, sqls in ((self.columns, columns), (self.values, values)):
+            for expression in expressions:
+                sql, expression_params = compiler.compile(expression)
+                sqls.append(sql)
+                params.extend(expression_params)
+        return f"({', '.join(columns)}) {self.operator} ({', '.join(values)})", params
+
+
+class WorklistPagination(KeysetCursorPagination):
+    """The collector worklist, highest call priority first, paged along idx_account_worklist; ?ordering= is ignored."""
+
+    ordering = ("-work_score", "-id")
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
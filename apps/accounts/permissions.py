@@ -1,54 +1,54 @@
-"""Custom permissions for the accounts app."""
+"""Custom permissions for the accounts app.
+
+Roles and agency come from the request's principal (see principal.py), not from
+queries on the user.
+"""
 from rest_framework.permissions import BasePermission
 
+from .principal import get_principal
+
 
 class IsAgencyAdmin(BasePermission):
     """Only agency admins (users in the 'agency_admin' group) or superusers are allowed."""
 
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        if request.user.is_superuser:
-            return True
-        return request.user.groups.filter(name="agency_admin").exists()
+        principal = get_principal(request)
+        return bool(principal) and (principal.is_superuser or principal.is_agency_admin)
 
 
 class IsCollector(BasePermission):
     """Only collectors (users in the 'collector' group) are allowed."""
 
     def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.groups.filter(name="collector").exists()
-        )
+        principal = get_principal(request)
+        return bool(principal) and principal.is_collector
 
 
 class IsAgencyAdminOrCollector(BasePermission):
     """Agency admins or collectors are allowed."""
 
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
+        principal = get_principal(request)
+        if not principal:
             return False
-        if request.user.is_superuser:
-            return True
-        return request.user.groups.filter(name__in=["agency_admin", "collector"]).exists()
+        return principal.is_superuser or principal.is_agency_admin or principal.is_collector
 
 
 class IsAccountOwner(BasePermission):
     """Collector can only access accounts assigned to them within their agency."""
 
     def has_object_permission(self, request, view, obj):
-        if request.user.is_superuser:
+        principal = get_principal(request)
+        if not principal:
+            return False
+        if principal.is_superuser:
             return True
 
-        if request.user.groups.filter(name="agency_admin").exists():
-            collector = getattr(request.user, "collector_profile", None)
-            if collector:
-                return obj.agency_id == collector.agency_id
+        if principal.is_agency_admin:
+            if principal.collector_id:
+                return obj.agency_id == principal.agency_id
             return True
 
-        collector = getattr(request.user, "collector_profile", None)
-        if not collector:
+        if not principal.collector_id:
             return False
-        return obj.agency_id == collector.agency_id and obj.assigned_to_id == collector.id
+        return obj.agency_id == principal.agency_id and obj.assigned_to_id == principal.collector_id
@@ -0,0 +1,175 @@
+"""The resolved principal of a request: who is calling, in which roles and for which agency.
+
+Permission classes and queryset scoping read roles and the agency from here
+instead of querying `user.groups` and `user.collector_profile` on every check.
+A request authenticated by an access token from CustomTokenObtainPairSerializer
+carries all of it in its claims, so resolving it costs no query; otherwise
+(session login, older tokens, tests using force_authenticate) it is loaded
+once and cached in Redis for PRINCIPAL_CACHE_SECONDS, and dropped from the
+cache whenever the user's groups, superuser flag or collector profile change.
+
+Claims are a snapshot taken when the token is issued. CustomTokenRefreshSerializer
+re-reads them from the database on every refresh, and a change to a user's
+groups, superuser flag or collector profile denies the access tokens issued to
+them so far (revocation.deny_user), so the next request refreshes and picks the
+change up instead of carrying the old rights until the refresh chain ends.
+"""
+import uuid
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+AGENCY_ADMIN = "agency_admin"
+COLLECTOR = "collector"
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    is_superuser: bool
+    groups: tuple[str, ...]
+    collector_id: uuid.UUID | None
+    agency_id: uuid.UUID | None
+
+    @property
+    def is_agency_admin(self) -> bool:
+        return AGENCY_ADMIN in self.groups
+
+    @property
+    def is_collector(self) -> bool:
+        return COLLECTOR in self.groups
+
+    @classmethod
+    def from_claims(cls, token) -> "Principal":
+        return cls(
+            user_id=token[settings.SIMPLE_JWT.get("USER_ID_CLAIM", "user_id")],
+            is_superuser=bool(token.get("is_superuser", False)),
+            groups=tuple(token["groups"]),
+            collector_id=_uuid(token.get("collector_id")),
+            agency_id=_uuid(token.get("agency_id")),
+        )
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        from .models import Collector
+
+        collector = Collector.objects.filter(user_id=user.pk).values("id", "agency_id").first() or {}
+        return cls(
+            user_id=user.pk,
+            is_superuser=user.is_superuser,
+            groups=tuple(user.groups.values_list("name", flat=True)),
+            collector_id=collector.get("id"),
+            agency_id=collector.get("agency_id"),
+        )
+
+
+def get_principal(request) -> Principal | None:
+    """The principal of an authenticated request (None if anonymous), resolved once per request."""
+    if not hasattr(request, "_principal"):
+        request._principal = _resolve(request)
+    return request._principal
+
+
+def _resolve(request) -> Principal | None:
+    user = getattr(request, "user", None)
+    if not user or not user.is_authenticated:
+        return None
+    token = getattr(request, "auth", None)
+    if token is not None and hasattr(token, "get") and token.get("groups") is not None:
+        return Principal.from_claims(token)
+
+    key = _cache_key(user.pk)
+    principal = cache.get(key)
+    if principal is None:
+        principal = Principal.from_user(user)
+        cache.set(key, principal, timeout=settings.PRINCIPAL_CACHE_SECONDS)
+    return principal
+
+
+def _cache_key(user_id) -> str:
+    return f"principal:{user_id}"
+
+
+def _uuid(value) -> uuid.UUID | None:
+    return uuid.UUID(str(value)) if value else None
+
+
+def invalidate(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def claims_changed(user_ids):
+    """Drop the users' cached principals and deny the access tokens carrying their old claims.
+
+    Only users with a refresh token still outstanding can hold such an access
+    token, so users who haven't logged in (e.g. being set up) aren't denied a
+    token they are about to be issued.
+    """
+    from django.utils import timezone
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+    from . import revocation
+
+    user_ids = list(user_ids)
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+    signed_in = OutstandingToken.objects.filter(user_id__in=user_ids, expires_at__gt=timezone.now())
+    for user_id in signed_in.values_list("user_id", flat=True).distinct():
+        revocation.deny_user(user_id)
+
+
+def connect_principal_signals():
+    """Call claims_changed when a user's groups, superuser flag or collector profile change.
+
+    Any other save of the user only drops the cached principal.
+    """
+    from django.contrib.auth import get_user_model
+    from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+    from .models import Collector
+
+    user_model = get_user_model()
+
+    def user_saving(sender, instance, update_fields=None, **kwargs):
+        if instance.pk and (update_fields is None or "is_superuser" in update_fields):
+            saved = user_model.objects.filter(pk=instance.pk).values_list("is_superuser", flat=True).first()
+            instance._saved_is_superuser = saved
+
+    def user_changed(sender, instance, created, **kwargs):
+        saved = instance.__dict__.pop("_saved_is_superuser", None)
+        if not created and saved is not None and saved != instance.is_superuser:
+            claims_changed([instance.pk])
+        else:
+            invalidate(instance.pk)
+
+    def collector_saving(sender, instance, update_fields=None, **kwargs):
+        if update_fields is None or "agency" in update_fields or "user" in update_fields:
+            instance._saved_owner = Collector.objects.filter(pk=instance.pk).values_list("user_id", "agency_id").first()
+
+    def collector_changed(sender, instance, **kwargs):
+        saved = instance.__dict__.pop("_saved_owner", False)
+        if saved is False:  # neither the user nor the agency was saved
+            invalidate(instance.user_id)
+        elif saved != (instance.user_id, instance.agency_id):
+            claims_changed({instance.user_id, *(saved[:1] if saved else ())})
+
+    def collector_deleted(sender, instance, **kwargs):
+        claims_changed([instance.user_id])
+
+    def groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+        if not reverse:  # user.groups.add/remove/clear
+            if action.startswith("post_"):
+                claims_changed([instance.pk])
+        elif action == "pre_clear":  # group.user_set.clear(), which doesn't say whom it removes
+            claims_changed(instance.user_set.values_list("pk", flat=True))
+        elif action in ("post_add", "post_remove"):
+            claims_changed(pk_set)
+
+    pre_save.connect(user_saving, sender=user_model, weak=False, dispatch_uid="principal_user_saving")
+    post_save.connect(user_changed, sender=user_model, weak=False, dispatch_uid="principal_user_saved")
+    pre_save.connect(collector_saving, sender=Collector, weak=False, dispatch_uid="principal_collector_saving")
+    post_save.connect(collector_changed, sender=Collector, weak=False, dispatch_uid="principal_collector_saved")
+    post_delete.connect(collector_deleted, sender=Collector, weak=False, dispatch_uid="principal_collector_deleted")
+    m2m_changed.connect(
+        groups_changed, sender=user_model.groups.through, weak=False, dispatch_uid="principal_groups_changed"
+    )
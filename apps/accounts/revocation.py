@@ -0,0 +1,82 @@
+"""Deny-list of revoked access tokens, in Redis.
+
+Access tokens are verified without loading the user (see authentication.StatelessJWTAuthentication),
+so a revoked token has to be refused by the deny-list instead: a token can be
+denied by its `jti` (logout), and all of a user's tokens issued up to a moment
+(deactivation, role changes). Entries expire with the tokens they deny, so the list stays as
+small as the number of tokens revoked within one ACCESS_TOKEN_LIFETIME.
+
+`iat` only has whole seconds, so a token issued in the second of a cut-off would be
+indistinguishable from one issued just before it. Tokens from CustomTokenObtainPairSerializer
+carry the exact moment in an `issued_at` claim (see stamp), and the cut-off is kept to the
+same precision: a token is denied if it was issued at or before the cut-off, and one
+issued after it in the same second (e.g. by the refresh that follows a role change) isn't.
+Tokens without the claim fall back to `iat` and are denied for the whole second.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+ISSUED_AT_CLAIM = "issued_at"
+
+
+def stamp(token):
+    """Record when the token is issued, more precisely than `iat` (see the module docstring)."""
+    token[ISSUED_AT_CLAIM] = time.time()
+
+
+def deny_token(token):
+    """Refuse this access token for the rest of its lifetime."""
+    remaining = int(token["exp"]) - int(time.time())
+    if remaining > 0:
+        cache.set(_token_key(token["jti"]), True, timeout=remaining)
+
+
+def deny_user(user_id):
+    """Refuse every access token issued to the user until now."""
+    lifetime = settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"].total_seconds()
+    cache.set(_user_key(user_id), time.time(), timeout=int(lifetime) + 1)
+
+
+def is_denied(token) -> bool:
+    """One cache round trip: is the token denied by its jti or by its user's cut-off?"""
+    from rest_framework_simplejwt.settings import api_settings
+
+    token_key, user_key = _token_key(token.get("jti")), _user_key(token.get(api_settings.USER_ID_CLAIM))
+    denied = cache.get_many([token_key, user_key])
+    if denied.get(token_key):
+        return True
+    cutoff = denied.get(user_key)
+    if cutoff is None:
+        return False
+    issued_at = token.get(ISSUED_AT_CLAIM)
+    if issued_at is None:
+        return int(token.get("iat", 0)) <= int(cutoff)
+    return float(issued_at) <= cutoff
+
+
+def _token_key(jti) -> str:
+    return f"jwt_denied:{jti}"
+
+
+def _user_key(user_id) -> str:
+    return f"jwt_denied_user:{user_id}"
+
+
+def connect_revocation_signals():
+    """Deny a user's tokens when the user is deactivated or deleted."""
+    from django.contrib.auth import get_user_model
+    from django.db.models.signals import post_delete, post_save
+
+    user_model = get_user_model()
+
+    def user_saved(sender, instance, **kwargs):
+        if not instance.is_active:
+            deny_user(instance.pk)
+
+    def user_deleted(sender, instance, **kwargs):
+        deny_user(instance.pk)
+
+    post_save.connect(user_saved, sender=user_model, weak=False, dispatch_uid="revocation_user_saved")
+    post_delete.connect(user_deleted, sender=user_model, weak=False, dispatch_uid="revocation_user_deleted")
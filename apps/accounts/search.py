@@ -0,0 +1,56 @@
+"""Account search over the AccountSearch documents (GlobalSearch, GET /accounts/search/)."""
+import re
+import uuid
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, Q
+
+from .models import AccountSearch
+
+MAX_RESULTS = 20
+# A query with at least this many digits (and nothing but phone punctuation) is tried as a phone number first
+PHONE_MIN_DIGITS = 7
+PHONE_CHARS = re.compile(r"[\d\s().+-]+")
+
+
+def search_accounts(
+    query: str, agency_id: uuid.UUID | None = None, collector_id: uuid.UUID | None = None, limit: int = MAX_RESULTS
+) -> list[uuid.UUID]:
+    """Ids of the accounts best matching `query`, best first.
+
+    An exact account ref, or a phone number, returns its accounts alone (one
+    btree lookup each). Otherwise accounts whose ref, debtor name, email or
+    phone contain the query (trigram index), or whose words start with the
+    query's words (full-text index), are ranked by full-text rank plus trigram
+    similarity. Scoped to an agency and, for collectors, to their accounts.
+    """
+    query = " ".join(query.split()).lower()
+    if not query:
+        return []
+    documents = AccountSearch.objects.all()
+    if agency_id:
+        documents = documents.filter(agency_id=agency_id)
+    if collector_id:
+        documents = documents.filter(account__assigned_to_id=collector_id)
+
+    exact = Q(external_ref=query)
+    digits = re.sub(r"\D", "", query)
+    if len(digits) >= PHONE_MIN_DIGITS and PHONE_CHARS.fullmatch(query):
+        exact |= Q(phone_digits=digits)
+    matches = list(documents.filter(exact).order_by("account_id").values_list("account_id", flat=True)[:limit])
+    if matches:
+        return matches
+
+    words = re.findall(r"\w+", query)
+    text = Q(haystack__contains=query)
+    rank = TrigramSimilarity("haystack", query)
+    if words:
+        prefixes = SearchQuery(" & ".join(f"{word}:*" for word in words), search_type="raw", config="simple")
+        text |= Q(document=prefixes)
+        rank = rank + SearchRank(F("document"), prefixes)
+    return list(
+        documents.filter(text)
+        .annotate(rank=rank)
+        .order_by("-rank", "account_id")
+        .values_list("account_id", flat=True)[:limit]
+    )
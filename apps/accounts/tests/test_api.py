@@ -157,3 +157,293 @@ class TestCollectorCrossAgencyAccess:
         # Collector should only see their own agency's assigned accounts
         account_ids = [r["id"] for r in response.data.get("results", response.data) if isinstance(r, dict)]
         assert str(account_b.id) not in account_ids
+
+
+@pytest.mark.django_db
+class TestRequestPrincipal:
+    def test_token_claims_scope_the_list_without_auth_queries(self, api_client, collector_user, agency):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from apps.accounts.auth import CustomTokenObtainPairSerializer
+
+        collector = collector_user.collector_profile
+        mine = AccountFactory(agency=agency, assigned_to=collector)
+        AccountFactory(agency=agency)
+        token = CustomTokenObtainPairSerializer.get_token(collector_user).access_token
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get("/api/v1/accounts/")
+
+        assert [account["id"] for account in response.data["results"]] == [str(mine.id)]
+        # Just the page: no user, groups or collector profile lookups
+        assert len(queries) == 1, [query["sql"][:120] for query in queries.captured_queries]
+        assert not [query for query in queries.captured_queries if "auth_user_groups" in query["sql"]]
+
+    def test_cached_principal_follows_group_changes(self, authenticated_collector_client, collector_user, agency):
+        AccountFactory.create_batch(2, agency=agency)
+        assert authenticated_collector_client.get("/api/v1/accounts/").data["results"] == []
+
+        collector_user.groups.add(Group.objects.get_or_create(name="agency_admin")[0])
+
+        assert len(authenticated_collector_client.get("/api/v1/accounts/").data["results"]) == 2
+
+
+def _bearer(client, user):
+    from apps.accounts.auth import CustomTokenObtainPairSerializer
+
+    refresh = CustomTokenObtainPairSerializer.get_token(user)
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+    return refresh
+
+
+@pytest.mark.django_db
+class TestStatelessJWTAuthentication:
+    def test_user_row_loaded_only_when_needed(self, api_client, admin_user, agency):
+        from apps.accounts.models import Activity
+
+        account = AccountFactory(agency=agency)
+        _bearer(api_client, admin_user)
+
+        response = api_client.get("/api/v1/auth/me/")
+        assert (response.data["username"], response.data["groups"]) == ("admin", ["agency_admin"])
+
+        response = api_client.post(f"/api/v1/accounts/{account.id}/add-note/", {"text": "Called"}, format="json")
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Activity.objects.get(account=account, description="Called").user == admin_user
+
+    def test_logout_revokes_access_and_refresh_tokens(self, api_client, admin_user):
+        refresh = _bearer(api_client, admin_user)
+
+        response = api_client.post("/api/v1/auth/logout/", {"refresh": str(refresh)}, format="json")
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert api_client.get("/api/v1/accounts/").status_code == status.HTTP_401_UNAUTHORIZED
+        api_client.credentials()
+        refreshed = api_client.post("/api/v1/auth/token/refresh/", {"refresh": str(refresh)}, format="json")
+        assert refreshed.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_user_tokens_refused(self, api_client, admin_user):
+        _bearer(api_client, admin_user)
+        assert api_client.get("/api/v1/accounts/").status_code == status.HTTP_200_OK
+
+        admin_user.is_active = False
+        admin_user.save()
+
+        assert api_client.get("/api/v1/accounts/").status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_removed_role_is_not_carried_over_by_refresh(self, api_client, admin_user):
+        from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+        refresh = _bearer(api_client, admin_user)
+        assert api_client.get("/api/v1/auth/me/").data["groups"] == ["agency_admin"]
+
+        admin_user.groups.remove(Group.objects.get(name="agency_admin"))
+
+        assert api_client.get("/api/v1/auth/me/").status_code == status.HTTP_401_UNAUTHORIZED
+        api_client.credentials()
+        response = api_client.post("/api/v1/auth/token/refresh/", {"refresh": str(refresh)}, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        assert AccessToken(response.data["access"])["groups"] == []
+        assert RefreshToken(response.data["refresh"])["groups"] == []
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        assert api_client.get("/api/v1/auth/me/").data["groups"] == []
+
+    def test_token_issued_in_the_second_of_a_cutoff_is_denied_only_if_issued_before_it(self, admin_user, monkeypatch):
+        import time
+        from types import SimpleNamespace
+
+        from django.core.cache import cache
+
+        from apps.accounts import revocation
+        from apps.accounts.auth import CustomTokenObtainPairSerializer
+
+        # All within one second: issued, cut off, issued again
+        second = int(time.time())
+        clock = iter([second + 0.2, second + 0.5, second + 0.8, second + 0.9])
+        monkeypatch.setattr(revocation, "time", SimpleNamespace(time=lambda: next(clock)))
+
+        before = CustomTokenObtainPairSerializer.get_token(admin_user).access_token
+        revocation.deny_user(admin_user.pk)
+        after = CustomTokenObtainPairSerializer.get_token(admin_user).access_token
+
+        assert revocation.is_denied(before)
+        assert not revocation.is_denied(after)
+        legacy = CustomTokenObtainPairSerializer.get_token(admin_user).access_token
+        del legacy[revocation.ISSUED_AT_CLAIM]
+        legacy["iat"] = second
+        assert revocation.is_denied(legacy)  # without the claim, the whole second is denied
+        cache.delete(revocation._user_key(admin_user.pk))
+
+    def test_unrelated_user_save_keeps_tokens(self, api_client, admin_user):
+        _bearer(api_client, admin_user)
+
+        admin_user.first_name = "Renamed"
+        admin_user.save()
+
+        assert api_client.get("/api/v1/auth/me/").status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestAccountKeysetPagination:
+    @pytest.mark.parametrize("ordering", ["priority", "-current_balance", "status", "-created_at"])
+    def test_pages_cover_every_account_once_in_order(self, authenticated_admin_client, agency, monkeypatch, ordering):
+        from apps.accounts.pagination import KeysetCursorPagination
+
+        monkeypatch.setattr(KeysetCursorPagination, "page_size", 3)
+        for i in range(10):  # long runs of equal keys
+            AccountFactory(agency=agency, priority=i % 2, current_balance=100 + i % 3, status=Account.Status.NEW)
+        name = ordering.lstrip("-")
+        expected = sorted(Account.objects.filter(agency=agency), key=lambda a: (getattr(a, name), a.id))
+        if ordering.startswith("-"):
+            expected.reverse()
+
+        seen, url = [], f"/api/v1/accounts/?ordering={ordering}"
+        while url:
+            response = authenticated_admin_client.get(url)
+            seen.append([row["id"] for row in response.data["results"]])
+            url = response.data["next"]
+
+        assert [account_id for page in seen for account_id in page] == [str(a.id) for a in expected]
+        # And back again from the last page
+        pages_back, url = [], response.data["previous"]
+        while url:
+            response = authenticated_admin_client.get(url)
+            pages_back.append([row["id"] for row in response.data["results"]])
+            url = response.data["previous"]
+        assert pages_back == seen[-2::-1]
+
+    def test_deep_page_seeks_instead_of_offsetting(self, authenticated_admin_client, agency, monkeypatch):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from apps.accounts.pagination import KeysetCursorPagination
+
+        monkeypatch.setattr(KeysetCursorPagination, "page_size", 2)
+        AccountFactory.create_batch(5, agency=agency, priority=1)
+        next_page = authenticated_admin_client.get("/api/v1/accounts/?ordering=priority").data["next"]
+
+        with CaptureQueriesContext(connection) as queries:
+            authenticated_admin_client.get(next_page)
+
+        sql = queries.captured_queries[-1]["sql"]
+        assert "OFFSET" not in sql
+        assert '("accounts_account"."priority", "accounts_account"."id") > (1, ' in sql
+
+    def test_invalid_cursor(self, authenticated_admin_client):
+        response = authenticated_admin_client.get("/api/v1/accounts/?cursor=cD1ub3Rqc29u")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestAccountSearchAPI:
+    def _search(self, client, q):
+        response = client.get("/api/v1/accounts/search/", {"q": q})
+        assert response.status_code == status.HTTP_200_OK
+        return [row["external_ref"] for row in response.data["results"]]
+
+    def test_exact_ref_and_phone_shortcuts(self, authenticated_admin_client, agency):
+        # Same name and no email, so only the refs tell the two apart in the ranking
+        for ref, phone in [("ACC-100", "555-010-2030"), ("ACC-1000", "555-010-2031")]:
+            debtor = DebtorFactory(full_name="Pat Doe", email=None, phone=phone)
+            AccountFactory(agency=agency, external_ref=ref, debtor=debtor)
+
+        assert self._search(authenticated_admin_client, "acc-100") == ["ACC-100"]
+        assert self._search(authenticated_admin_client, "(555) 010 2031") == ["ACC-1000"]
+        assert self._search(authenticated_admin_client, "ACC-10") == ["ACC-100", "ACC-1000"]
+
+    def test_ranked_by_name_within_scope(self, authenticated_collector_client, collector_user, agency):
+        collector = collector_user.collector_profile
+        for ref, name in [("A-1", "Joanna Smith"), ("A-2", "John Smith")]:
+            debtor = DebtorFactory(full_name=name, email=None)  # a generated email could match the queries too
+            AccountFactory(agency=agency, assigned_to=collector, external_ref=ref, debtor=debtor)
+        AccountFactory(agency=agency, external_ref="A-3", debtor=DebtorFactory(full_name="John Smith"))  # not theirs
+        AccountFactory(external_ref="A-4", debtor=DebtorFactory(full_name="John Smith"))  # other agency
+
+        assert self._search(authenticated_collector_client, "john smith") == ["A-2"]
+        assert self._search(authenticated_collector_client, "joanna")[0] == "A-1"
+        assert sorted(self._search(authenticated_collector_client, "jo smi")) == ["A-1", "A-2"]
+        assert self._search(authenticated_collector_client, "  ") == []
+
+    def test_list_search_filter_uses_search_document(self, authenticated_admin_client, agency):
+        AccountFactory(agency=agency, debtor=DebtorFactory(email="pay.me@example.com"))
+        AccountFactory(agency=agency)
+
+        response = authenticated_admin_client.get("/api/v1/accounts/", {"search": "PAY.ME"})
+
+        assert len(response.data["results"]) == 1
+
+
+@pytest.mark.django_db
+class TestCollectorWorklistAPI:
+    def test_open_accounts_paged_by_work_score(
+        self, authenticated_collector_client, collector_user, agency, monkeypatch
+    ):
+        from apps.accounts.pagination import WorklistPagination
+
+        monkeypatch.setattr(WorklistPagination, "page_size", 2)
+        collector = collector_user.collector_profile
+        for i in range(5):
+            AccountFactory(agency=agency, assigned_to=collector, priority=i % 2, current_balance=100 * (i + 1))
+        AccountFactory(agency=agency, assigned_to=collector, status=Account.Status.SETTLED)  # worked
+        AccountFactory(agency=agency)  # not theirs
+        expected = list(
+            Account.objects.filter(assigned_to=collector, status=Account.Status.NEW)
+            .order_by("-work_score", "-id")
+            .values_list("id", flat=True)
+        )
+
+        seen, url = [], "/api/v1/accounts/worklist/?ordering=created_at"
+        while url:
+            response = authenticated_collector_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            seen += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+
+        assert seen == [str(account_id) for account_id in expected]
+
+    def test_score_weighs_priority_due_date_balance_and_contact(self, agency):
+        from datetime import date, timedelta
+
+        from django.utils import timezone
+
+        base = {"agency": agency, "priority": 1, "current_balance": 500, "due_date": date(2026, 1, 1)}
+        reference = AccountFactory(**base)
+        higher_priority = AccountFactory(**{**base, "priority": 2})
+        more_overdue = AccountFactory(**{**base, "due_date": date(2025, 12, 1)})
+        larger_balance = AccountFactory(**{**base, "current_balance": 5000})
+        just_called = AccountFactory(**base)
+        just_called.last_contact_at = timezone.now() + timedelta(days=1)
+        just_called.save(update_fields=["last_contact_at"])
+
+        scores = dict(Account.objects.values_list("id", "work_score"))
+        for account in (higher_priority, more_overdue, larger_balance):
+            assert scores[account.id] > scores[reference.id]
+        assert scores[just_called.id] < scores[reference.id]
+
+    def test_next_is_the_head_of_the_worklist(self, authenticated_collector_client, collector_user, agency):
+        from datetime import date
+
+        collector = collector_user.collector_profile
+        due = date(2026, 1, 1)
+        AccountFactory(agency=agency, assigned_to=collector, priority=1, due_date=due)
+        top = AccountFactory(agency=agency, assigned_to=collector, priority=9, due_date=due)
+        AccountFactory(agency=agency, priority=10, due_date=due)  # not theirs
+
+        response = authenticated_collector_client.get("/api/v1/accounts/worklist/next/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["id"] == str(top.id)
+
+        Account.objects.filter(assigned_to=collector).update(status=Account.Status.CLOSED)
+        response = authenticated_collector_client.get("/api/v1/accounts/worklist/next/")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    def test_user_without_collector_profile_has_empty_worklist(self, api_client, agency):
+        from django.contrib.auth.models import User
+
+        api_client.force_authenticate(user=User.objects.create_superuser(username="root", password="x"))
+        AccountFactory(agency=agency, assigned_to=CollectorFactory(agency=agency))
+
+        assert api_client.get("/api/v1/accounts/worklist/").data["results"] == []
+        assert api_client.get("/api/v1/accounts/worklist/next/").status_code == status.HTTP_204_NO_CONTENT
@@ -79,3 +79,24 @@ class TestCollector:
         assert collector.user
         assert collector.agency
         assert str(collector.agency.name) in str(collector)
+
+
+@pytest.mark.django_db
+class TestAccountSearchDocument:
+    def test_kept_current_by_triggers(self):
+        from apps.accounts.models import AccountSearch, Debtor
+
+        debtor = DebtorFactory(full_name="Maria Silva", email="maria@example.com", phone="(555) 010-2030")
+        account = AccountFactory(debtor=debtor, external_ref="ACC-XY1")
+
+        document = AccountSearch.objects.get(account=account)
+        assert (document.external_ref, document.phone_digits) == ("acc-xy1", "5550102030")
+        assert document.agency_id == account.agency_id
+        assert document.haystack == "acc-xy1 maria silva maria@example.com (555) 010-2030"
+
+        Debtor.objects.filter(pk=debtor.pk).update(full_name="Maria Souza")  # queryset updates too
+        Account.objects.filter(pk=account.pk).update(current_balance=1)  # not a searched column
+        assert "maria souza" in AccountSearch.objects.get(account=account).haystack
+
+        account.delete()
+        assert not AccountSearch.objects.exists()
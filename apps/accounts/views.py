@@ -5,8 +5,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from .filters import AccountFilter
-from .models import Account, Activity, Agency, Collector
+from .models import WORKLIST_STATUSES, Account, Activity, Agency, Collector
+from .pagination import KeysetCursorPagination, WorklistPagination
 from .permissions import IsAccountOwner, IsAgencyAdmin, IsAgencyAdminOrCollector
+from .principal import get_principal
+from .search import search_accounts
 from .serializers import (
     AccountCreateSerializer,
     AccountDetailSerializer,
@@ -33,24 +36,26 @@ class AccountViewSet(viewsets.ModelViewSet):
     - add_note: add text note to timeline
     - timeline: full activity list
     - transition: validated state machine transition
+    - worklist: the caller's open accounts by call priority; worklist/next: the top one
     """
 
     filterset_class = AccountFilter
+    pagination_class = KeysetCursorPagination
+    # Each is paginated on (field, id), served by an (agency, field, id) index
     ordering_fields = ["created_at", "current_balance", "priority", "status"]
     ordering = ["-created_at"]
 
     def get_queryset(self):
         qs = Account.objects.select_related("debtor", "assigned_to__user", "agency")
-        user = self.request.user
+        principal = get_principal(self.request)
 
         # Collectors can only see their agency's accounts assigned to them
-        collector = getattr(user, "collector_profile", None)
-        if collector and not user.groups.filter(name="agency_admin").exists():
-            return qs.filter(agency=collector.agency, assigned_to=collector)
+        if principal.collector_id and not principal.is_agency_admin:
+            return qs.filter(agency_id=principal.agency_id, assigned_to_id=principal.collector_id)
 
         # Agency admins see all accounts in their agency
-        if collector:
-            return qs.filter(agency=collector.agency)
+        if principal.collector_id:
+            return qs.filter(agency_id=principal.agency_id)
 
         # Superusers see everything
         return qs
@@ -125,6 +130,40 @@ class AccountViewSet(viewsets.ModelViewSet):
 
         return Response(AccountDetailSerializer(account).data)
 
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        """Ranked account search by ref, debtor name, email or phone (?q=); exact refs and phones first."""
+        principal = get_principal(request)
+        scoped_to_collector = principal.collector_id and not principal.is_agency_admin
+        account_ids = search_accounts(
+            request.query_params.get("q", ""),
+            agency_id=principal.agency_id,
+            collector_id=principal.collector_id if scoped_to_collector else None,
+        )
+        accounts = self.get_queryset().in_bulk(account_ids)
+        results = [accounts[account_id] for account_id in account_ids if account_id in accounts]
+        return Response({"results": AccountListSerializer(results, many=True).data})
+
+    @action(detail=False, methods=["get"], url_path="worklist", pagination_class=WorklistPagination)
+    def worklist(self, request):
+        """The caller's accounts still to be worked, highest work_score first (filters apply, ordering doesn't)."""
+        page = self.paginate_queryset(self.filter_queryset(self._worklist_queryset()))
+        return self.get_paginated_response(AccountListSerializer(page, many=True).data)
+
+    @action(detail=False, methods=["get"], url_path="worklist/next")
+    def worklist_next(self, request):
+        """The account to work next: the head of the worklist, or 204 when it is empty."""
+        account = self._worklist_queryset().order_by("-work_score", "-id").first()
+        if account is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(AccountListSerializer(account).data)
+
+    def _worklist_queryset(self):
+        collector_id = get_principal(self.request).collector_id
+        if not collector_id:
+            return Account.objects.none()
+        return self.get_queryset().filter(assigned_to_id=collector_id, status__in=WORKLIST_STATUSES)
+
     @action(detail=False, methods=["get"], url_path="export")
     def export(self, request):
         """Trigger async CSV export via Celery."""
@@ -153,10 +192,9 @@ class CollectorViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_superuser:
+        principal = get_principal(self.request)
+        if principal.is_superuser:
             return Collector.objects.all().select_related("user")
-        collector = getattr(user, "collector_profile", None)
-        if collector:
-            return Collector.objects.filter(agency=collector.agency).select_related("user")
+        if principal.collector_id:
+            return Collector.objects.filter(agency_id=principal.agency_id).select_related("user")
         return Collector.objects.none()
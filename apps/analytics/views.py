@@ -10,6 +10,7 @@ from rest_framework.views import APIView
 
 from apps.accounts.models import Account
 from apps.accounts.permissions import IsAgencyAdmin
+from apps.accounts.principal import get_principal
 from apps.payments.models import Payment
 
 
@@ -19,11 +20,10 @@ class DashboardView(APIView):
     permission_classes = [IsAuthenticated, IsAgencyAdmin]
 
     def get(self, request):
-        user = request.user
-        collector = getattr(user, "collector_profile", None)
+        principal = get_principal(request)
         accounts = Account.objects.all()
-        if collector:
-            accounts = accounts.filter(agency=collector.agency)
+        if principal.collector_id:
+            accounts = accounts.filter(agency_id=principal.agency_id)
 
         total_accounts = accounts.count()
         settled = accounts.filter(status=Account.Status.SETTLED).count()
@@ -65,11 +65,10 @@ class CollectorPerformanceView(APIView):
     permission_classes = [IsAuthenticated, IsAgencyAdmin]
 
     def get(self, request):
-        user = request.user
-        collector = getattr(user, "collector_profile", None)
+        principal = get_principal(request)
         accounts = Account.objects.all()
-        if collector:
-            accounts = accounts.filter(agency=collector.agency)
+        if principal.collector_id:
+            accounts = accounts.filter(agency_id=principal.agency_id)
 
         results = (
             accounts.filter(assigned_to__isnull=False)
@@ -144,11 +143,10 @@ class AgingReportView(APIView):
     permission_classes = [IsAuthenticated, IsAgencyAdmin]
 
     def get(self, request):
-        user = request.user
-        collector = getattr(user, "collector_profile", None)
+        principal = get_principal(request)
         accounts = Account.objects.exclude(status__in=[Account.Status.SETTLED, Account.Status.CLOSED])
-        if collector:
-            accounts = accounts.filter(agency=collector.agency)
+        if principal.collector_id:
+            accounts = accounts.filter(agency_id=principal.agency_id)
 
         today = timezone.now().date()
         buckets = [
@@ -7,4 +7,6 @@ class AuditConfig(AppConfig):
     verbose_name = "Audit"
 
     def ready(self):
-        import apps.audit.signals  # noqa: F401
+        from apps.audit.signals import connect_audit_signals
+
+        connect_audit_signals()
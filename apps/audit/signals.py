@@ -1,22 +1,33 @@
 """Django signals for automatic audit logging on model save/delete."""
 import logging
+import threading
+from contextlib import contextmanager
 from decimal import Decimal
 
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
 from django.db.models.signals import post_delete, post_save, pre_save
-from django.dispatch import receiver
 
-from .middleware import AUDITED_MODELS, create_audit_log
+from .middleware import AUDITED_MODELS, create_audit_log, get_audit_ip, get_audit_user
+from .models import AuditLog
 
 logger = logging.getLogger(__name__)
 
 # Cache original field values before save
 _original_values = {}
 
+# Models whose per-row signals are suspended on this thread (see bulk_audit)
+_bulk_audit = threading.local()
+
 
 def _get_model_label(instance) -> str:
     return f"{instance._meta.app_label}.{instance._meta.object_name}"
 
 
+def _audited_per_row(model_label: str) -> bool:
+    return model_label in AUDITED_MODELS and model_label not in getattr(_bulk_audit, "labels", frozenset())
+
+
 def _get_field_values(instance) -> dict:
     """Get current field values as a dict (excluding relations)."""
     result = {}
@@ -33,11 +44,20 @@ def _get_field_values(instance) -> dict:
     return result
 
 
-@receiver(pre_save)
+def _diff_values(old_values: dict, new_values: dict) -> dict:
+    """Build the {field: {"old", "new"}} diff stored on update entries."""
+    changes = {}
+    for key in new_values:
+        old_val = old_values.get(key)
+        new_val = new_values[key]
+        if str(old_val) != str(new_val):
+            changes[key] = {"old": old_val, "new": new_val}
+    return changes
+
+
 def capture_pre_save(sender, instance, **kwargs):
     """Capture field values before save for change diff."""
-    model_label = _get_model_label(instance)
-    if model_label not in AUDITED_MODELS:
+    if not _audited_per_row(_get_model_label(instance)):
         return
 
     if instance.pk:
@@ -48,33 +68,109 @@ def capture_pre_save(sender, instance, **kwargs):
             pass
 
 
-@receiver(post_save)
 def audit_post_save(sender, instance, created, **kwargs):
     """Create audit log entry after model save."""
-    model_label = _get_model_label(instance)
-    if model_label not in AUDITED_MODELS:
+    if not _audited_per_row(_get_model_label(instance)):
         return
 
     if created:
         create_audit_log(instance, "create", {"new": _get_field_values(instance)})
     else:
         old_values = _original_values.pop(instance.pk, {})
-        new_values = _get_field_values(instance)
-        changes = {}
-        for key in new_values:
-            old_val = old_values.get(key)
-            new_val = new_values[key]
-            if str(old_val) != str(new_val):
-                changes[key] = {"old": old_val, "new": new_val}
+        changes = _diff_values(old_values, _get_field_values(instance))
         if changes:
             create_audit_log(instance, "update", changes)
 
 
-@receiver(post_delete)
 def audit_post_delete(sender, instance, **kwargs):
     """Create audit log entry after model delete."""
-    model_label = _get_model_label(instance)
-    if model_label not in AUDITED_MODELS:
+    if not _audited_per_row(_get_model_label(instance)):
         return
 
     create_audit_log(instance, "delete", {"deleted": _get_field_values(instance)})
+
+
+def connect_audit_signals():
+    """Connect the per-row handlers to the audited models only (called from AuditConfig.ready).
+
+    Connecting them per sender rather than to every model keeps other models free
+    of signal receivers, so Django can still fast-delete them (one DELETE instead
+    of a SELECT plus per-row post_delete dispatch).
+    """
+    for label in AUDITED_MODELS:
+        model = apps.get_model(label)
+        pre_save.connect(capture_pre_save, sender=model, dispatch_uid=f"audit_pre_save_{label}")
+        post_save.connect(audit_post_save, sender=model, dispatch_uid=f"audit_post_save_{label}")
+        post_delete.connect(audit_post_delete, sender=model, dispatch_uid=f"audit_post_delete_{label}")
+
+
+def capture_bulk_pre_save(instances) -> dict:
+    """Bulk counterpart of `capture_pre_save` for rows about to be rewritten with bulk_create.
+
+    Returns pk -> field values, to be passed to `audit_bulk_post_save` after the write.
+    """
+    return {instance.pk: _get_field_values(instance) for instance in instances}
+
+
+def audit_bulk_post_save(model, before: dict, instances: list):
+    """Bulk counterpart of `audit_post_save` for rows written with bulk_create, which fires no signals.
+
+    Instances whose pk is missing from `before` are logged as creates, the rest as
+    updates with the same diff shape the per-row signal produces.
+    """
+    if f"{model._meta.app_label}.{model._meta.object_name}" not in AUDITED_MODELS:
+        return
+
+    user = get_audit_user()
+    if user and not user.is_authenticated:
+        user = None
+    content_type = ContentType.objects.get_for_model(model)
+    ip_address = get_audit_ip()
+
+    entries = []
+    for instance in instances:
+        if instance.pk not in before:
+            action, changes = AuditLog.Action.CREATE, {"new": _get_field_values(instance)}
+        else:
+            action = AuditLog.Action.UPDATE
+            changes = _diff_values(before[instance.pk], _get_field_values(instance))
+            if not changes:
+                continue
+        entries.append(
+            AuditLog(
+                user=user,
+                action=action,
+                content_type=content_type,
+                object_id=instance.pk,
+                changes=changes,
+                ip_address=ip_address,
+            )
+        )
+
+    # No try/except here: callers run inside the write's transaction, so a failed
+    # audit insert must roll back the rows it describes.
+    AuditLog.objects.bulk_create(entries)
+
+
+@contextmanager
+def bulk_audit(*models):
+    """Suspend the per-row audit signals for `models` on this thread.
+
+    Inside the block the caller audits its own writes to those models with
+    `capture_bulk_pre_save` / `audit_bulk_post_save`: no re-SELECT per save, one
+    AuditLog INSERT per batch, and the same diffs the signals would have written.
+    """
+    previous = getattr(_bulk_audit, "labels", frozenset())
+    _bulk_audit.labels = previous | {f"{model._meta.app_label}.{model._meta.object_name}" for model in models}
+    try:
+        yield
+    finally:
+        _bulk_audit.labels = previous
+
+
+def save_audited(instance, before: dict, update_fields: list[str] | None = None):
+    """Save one instance and audit it against `before` (from `capture_bulk_pre_save`, taken
+    before the instance was modified) instead of having `capture_pre_save` re-SELECT it."""
+    with bulk_audit(type(instance)):
+        instance.save(update_fields=update_fields)
+    audit_bulk_post_save(type(instance), before, [instance])
@@ -106,3 +106,35 @@ class TestAuditSignals:
         initial_count = AuditLog.objects.count()
         User.objects.create_user(username="no_audit", password="pass")
         assert AuditLog.objects.count() == initial_count
+
+    def test_bulk_audit_suspends_row_signals_for_listed_models(self, django_assert_num_queries):
+        from apps.audit.signals import bulk_audit
+
+        agency = Agency.objects.create(name="Bulk")
+        account = AccountFactory()
+        AuditLog.objects.all().delete()
+
+        with bulk_audit(Agency):
+            agency.name = "Bulk Renamed"
+            with django_assert_num_queries(1):  # the UPDATE only: no re-SELECT, no AuditLog INSERT
+                agency.save()
+            account.current_balance = 1
+            account.save()
+
+        assert not AuditLog.objects.filter(object_id=agency.pk).exists()
+        assert AuditLog.objects.filter(object_id=account.pk, action="update").exists()
+
+    def test_save_audited_matches_signal_diff(self, django_assert_num_queries):
+        from apps.audit.signals import capture_bulk_pre_save, save_audited
+
+        agency = Agency.objects.create(name="Before")
+        AuditLog.objects.all().delete()
+
+        before = capture_bulk_pre_save([agency])
+        agency.name = "After"
+        with django_assert_num_queries(2):  # UPDATE and AuditLog INSERT, no re-SELECT
+            save_audited(agency, before, update_fields=["name"])
+
+        log = AuditLog.objects.get(object_id=agency.pk)
+        assert log.action == "update"
+        assert log.changes == {"name": {"old": "Before", "new": "After"}}
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import SFTPImportJob
+from .models import ImportRowError, RemoteFileEntry, SFTPImportJob
 
 
 @admin.register(SFTPImportJob)
@@ -8,4 +8,19 @@ class SFTPImportJobAdmin(admin.ModelAdmin):
     list_display = ["file_name", "agency", "status", "total_records", "processed_ok", "processed_errors", "created_at"]
     list_filter = ["status", "agency"]
     search_fields = ["file_name"]
-    readonly_fields = ["error_details"]
+    readonly_fields = ["checkpoint_offset", "checkpoint_line"]
+
+
+@admin.register(ImportRowError)
+class ImportRowErrorAdmin(admin.ModelAdmin):
+    list_display = ["job", "line", "error_type", "error"]
+    list_filter = ["error_type"]
+    search_fields = ["job__file_name"]
+    raw_id_fields = ["job"]
+
+
+@admin.register(RemoteFileEntry)
+class RemoteFileEntryAdmin(admin.ModelAdmin):
+    list_display = ["name", "remote_dir", "agency", "size", "status", "updated_at"]
+    list_filter = ["status", "agency"]
+    search_fields = ["name"]
@@ -0,0 +1,301 @@
+"""Split import files into line-aligned byte ranges for parallel import, and resolve repeated external_refs."""
+import csv
+import hashlib
+import logging
+from bisect import bisect_right
+from collections.abc import Iterator
+from contextlib import closing
+
+from django.conf import settings
+
+from .sources import iter_rows, open_binary
+
+logger = logging.getLogger(__name__)
+
+# What happens when an external_ref occurs more than once in one file
+FIRST_WINS = "first"
+LAST_WINS = "last"
+REJECT = "reject"
+DUPLICATE_POLICIES = (FIRST_WINS, LAST_WINS, REJECT)
+
+# Winning line of a duplicated ref under REJECT: no occurrence is imported
+REJECTED = 0
+# Winning line of a ref a streamed import already imported earlier in the file (FIRST_WINS)
+IMPORTED_EARLIER = -1
+
+
+def ref_key(external_ref: str) -> str:
+    """Short stable digest of an external_ref, used to exchange duplicate info between tasks."""
+    return hashlib.blake2b(external_ref.strip().encode(), digest_size=8).hexdigest()
+
+
+def duplicate_policy(agency) -> str:
+    """The agency's duplicate policy: settings["sftp"]["duplicate_policy"], else SFTP_IMPORT_DUPLICATE_POLICY."""
+    policy = agency.settings.get("sftp", {}).get("duplicate_policy") or settings.SFTP_IMPORT_DUPLICATE_POLICY
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy {policy!r}, expected one of {', '.join(DUPLICATE_POLICIES)}")
+    return policy
+
+
+class RefFilter:
+    """Fixed-size Bloom filter over external_refs.
+
+    `add` says whether a ref was (probably) added before: a ref that was is never
+    missed, and a new one is taken for a repeat at a rate that grows as the filter fills.
+    """
+
+    HASHES = 4
+
+    def __init__(self, size_bytes: int):
+        self.bits = bytearray(size_bytes)
+        self.size = size_bytes * 8
+
+    def add(self, external_ref: str) -> bool:
+        digest = hashlib.blake2b(external_ref.strip().encode(), digest_size=16).digest()
+        first, step = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        seen = True
+        for i in range(self.HASHES):
+            bit = (first + i * step) % self.size
+            mask = 1 << (bit & 7)
+            if not self.bits[bit >> 3] & mask:
+                self.bits[bit >> 3] |= mask
+                seen = False
+        return seen
+
+
+class DuplicateIndex:
+    """Finds the external_refs repeated in a file, and the line that takes effect for each, in two passes.
+
+    The first pass (`add`) runs every ref through a RefFilter of
+    SFTP_DUPLICATE_FILTER_BYTES and keeps only the refs it has probably seen
+    before: the repeated ones, plus the filter's false positives. The second
+    (`recheck`) records the lines of those candidates alone, which tells the
+    repeated refs apart exactly. Memory is the filter plus the candidates, not an
+    entry per distinct ref in the file.
+
+    Only occurrences that pass validation are rechecked (see _recheck), so a row
+    that fails validation neither wins over a valid one nor makes a ref repeated.
+    """
+
+    def __init__(self, policy: str = LAST_WINS, filter_bytes: int | None = None):
+        self.policy = policy
+        self.filter = RefFilter(filter_bytes or settings.SFTP_DUPLICATE_FILTER_BYTES)
+        self.candidates = set()
+        self.lines = {}
+
+    def add(self, external_ref: str):
+        """First pass: see one occurrence of a ref."""
+        if self.filter.add(external_ref):
+            self.candidates.add(ref_key(external_ref))
+
+    def is_candidate(self, external_ref: str) -> bool:
+        return ref_key(external_ref) in self.candidates
+
+    def recheck(self, external_ref: str, line: int):
+        """Second pass: record the line of an occurrence, if its ref is a candidate."""
+        key = ref_key(external_ref)
+        if key in self.candidates:
+            self.lines.setdefault(key, []).append(line)
+
+    def winners(self) -> dict[str, int]:
+        """ref_key -> winning line for every duplicated ref (REJECTED under the reject policy)."""
+        duplicated = {key: lines for key, lines in self.lines.items() if len(lines) > 1}
+        if self.policy == REJECT:
+            return dict.fromkeys(duplicated, REJECTED)
+        position = 0 if self.policy == FIRST_WINS else -1
+        return {key: lines[position] for key, lines in duplicated.items()}
+
+    def range_winners(self, first_lines: list[int]) -> list[dict[str, int]]:
+        """winners() split by line range: the i-th dict holds the duplicated refs occurring in lines
+        first_lines[i] up to first_lines[i + 1], so a range gets only the refs it can meet.
+        """
+        ranges = [{} for _ in first_lines]
+        for key, winner in self.winners().items():
+            for line in self.lines[key]:
+                ranges[bisect_right(first_lines, line) - 1][key] = winner
+        return ranges
+
+
+class TooManyStreamedRefs(Exception):
+    """A streamed import saw more distinct refs than StreamedDuplicates may keep (SFTP_STREAM_MAX_SEEN_REFS)."""
+
+
+class StreamedDuplicates:
+    """Resolves duplicated refs batch by batch, for a file that is read only once (no pre-scan).
+
+    Under FIRST_WINS every ref already seen in an earlier batch loses. The refs
+    seen so far are kept exactly, up to `max_refs` (SFTP_STREAM_MAX_SEEN_REFS);
+    a batch that would go past it raises TooManyStreamedRefs before it is
+    imported, and the streamed import continues from its checkpoint on a staged
+    copy, whose pre-scan resolves the rest (see tasks.sftp_tasks.stream_import_file).
+
+    Under LAST_WINS nothing is kept across batches: only repeats within a batch are
+    collapsed, and a ref repeated in a later batch is upserted again over the
+    earlier row. The accounts end up as in a downloaded import, but the counts
+    don't: each such repeat is one more updated record (and audit entry) instead
+    of a duplicate in `duplicate_records`.
+
+    REJECT needs the whole file up front and can't be streamed.
+    """
+
+    def __init__(self, policy: str = LAST_WINS, max_refs: int | None = None):
+        if policy == REJECT:
+            raise ValueError("The reject duplicate policy needs the whole file and can't be applied to a stream")
+        self.policy = policy
+        self.max_refs = max_refs or settings.SFTP_STREAM_MAX_SEEN_REFS
+        self.seen = set()
+
+    def batch_winners(self, refs: list[tuple[int, str]]) -> dict[str, int]:
+        """ref_key -> winning line for the refs of one batch's (line, external_ref) pairs that repeat."""
+        lines, winners = {}, {}
+        for line, external_ref in refs:
+            key = ref_key(external_ref)
+            if key in self.seen:
+                winners[key] = IMPORTED_EARLIER
+            elif key in lines:
+                if self.policy == LAST_WINS:
+                    lines[key] = line
+                winners[key] = lines[key]
+            else:
+                lines[key] = line
+        if self.policy == FIRST_WINS:
+            if len(self.seen) + len(lines) > self.max_refs:
+                raise TooManyStreamedRefs(f"More than {self.max_refs} distinct refs to tell repeats apart in one read")
+            self.seen.update(lines)
+        return winners
+
+
+def find_duplicates(file_path: str, policy: str = LAST_WINS) -> dict[str, int]:
+    """Scan a file of any supported format and return its duplicate winners (see DuplicateIndex.winners).
+
+    Lines are numbered the way CSVParser numbers them. The file is read a second
+    time only if the first pass found candidates (see DuplicateIndex).
+    """
+    index = DuplicateIndex(policy)
+    for _, external_ref, _ in _iter_refs(file_path):
+        index.add(external_ref)
+    _recheck(index, file_path)
+
+    winners = index.winners()
+    logger.info("Found %d duplicated refs in %s (%s policy)", len(winners), file_path, policy)
+    return winners
+
+
+def _recheck(index: DuplicateIndex, file_path: str):
+    """Second pass of a DuplicateIndex over the file, skipped when the first found no candidates.
+
+    Rows of candidate refs are validated exactly as the import will validate them,
+    and only the valid ones are recorded.
+    """
+    if not index.candidates:
+        return
+    from .validators import ColumnarValidator
+
+    with closing(iter_rows(file_path)) as rows:
+        validator = ColumnarValidator(next(rows, []))
+    for line, external_ref, row in _iter_refs(file_path):
+        if index.is_candidate(external_ref) and validator.validate_row(row, line)[1] is None:
+            index.recheck(external_ref, line)
+
+
+def _iter_refs(file_path: str) -> Iterator[tuple[int, str, list[str]]]:
+    """(line, external_ref, row) for every row of a file that has a ref, numbered the way CSVParser numbers them."""
+    with closing(iter_rows(file_path)) as rows:
+        header = next(rows, [])
+        if "external_ref" not in header:
+            return
+        ref_index = header.index("external_ref")
+
+        line_num = 1
+        for row in rows:
+            if not row:  # blank lines are skipped by csv.DictReader and don't get a line number
+                continue
+            line_num += 1
+            if ref_index < len(row):
+                yield line_num, row[ref_index], row
+
+
+class LineReader:
+    """Iterates the decoded lines whose first byte lies in [start, end).
+
+    `position` is the byte offset just past the last line handed out, so a consumer
+    that stops after a complete record knows where to pick up again. For gzip and
+    zip sources, offsets refer to the decompressed CSV (see sources.open_binary).
+    """
+
+    def __init__(self, file_path: str, start: int = 0, end: int | None = None):
+        self.file_path = file_path
+        self.start = start
+        self.end = end
+        self.position = start
+
+    def __iter__(self) -> Iterator[str]:
+        with open_binary(self.file_path) as f:
+            f.seek(self.start)
+            for raw in f:
+                if self.end is not None and self.position >= self.end:
+                    return
+                self.position += len(raw)
+                yield raw.decode("utf-8")
+
+
+def iter_lines(file_path: str, start: int = 0, end: int | None = None) -> Iterator[str]:
+    """Yield decoded lines whose first byte lies in [start, end)."""
+    return iter(LineReader(file_path, start, end))
+
+
+def plan_chunks(file_path: str, chunk_bytes: int, policy: str = LAST_WINS) -> tuple[list[dict], dict[str, int]]:
+    """Scan a CSV file and cut it into ranges of roughly `chunk_bytes`.
+
+    Returns (chunks, winners):
+    - chunks: [{"start", "end", "first_line", "winners"}] — cuts only fall on record
+      boundaries (quoted multi-line fields are never split), first_line is the line
+      number CSVParser would give the first record of the range, and winners holds
+      the entries of `winners` for the refs that occur in the range, so a chunk
+      task carries only what it can use.
+    - winners: ref_key -> winning line, for every external_ref that appears more
+      than once among valid rows (see DuplicateIndex, whose second pass re-reads
+      the file only if the first found candidates). Chunk tasks skip every other
+      occurrence, so duplicates resolve per `policy` no matter which chunk commits first.
+    """
+    chunks = []
+    index = DuplicateIndex(policy)
+
+    with open(file_path, "rb") as f:
+        position = 0
+
+        def lines():
+            nonlocal position
+            for raw in f:
+                position += len(raw)
+                yield raw.decode("utf-8")
+
+        reader = csv.reader(lines())
+        header = next(reader, [])
+        ref_index = header.index("external_ref") if "external_ref" in header else None
+
+        chunk_start = position
+        chunk_first_line = 2
+        line_num = 1
+        for row in reader:
+            if not row:  # blank lines are skipped by csv.DictReader and don't get a line number
+                continue
+            line_num += 1
+            if ref_index is not None and ref_index < len(row):
+                index.add(row[ref_index])
+            if position - chunk_start >= chunk_bytes:
+                chunks.append({"start": chunk_start, "end": position, "first_line": chunk_first_line})
+                chunk_start = position
+                chunk_first_line = line_num + 1
+
+        if position > chunk_start:
+            chunks.append({"start": chunk_start, "end": position, "first_line": chunk_first_line})
+
+    _recheck(index, file_path)
+    winners = index.winners()
+    for chunk, chunk_winners in zip(chunks, index.range_winners([c["first_line"] for c in chunks]), strict=True):
+        chunk["winners"] = chunk_winners
+    logger.info(
+        "Planned %d chunks for %s (%d records, %d duplicated refs)", len(chunks), file_path, line_num - 1, len(winners)
+    )
+    return chunks, winners
@@ -0,0 +1,146 @@
+"""Shared, content-addressed storage for downloaded import files.
+
+The poller stages each downloaded file under `<agency id>/<sha256>` in the
+"imports" storage (settings.STORAGES: a local directory in dev and tests, S3 in
+production) and queues the import with that key, so whichever worker picks the
+task up can read the file. Staged files are kept as the job's source record
+(SFTPImportJob.file_path_s3); expiring them is left to the bucket's lifecycle rules.
+"""
+import io
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from django.core.files import File
+from django.core.files.storage import storages
+
+from .importers import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Bytes per ranged GET when reading part of a staged S3 object (see RangeReader)
+RANGE_READ_BYTES = 1024 * 1024
+
+
+def stage(local_path: str, agency_id: str) -> tuple[str, str]:
+    """Store a local file by content hash. Returns (key, sha256).
+
+    A file already staged for the agency with the same content isn't uploaded again.
+    """
+    store = storages["imports"]
+    digest = file_sha256(local_path)
+    key = f"{agency_id}/{digest}"
+    if store.exists(key):
+        logger.info("%s is already staged as %s", local_path, key)
+        return key, digest
+    with open(local_path, "rb") as f:
+        key = store.save(key, File(f))
+    logger.info("Staged %s as %s", local_path, key)
+    return key, digest
+
+
+@contextmanager
+def local_copy(key: str) -> Iterator[str]:
+    """A local path to read a staged file from.
+
+    Where the storage is on local disk that is the stored file itself; otherwise
+    the file is downloaded to a temporary path, removed on exit.
+    """
+    store = storages["imports"]
+    path = _stored_path(store, key)
+    if path:
+        yield path
+        return
+
+    fd, path = tempfile.mkstemp(prefix="import-")
+    try:
+        with os.fdopen(fd, "wb") as out, store.open(key, "rb") as f:
+            shutil.copyfileobj(f, out, 1024 * 1024)
+        yield path
+    finally:
+        os.unlink(path)
+
+
+@contextmanager
+def range_source(key: str) -> Iterator:
+    """A source (see sources) to read byte ranges of a staged file from, without fetching all of it.
+
+    Used by the parallel import's chunk tasks, which each read one range. On local
+    disk that is the stored file's path; on S3 a StoredObject, whose reads are
+    ranged GETs. Any other storage falls back to local_copy.
+    """
+    store = storages["imports"]
+    path = _stored_path(store, key)
+    if path:
+        yield path
+        return
+    with store.open(key, "rb") as f:
+        obj = getattr(f, "obj", None)  # S3Boto3Storage's S3File: the boto3 Object, body not fetched yet
+    if obj is None:
+        with local_copy(key) as path:
+            yield path
+        return
+    yield StoredObject(obj)
+
+
+def _stored_path(store, key: str) -> str | None:
+    try:
+        path = store.path(key)
+    except NotImplementedError:  # e.g. S3
+        return None
+    return path if os.path.isfile(path) else None
+
+
+class StoredObject:
+    """A staged file in S3, read through ranged GETs (see RangeReader)."""
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return f"s3:{self.obj.key}"
+
+    def open(self) -> io.BufferedReader:
+        return io.BufferedReader(RangeReader(self.obj, self.obj.content_length), buffer_size=RANGE_READ_BYTES)
+
+
+class RangeReader(io.RawIOBase):
+    """Seekable raw stream over an S3 object that fetches each read with a ranged GET.
+
+    A reader that seeks to its range downloads that range, rounded up to a
+    buffer, and nothing before it.
+    """
+
+    def __init__(self, obj, size: int):
+        self._obj = obj
+        self._size = size
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(offset, 0)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        end = min(self._position + len(buffer), self._size)
+        if end <= self._position:
+            return 0
+        data = self._obj.get(Range=f"bytes={self._position}-{end - 1}")["Body"].read()
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
@@ -0,0 +1,14 @@
+"""Django-filter FilterSets for integrations."""
+from django_filters import rest_framework as filters
+
+from .models import ImportRowError
+
+
+class ImportRowErrorFilter(filters.FilterSet):
+    """FilterSet for an import job's errors endpoints."""
+
+    error_type = filters.ChoiceFilter(choices=ImportRowError.ErrorType.choices)
+
+    class Meta:
+        model = ImportRowError
+        fields = ["error_type"]
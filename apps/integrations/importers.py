@@ -1,125 +1,604 @@
 """Batch import logic for SFTP-ingested records."""
+import hashlib
 import logging
+import time
+from collections import Counter
 from datetime import date
 
-from django.db import transaction
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
 from apps.accounts.models import Account, Activity, Agency, Debtor
+from apps.audit.signals import audit_bulk_post_save, capture_bulk_pre_save, save_audited
 
-from .models import SFTPImportJob
+from . import metrics
+from .chunking import REJECTED, StreamedDuplicates, duplicate_policy, find_duplicates, ref_key
+from .models import ImportFingerprint, ImportRowError, SFTPImportJob
 from .parsers import CSVParser, ImportRecordSchema
+from .sources import is_local
+from .staging import CopyStagingImporter
 
 logger = logging.getLogger(__name__)
 
 BATCH_SIZE = 1000
 
+# Columns overwritten when an incoming row matches an existing external_ref
+DEBTOR_UPSERT_FIELDS = ["full_name", "ssn_last4", "email", "phone"]
+ACCOUNT_UPSERT_FIELDS = ["agency", "debtor", "original_amount", "current_balance", "due_date", "updated_at"]
+
 
 class BatchImporter:
     """Imports validated CSV records into Account/Debtor tables.
 
+    - Streams the file from CSVParser.iter_chunks, so memory stays flat with file size
     - Processes in batches of 1000 within transactions
-    - Upserts Debtors by external_ref
-    - Creates/updates Accounts by external_ref
-    - Errors are isolated per row (one bad record doesn't block the batch)
+    - Upserts Debtors and Accounts set-based (INSERT ... ON CONFLICT (external_ref))
+    - Bulk-creates the import Activity for each new account
+    - A failing batch is bisected until the bad rows are isolated, so one bad
+      record doesn't block the rest of the batch
+    - Checkpoints the job after every batch so an interrupted import can resume
+    - Bulk-inserts each batch's errors as ImportRowError rows
+    - Skips files identical to the last import, and rows unchanged since their
+      last import (per-agency ImportFingerprint)
+    - Resolves external_refs repeated within the file before upserting, per the
+      agency's duplicate policy (first wins, last wins or reject), so each is
+      written at most once
+    - Reads files either downloaded or in place on the SFTP server (RemoteFile)
+    - Writes its audit entries in bulk rather than through the per-row signals:
+      one AuditLog INSERT per batch of accounts, and no re-SELECT per job save
+    - Times the parse, validate, upsert and activity-write stages of every batch,
+      adding them to the job and to the Prometheus metrics (see metrics)
     """
 
     def __init__(self, agency: Agency, import_job: SFTPImportJob):
         self.agency = agency
         self.import_job = import_job
+        # The job as last saved: the "old" side of its audit entries (see _save_job)
+        self._job_values = capture_bulk_pre_save([import_job])
+        self._activity_seconds = 0.0  # spent writing Activities in the current chunk
 
     def import_file(self, file_path: str) -> SFTPImportJob:
-        """Parse and import a CSV file."""
+        """Parse and import a CSV file, streaming it one batch at a time.
+
+        Each batch commits together with its errors and a checkpoint on the job (byte
+        offset, line and counters), so a job that was interrupted resumes after its last
+        committed batch instead of starting over from line 2.
+
+        The file is scanned once for duplicated external_refs first (see
+        chunking.find_duplicates): only the winning occurrence of each is upserted.
+
+        A file still on the SFTP server (sftp_client.RemoteFile) is read only once:
+        it is neither hashed nor pre-scanned, and repeated refs are resolved batch
+        by batch instead (chunking.StreamedDuplicates).
+        """
+        streamed = not is_local(file_path)
+        start, first_line = 0, 2
+        if self.import_job.checkpoint_offset:
+            start, first_line = self.import_job.checkpoint_offset, self.import_job.checkpoint_line + 1
+            logger.info("Import job %s resuming from line %d", self.import_job.id, first_line)
+        else:
+            if not self.import_job.file_hash and not streamed:
+                self.import_job.file_hash = file_sha256(file_path)
+            self.start()
+            previous = self.find_identical_import()
+            if previous:
+                return self.skip_identical(previous)
+
+        if streamed:
+            winners, streamed_duplicates = None, StreamedDuplicates(duplicate_policy(self.agency))
+        else:
+            winners, streamed_duplicates = find_duplicates(file_path, duplicate_policy(self.agency)), None
+        parser = CSVParser()
+        for records, parse_errors in parser.iter_chunks(
+            file_path, chunk_size=BATCH_SIZE, start=start, first_line=first_line
+        ):
+            if streamed_duplicates:
+                winners = streamed_duplicates.batch_winners([(line, record.external_ref) for line, record in records])
+            with transaction.atomic():
+                started = time.perf_counter()
+                outcome, chunk_errors = self._import_chunk(records, parse_errors, winners)
+                self._save_progress(
+                    len(records) + len(parse_errors),
+                    outcome,
+                    chunk_errors,
+                    self._stage_seconds(parser, time.perf_counter() - started),
+                    checkpoint_offset=parser.offset,
+                    checkpoint_line=parser.next_line - 1,
+                )
+
+        return self.finish()
+
+    def start(self):
+        """Mark the job as processing and reset its counters, errors and checkpoint (saves file_hash if set)."""
         self.import_job.status = SFTPImportJob.Status.PROCESSING
         self.import_job.started_at = timezone.now()
-        self.import_job.save(update_fields=["status", "started_at"])
+        self.import_job.total_records = 0
+        self.import_job.processed_ok = 0
+        self.import_job.processed_errors = 0
+        self.import_job.inserted_records = 0
+        self.import_job.updated_records = 0
+        self.import_job.unchanged_records = 0
+        self.import_job.duplicate_records = 0
+        self.import_job.parse_seconds = 0
+        self.import_job.validate_seconds = 0
+        self.import_job.upsert_seconds = 0
+        self.import_job.activity_seconds = 0
+        self.import_job.batch_count = 0
+        self.import_job.peak_rss_bytes = 0
+        self.import_job.checkpoint_offset = 0
+        self.import_job.checkpoint_line = 0
+        self._save_job(
+            update_fields=[
+                "status",
+                "started_at",
+                "file_hash",
+                "total_records",
+                "processed_ok",
+                "processed_errors",
+                "inserted_records",
+                "updated_records",
+                "unchanged_records",
+                "duplicate_records",
+                "parse_seconds",
+                "validate_seconds",
+                "upsert_seconds",
+                "activity_seconds",
+                "batch_count",
+                "peak_rss_bytes",
+                "checkpoint_offset",
+                "checkpoint_line",
+            ]
+        )
+        self.import_job.errors.all().delete()  # left over from an attempt that was retried
+
+    def find_identical_import(self) -> SFTPImportJob | None:
+        """Return the agency's last completed import if it had the same file_hash as this job.
+
+        Only the latest import is compared: an older identical file may have been
+        overwritten since by a newer one, so it has to be applied again.
+        """
+        if not self.import_job.file_hash:
+            return None
+        previous = (
+            SFTPImportJob.objects.filter(agency=self.agency, status=SFTPImportJob.Status.COMPLETED)
+            .exclude(pk=self.import_job.pk)
+            .order_by("-created_at")
+            .first()
+        )
+        if previous and previous.file_hash == self.import_job.file_hash:
+            return previous
+        return None
+
+    def skip_identical(self, previous: SFTPImportJob) -> SFTPImportJob:
+        """Complete the job without importing: every row is unchanged since `previous`."""
+        self.import_job.total_records = previous.total_records
+        self.import_job.processed_ok = previous.processed_ok
+        self.import_job.processed_errors = previous.processed_errors
+        self.import_job.unchanged_records = previous.processed_ok
+        self.import_job.duplicate_records = previous.duplicate_records
+        self.import_job.status = SFTPImportJob.Status.COMPLETED
+        self.import_job.completed_at = timezone.now()
+        with transaction.atomic():
+            self._save_job(
+                update_fields=[
+                    "total_records",
+                    "processed_ok",
+                    "processed_errors",
+                    "unchanged_records",
+                    "duplicate_records",
+                    "status",
+                    "completed_at",
+                ]
+            )
+            self._copy_errors(previous)
+        metrics.observe_job(self.import_job, self.agency)
 
+        logger.info("Import job %s skipped: file is identical to import job %s", self.import_job.id, previous.id)
+        return self.import_job
+
+    def import_range(self, file_path: str, start: int, end: int, first_line: int, winners: dict) -> int:
+        """Import one byte range of a file that is being imported in parallel.
+
+        Counters are incremented in the database so concurrent ranges don't clobber
+        each other. Rows whose external_ref occurs elsewhere in the file are resolved
+        per `winners` (see chunking.plan_chunks), whichever range they fall in.
+        Returns the number of rows that failed.
+        """
         parser = CSVParser()
-        valid_records, parse_errors = parser.parse(file_path)
-
-        self.import_job.total_records = len(valid_records) + len(parse_errors)
-        self.import_job.processed_errors = len(parse_errors)
-        self.import_job.error_details = parse_errors
-        self.import_job.save(update_fields=["total_records", "processed_errors", "error_details"])
-
-        # Process in batches
-        processed_ok = 0
-        for i in range(0, len(valid_records), BATCH_SIZE):
-            batch = valid_records[i : i + BATCH_SIZE]
-            ok_count, batch_errors = self._process_batch(batch, start_line=i + 2 + len(parse_errors))
-            processed_ok += ok_count
-            if batch_errors:
-                self.import_job.error_details.extend(batch_errors)
-                self.import_job.processed_errors += len(batch_errors)
-
-        self.import_job.processed_ok = processed_ok
-        if processed_ok == 0 and self.import_job.processed_errors > 0:
+        error_count = 0
+        for records, parse_errors in parser.iter_chunks(
+            file_path, chunk_size=BATCH_SIZE, start=start, end=end, first_line=first_line
+        ):
+            with transaction.atomic():
+                started = time.perf_counter()
+                outcome, chunk_errors = self._import_chunk(records, parse_errors, winners)
+                stage_seconds = self._stage_seconds(parser, time.perf_counter() - started)
+                self._save_progress(len(records) + len(parse_errors), outcome, chunk_errors, stage_seconds)
+            error_count += len(chunk_errors)
+        return error_count
+
+    def finish(self) -> SFTPImportJob:
+        """Set the final status from the counters and log the summary."""
+        self.import_job.refresh_from_db(
+            fields=[
+                "total_records",
+                "processed_ok",
+                "processed_errors",
+                "inserted_records",
+                "updated_records",
+                "unchanged_records",
+                "duplicate_records",
+                "parse_seconds",
+                "validate_seconds",
+                "upsert_seconds",
+                "activity_seconds",
+                "batch_count",
+                "peak_rss_bytes",
+            ]
+        )
+        self._job_values = capture_bulk_pre_save([self.import_job])
+        if self.import_job.processed_ok == 0 and self.import_job.processed_errors > 0:
             self.import_job.status = SFTPImportJob.Status.FAILED
         else:
             self.import_job.status = SFTPImportJob.Status.COMPLETED
         self.import_job.completed_at = timezone.now()
-        self.import_job.save()
+        self._save_job(update_fields=["status", "completed_at"])
+        metrics.observe_job(self.import_job, self.agency)
 
         logger.info(
-            "Import job %s completed: %d OK, %d errors out of %d total",
+            "Import job %s completed: %d OK (%d inserted, %d updated, %d unchanged), %d duplicates, "
+            "%d errors out of %d total",
             self.import_job.id,
-            processed_ok,
+            self.import_job.processed_ok,
+            self.import_job.inserted_records,
+            self.import_job.updated_records,
+            self.import_job.unchanged_records,
+            self.import_job.duplicate_records,
             self.import_job.processed_errors,
             self.import_job.total_records,
         )
+        logger.info(
+            "Import job %s timings: parse %.1fs, validate %.1fs, upsert %.1fs, activities %.1fs over %d batches "
+            "(%.0f rows/s, peak RSS %d MB)",
+            self.import_job.id,
+            self.import_job.parse_seconds,
+            self.import_job.validate_seconds,
+            self.import_job.upsert_seconds,
+            self.import_job.activity_seconds,
+            self.import_job.batch_count,
+            self.import_job.rows_per_second,
+            self.import_job.peak_rss_bytes // (1024 * 1024),
+        )
         return self.import_job
 
-    def _process_batch(self, records: list[ImportRecordSchema], start_line: int) -> tuple[int, list[dict]]:
-        """Process a batch of records within a transaction. Errors isolated per row."""
-        ok_count = 0
-        errors = []
-
-        for idx, record in enumerate(records):
-            try:
-                with transaction.atomic():
-                    self._upsert_record(record)
-                    ok_count += 1
-            except Exception as e:
-                errors.append(
+    def _save_job(self, update_fields: list[str]):
+        """Save the job and audit the change against its last saved values, without a re-SELECT."""
+        save_audited(self.import_job, self._job_values, update_fields)
+        self._job_values = capture_bulk_pre_save([self.import_job])
+
+    def _copy_errors(self, previous: SFTPImportJob):
+        """Copy `previous`'s error rows onto this job in one INSERT ... SELECT."""
+        table = ImportRowError._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (job_id, line, error_type, error, data) "
+                f"SELECT %s, line, error_type, error, data FROM {table} WHERE job_id = %s ORDER BY line, id",
+                [self.import_job.id, previous.id],
+            )
+
+    def _stage_seconds(self, parser: CSVParser, write_seconds: float) -> dict[str, float]:
+        """Seconds per stage for the chunk just imported, with Activity writes split out of the upsert."""
+        return {
+            "parse": parser.parse_seconds,
+            "validate": parser.validate_seconds,
+            "upsert": write_seconds - self._activity_seconds,
+            "activity": self._activity_seconds,
+        }
+
+    def _save_progress(
+        self, total: int, outcome: Counter, errors: list[dict], stage_seconds: dict[str, float], **fields
+    ):
+        """Add a batch's counts and timings (plus any other `fields`) to the job row in one UPDATE.
+
+        Also stores the batch's errors and observes its metrics.
+        """
+        timings = {f"{stage}_seconds": F(f"{stage}_seconds") + seconds for stage, seconds in stage_seconds.items()}
+        SFTPImportJob.objects.filter(pk=self.import_job.pk).update(
+            total_records=F("total_records") + total,
+            processed_ok=F("processed_ok") + outcome["inserted"] + outcome["updated"] + outcome["unchanged"],
+            processed_errors=F("processed_errors") + len(errors),
+            inserted_records=F("inserted_records") + outcome["inserted"],
+            updated_records=F("updated_records") + outcome["updated"],
+            unchanged_records=F("unchanged_records") + outcome["unchanged"],
+            duplicate_records=F("duplicate_records") + outcome["duplicate"],
+            batch_count=F("batch_count") + 1,
+            peak_rss_bytes=Greatest("peak_rss_bytes", Value(metrics.current_rss_bytes())),
+            **timings,
+            **fields,
+        )
+        ImportRowError.record(self.import_job, errors)
+        metrics.observe_batch(stage_seconds, total)
+
+    def _import_chunk(
+        self, records: list[tuple[int, ImportRecordSchema]], parse_errors: list[dict], winners: dict | None = None
+    ) -> tuple[Counter, list[dict]]:
+        """Upsert one parsed chunk. Returns (inserted/updated/unchanged/duplicate counts, errors sorted by line).
+
+        Only the winning occurrence of a duplicated external_ref is upserted; the
+        others are counted as duplicates, and under the reject policy reported as
+        errors. This also keeps a batch from naming one ref twice, which would make
+        its INSERT ... ON CONFLICT fail and be bisected.
+        """
+        self._activity_seconds = 0.0
+        records, duplicates, rejected = resolve_duplicates(records, winners)
+        outcome, batch_errors = self._process_batch(records) if records else (Counter(), [])
+        outcome["duplicate"] += duplicates
+        return outcome, sorted(parse_errors + rejected + batch_errors, key=lambda e: e["line"])
+
+    def _process_batch(self, records: list[tuple[int, ImportRecordSchema]]) -> tuple[Counter, list[dict]]:
+        """Upsert a batch of (line, record) pairs in one transaction.
+
+        On failure, bisect to isolate the bad rows.
+        """
+        try:
+            with transaction.atomic():
+                outcome = self._bulk_upsert([record for _, record in records])
+            return outcome, []
+        except SoftTimeLimitExceeded:
+            raise  # not a row error: the task is out of time, see process_import_file
+        except Exception as e:
+            if len(records) == 1:
+                line, record = records[0]
+                return Counter(), [
                     {
-                        "line": start_line + idx,
+                        "line": line,
+                        "error_type": ImportRowError.ErrorType.DATABASE,
                         "error": str(e),
-                        "data": record.model_dump(),
+                        "data": record.model_dump(mode="json"),
                     }
+                ]
+
+        mid = len(records) // 2
+        left_outcome, left_errors = self._process_batch(records[:mid])
+        right_outcome, right_errors = self._process_batch(records[mid:])
+        return left_outcome + right_outcome, left_errors + right_errors
+
+    def _bulk_upsert(self, records: list[ImportRecordSchema]) -> Counter:
+        """Upsert debtors + accounts for a batch with set-based statements.
+
+        Rows whose fingerprint matches the one stored at their last import are
+        skipped entirely — no upsert, audit entry or Activity.
+        """
+        changed, existing, fingerprints = match_existing(self.agency, records)
+        outcome = Counter(unchanged=len(records) - len(changed))
+        if not changed:
+            return outcome
+        records = changed
+        refs = [record.external_ref for record in records]
+
+        Debtor.objects.bulk_create(
+            [
+                Debtor(
+                    external_ref=record.external_ref,
+                    full_name=record.debtor_name,
+                    ssn_last4=record.debtor_ssn_last4,
+                    email=record.debtor_email or None,
+                    phone=record.debtor_phone or None,
                 )
+                for record in records
+            ],
+            update_conflicts=True,
+            unique_fields=["external_ref"],
+            update_fields=DEBTOR_UPSERT_FIELDS,
+        )
+        # UUID pks aren't returned by bulk_create, and conflicting rows keep their original id
+        debtor_ids = dict(Debtor.objects.filter(external_ref__in=refs).values_list("external_ref", "id"))
+
+        before = capture_bulk_pre_save(existing.values())
+        accounts = []
+        for record in records:
+            # Existing rows are updated in place so untouched columns (status, assignment...) carry over
+            account = existing.get(record.external_ref) or Account(external_ref=record.external_ref)
+            account.agency = self.agency
+            account.debtor_id = debtor_ids[record.external_ref]
+            account.original_amount = record.original_amount
+            account.current_balance = record.original_amount
+            account.due_date = date.fromisoformat(record.due_date) if record.due_date else None
+            accounts.append(account)
 
-        return ok_count, errors
-
-    def _upsert_record(self, record: ImportRecordSchema):
-        """Upsert a single debtor + account from a validated record."""
-        # Upsert Debtor
-        debtor, _ = Debtor.objects.update_or_create(
-            external_ref=record.external_ref,
-            defaults={
-                "full_name": record.debtor_name,
-                "ssn_last4": record.debtor_ssn_last4,
-                "email": record.debtor_email or None,
-                "phone": record.debtor_phone or None,
-            },
+        created_at = {account.pk: account.created_at for account in existing.values()}
+        Account.objects.bulk_create(
+            accounts,
+            update_conflicts=True,
+            unique_fields=["external_ref"],
+            update_fields=ACCOUNT_UPSERT_FIELDS,
         )
+        # bulk_create stamps created_at on every object, but only inserted rows kept it
+        for account in existing.values():
+            account.created_at = created_at[account.pk]
 
-        # Upsert Account
-        due_date = date.fromisoformat(record.due_date) if record.due_date else None
-        account, created = Account.objects.update_or_create(
-            external_ref=record.external_ref,
-            defaults={
-                "agency": self.agency,
-                "debtor": debtor,
-                "original_amount": record.original_amount,
-                "current_balance": record.original_amount,
-                "due_date": due_date,
-            },
+        audit_bulk_post_save(Account, before, accounts)
+
+        started = time.perf_counter()
+        Activity.objects.bulk_create(
+            [
+                Activity(
+                    account=account,
+                    activity_type=Activity.ActivityType.IMPORT,
+                    description=f"Account imported from SFTP file {self.import_job.file_name}",
+                    metadata={"import_job_id": str(self.import_job.id)},
+                )
+                for account in accounts
+                if account.external_ref not in existing
+            ]
         )
+        self._activity_seconds += time.perf_counter() - started
 
-        if created:
-            Activity.objects.create(
-                account=account,
-                activity_type=Activity.ActivityType.IMPORT,
-                description=f"Account imported from SFTP file {self.import_job.file_name}",
-                metadata={"import_job_id": str(self.import_job.id)},
+        ImportFingerprint.objects.bulk_create(
+            [
+                ImportFingerprint(agency=self.agency, external_ref=ref, fingerprint=fingerprints[ref])
+                for ref in refs
+            ],
+            update_conflicts=True,
+            unique_fields=["agency", "external_ref"],
+            update_fields=["fingerprint", "updated_at"],
+        )
+
+        outcome["inserted"] = len(refs) - len(existing)
+        outcome["updated"] = len(existing)
+        return outcome
+
+
+def resolve_duplicates(
+    records: list[tuple[int, ImportRecordSchema]], winners: dict | None
+) -> tuple[list[tuple[int, ImportRecordSchema]], int, list[dict]]:
+    """Drop every occurrence of a duplicated external_ref but the winning one (see chunking.DuplicateIndex).
+
+    Returns (records to import, number of occurrences dropped, errors for the ones
+    dropped under the reject policy).
+    """
+    if not winners:
+        return records, 0, []
+    pending, rejected = [], []
+    for line, record in records:
+        winner = winners.get(ref_key(record.external_ref), line)
+        if winner == line:
+            pending.append((line, record))
+        elif winner == REJECTED:
+            rejected.append(
+                {
+                    "line": line,
+                    "error_type": ImportRowError.ErrorType.DUPLICATE,
+                    "error": f"external_ref {record.external_ref} appears more than once in the file",
+                    "data": record.model_dump(mode="json"),
+                }
             )
+    return pending, len(records) - len(pending), rejected
+
+
+def match_existing(
+    agency: Agency, records: list[ImportRecordSchema]
+) -> tuple[list[ImportRecordSchema], dict[str, Account], dict[str, str]]:
+    """Look up a batch's accounts and stored fingerprints (two SELECTs, no writes).
+
+    Returns (records that changed since their last import, existing accounts of
+    those records by external_ref, fingerprint of every record by external_ref).
+    """
+    refs = [record.external_ref for record in records]
+    existing = {account.external_ref: account for account in Account.objects.filter(external_ref__in=refs)}
+    stored = dict(
+        ImportFingerprint.objects.filter(agency=agency, external_ref__in=refs).values_list(
+            "external_ref", "fingerprint"
+        )
+    )
+
+    fingerprints = {record.external_ref: row_fingerprint(record) for record in records}
+    # A stored fingerprint only counts while the account it describes is still there and still ours
+    changed = [
+        record
+        for record in records
+        if stored.get(record.external_ref) != fingerprints[record.external_ref]
+        or record.external_ref not in existing
+        or existing[record.external_ref].agency_id != agency.id
+    ]
+    existing = {ref: existing[ref] for ref in (record.external_ref for record in changed) if ref in existing}
+    return changed, existing, fingerprints
+
+
+def dry_run(agency: Agency, file_path: str, max_errors: int = 100) -> dict:
+    """Validate a file and match it against existing accounts without writing anything.
+
+    Runs the same parsing, validation, duplicate policy and fingerprint comparison
+    as BatchImporter, so the expected inserts/updates/unchanged/errors are what an
+    import would report now — except for rows the database itself would reject
+    (BatchImporter's "database" errors). Reports the first `max_errors` errors and
+    the parse rate (rows/sec spent reading and validating).
+    """
+    started = time.perf_counter()
+    winners = find_duplicates(file_path, duplicate_policy(agency))
+    parser = CSVParser()
+    counts, error_counts, errors = Counter(), Counter(), []
+    parse_seconds = validate_seconds = match_seconds = 0.0
+    for records, parse_errors in parser.iter_chunks(file_path, chunk_size=BATCH_SIZE):
+        parse_seconds += parser.parse_seconds
+        validate_seconds += parser.validate_seconds
+        counts["total"] += len(records) + len(parse_errors)
+
+        records, duplicates, rejected = resolve_duplicates(records, winners)
+        matched = time.perf_counter()
+        changed, existing = [], {}
+        if records:
+            changed, existing, _ = match_existing(agency, [record for _, record in records])
+        match_seconds += time.perf_counter() - matched
+
+        counts["inserts"] += len(changed) - len(existing)
+        counts["updates"] += len(existing)
+        counts["unchanged"] += len(records) - len(changed)
+        counts["duplicates"] += duplicates
+        for error in sorted(parse_errors + rejected, key=lambda e: e["line"]):
+            error_counts[error["error_type"]] += 1
+            if len(errors) < max_errors:
+                errors.append({"line": error["line"], "error_type": error["error_type"], "error": error["error"]})
+
+    read_seconds = parse_seconds + validate_seconds
+    report = {
+        "total_records": counts["total"],
+        "expected_inserts": counts["inserts"],
+        "expected_updates": counts["updates"],
+        "expected_unchanged": counts["unchanged"],
+        "duplicate_records": counts["duplicates"],
+        "expected_errors": error_counts.total(),
+        "error_counts": dict(error_counts),
+        "errors": errors,
+        "parse_seconds": round(parse_seconds, 3),
+        "validate_seconds": round(validate_seconds, 3),
+        "match_seconds": round(match_seconds, 3),
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+        "parse_rows_per_second": round(counts["total"] / read_seconds) if read_seconds else 0,
+    }
+    logger.info(
+        "Dry run of %s for agency %s: %d inserts, %d updates, %d unchanged, %d errors out of %d (%d rows/s parsed)",
+        file_path,
+        agency.name,
+        report["expected_inserts"],
+        report["expected_updates"],
+        report["expected_unchanged"],
+        report["expected_errors"],
+        report["total_records"],
+        report["parse_rows_per_second"],
+    )
+    return report
+
+
+def row_fingerprint(record: ImportRecordSchema) -> str:
+    """Hash of the normalized values a row writes to Debtor/Account."""
+    values = [
+        record.external_ref,
+        record.debtor_name,
+        record.debtor_ssn_last4,
+        record.debtor_email,
+        record.debtor_phone,
+        str(record.original_amount.normalize()),  # 100, 100.0 and 100.00 are the same amount
+        record.due_date,
+    ]
+    return hashlib.blake2b("\x1f".join(values).encode(), digest_size=16).hexdigest()
+
+
+def file_sha256(file_path: str) -> str:
+    """SHA-256 of a file's content, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_importer(agency: Agency, import_job: SFTPImportJob):
+    """Return the import engine selected by settings.SFTP_IMPORT_ENGINE ("batch" or "copy")."""
+    if settings.SFTP_IMPORT_ENGINE == "copy":
+        return CopyStagingImporter(agency, import_job)
+    return BatchImporter(agency, import_job)
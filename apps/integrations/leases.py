@@ -0,0 +1,91 @@
+"""Cache-backed (Redis) leases, so an agency's SFTP server is polled by one worker at a time."""
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Name of the lease held by the sftp_poll_all_agencies run in flight (queued or running)
+POLL_ALL = "sftp_poll:all"
+
+# Owner check and expire/delete in one step, so a holder whose lease expired and was
+# taken by another can't extend or drop the new holder's lease in between
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def agency_poll(agency_id) -> str:
+    """Name of the lease on polling one agency."""
+    return f"sftp_poll:{agency_id}"
+
+
+class Lease:
+    """A named, expiring lock held by one holder id (e.g. a Celery task id) at a time.
+
+    `acquire` is one atomic SET NX with a TTL. While work is in progress, `held()`
+    renews the lease from a background thread every third of its TTL, so a long
+    poll keeps it and a worker that dies loses it after at most `ttl` seconds.
+
+    A lease can be taken on behalf of a holder that hasn't started yet (the
+    trigger endpoint queues a poll under the lease it took with the poll's task
+    id, and a longer TTL); the holder's own `acquire` then adopts it.
+    """
+
+    def __init__(self, name: str, holder: str, ttl: int = 0):
+        self.key = f"lease:{name}"
+        self.holder_id = holder
+        self.ttl = ttl or settings.SFTP_POLL_LEASE_SECONDS
+
+    def acquire(self) -> bool:
+        """Take the lease if it's free, or renew it to our TTL if it is already ours."""
+        return cache.add(self.key, self.holder_id, timeout=self.ttl) or self.renew()
+
+    def holder(self) -> str | None:
+        return cache.get(self.key)
+
+    def renew(self) -> bool:
+        """Extend the lease by `ttl` seconds if it is still ours."""
+        return bool(self._run(RENEW_SCRIPT, self.ttl))
+
+    def release(self):
+        self._run(RELEASE_SCRIPT)
+
+    def _run(self, script: str, *args):
+        """Run a script on the lease's key, with our holder id (stored as the cache stores values) as ARGV[1]."""
+        client = cache._cache  # Django's RedisCacheClient: the key and value format `cache.add` used
+        key = cache.make_and_validate_key(self.key)
+        holder = client._serializer.dumps(self.holder_id)
+        return client.get_client(key, write=True).eval(script, 1, key, holder, *args)
+
+    @contextmanager
+    def held(self):
+        """Keep the (acquired) lease alive with a heartbeat until the block exits, then release it."""
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(self.ttl / 3):
+                if not self.renew():
+                    logger.warning("Lease %s held by %s expired before it was renewed", self.key, self.holder_id)
+                    return
+
+        thread = threading.Thread(target=heartbeat, name=f"heartbeat-{self.key}", daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+            self.release()
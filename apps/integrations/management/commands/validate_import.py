@@ -0,0 +1,59 @@
+"""Dry-run an import file: validate it and report what importing it would do, without writing."""
+import json
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import Agency
+from apps.integrations.importers import dry_run
+from apps.integrations.sources import UNREADABLE_FILE_ERRORS
+
+
+class Command(BaseCommand):
+    help = "Validate an import file against an agency's accounts without writing anything"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file_path", help="CSV, .csv.gz, .zip or .parquet file")
+        parser.add_argument("--agency", required=True, help="Agency name or id")
+        parser.add_argument("--max-errors", type=int, default=20, help="Number of errors to list")
+        parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+
+    def handle(self, *args, **options):
+        agency = self._get_agency(options["agency"])
+        try:
+            report = dry_run(agency, options["file_path"], max_errors=options["max_errors"])
+        except UNREADABLE_FILE_ERRORS as e:
+            raise CommandError(str(e)) from e
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"Records:    {report['total_records']}")
+        self.stdout.write(f"Inserts:    {report['expected_inserts']}")
+        self.stdout.write(f"Updates:    {report['expected_updates']}")
+        self.stdout.write(f"Unchanged:  {report['expected_unchanged']}")
+        self.stdout.write(f"Duplicates: {report['duplicate_records']}")
+        self.stdout.write(f"Errors:     {report['expected_errors']} {report['error_counts'] or ''}")
+        self.stdout.write(
+            f"Parsed at {report['parse_rows_per_second']} rows/s "
+            f"(parse {report['parse_seconds']}s, validate {report['validate_seconds']}s, "
+            f"match {report['match_seconds']}s, total {report['elapsed_seconds']}s)"
+        )
+        for error in report["errors"]:
+            self.stdout.write(self.style.ERROR(f"  line {error['line']} [{error['error_type']}]: {error['error']}"))
+
+        if report["expected_errors"]:
+            self.stdout.write(self.style.WARNING("Dry run found errors."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Dry run found no errors."))
+
+    def _get_agency(self, value: str) -> Agency:
+        try:
+            lookup = {"id": uuid.UUID(value)}
+        except ValueError:
+            lookup = {"name": value}
+        try:
+            return Agency.objects.get(**lookup)
+        except Agency.DoesNotExist as e:
+            raise CommandError(f"Agency {value!r} not found") from e
@@ -0,0 +1,71 @@
+"""Prometheus metrics for SFTP imports, exported with django_prometheus's /metrics.
+
+Stage timings are observed per batch as the import runs; job-level numbers
+(duration, rows/sec, peak RSS, row outcomes) once the job is finished. The same
+numbers are stored on SFTPImportJob, so a single slow job can be looked at too.
+"""
+import resource
+import sys
+
+from prometheus_client import Counter, Gauge, Histogram
+
+STAGES = ("download", "parse", "validate", "upsert", "activity")
+
+STAGE_SECONDS = Histogram(
+    "debtflow_sftp_import_stage_seconds",
+    "Time spent in one import stage for one batch (download: per file)",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+STAGE_ROWS = Counter("debtflow_sftp_import_stage_rows", "Rows that went through an import stage", ["stage"])
+BATCH_SECONDS = Histogram(
+    "debtflow_sftp_import_batch_seconds",
+    "Time to parse, validate and write one batch",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+RECORDS = Counter("debtflow_sftp_import_records", "Rows of finished import jobs by outcome", ["agency", "status"])
+JOBS = Counter("debtflow_sftp_import_jobs", "Finished import jobs", ["agency", "status"])
+JOB_SECONDS = Histogram(
+    "debtflow_sftp_import_duration_seconds",
+    "Import job duration, from start to completion",
+    ["agency"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200),
+)
+ROWS_PER_SECOND = Gauge("debtflow_sftp_import_rows_per_second", "Throughput of the agency's last import", ["agency"])
+PEAK_RSS = Gauge("debtflow_sftp_import_peak_rss_bytes", "Peak worker RSS during the agency's last import", ["agency"])
+
+
+def observe_batch(stage_seconds: dict[str, float], rows: int):
+    """Record one batch: the seconds spent in each stage, and the batch latency."""
+    for stage, seconds in stage_seconds.items():
+        STAGE_SECONDS.labels(stage).observe(seconds)
+        STAGE_ROWS.labels(stage).inc(rows)
+    BATCH_SECONDS.observe(sum(stage_seconds.values()))
+
+
+def observe_download(seconds: float):
+    STAGE_SECONDS.labels("download").observe(seconds)
+
+
+def observe_job(job, agency):
+    """Record a finished SFTPImportJob's totals under its agency's name."""
+    agency = agency.name
+    JOBS.labels(agency, job.status).inc()
+    RECORDS.labels(agency, "ok").inc(job.processed_ok)
+    RECORDS.labels(agency, "error").inc(job.processed_errors)
+    RECORDS.labels(agency, "duplicate").inc(job.duplicate_records)
+    if job.duration_seconds is not None:
+        JOB_SECONDS.labels(agency).observe(job.duration_seconds)
+        ROWS_PER_SECOND.labels(agency).set(job.rows_per_second)
+    if job.peak_rss_bytes:
+        PEAK_RSS.labels(agency).set(job.peak_rss_bytes)
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process right now (its lifetime peak where /proc isn't available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
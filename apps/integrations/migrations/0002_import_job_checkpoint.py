@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='checkpoint_line',
+            field=models.IntegerField(default=0, help_text='Line number of the last committed row'),
+        ),
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='checkpoint_offset',
+            field=models.BigIntegerField(default=0, help_text='Byte offset just past the last committed batch'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('integrations', '0002_import_job_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='file_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the file content', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='inserted_records',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='unchanged_records',
+            field=models.IntegerField(default=0, help_text='Rows identical to what was last imported'),
+        ),
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='updated_records',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ImportFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_ref', models.CharField(max_length=100)),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('agency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_fingerprints', to='accounts.agency')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('agency', 'external_ref'), name='uniq_import_fingerprint_ref')],
+            },
+        ),
+    ]
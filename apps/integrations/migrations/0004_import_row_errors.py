@@ -0,0 +1,64 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_error_details(apps, schema_editor):
+    """Move each job's error_details list into ImportRowError rows."""
+    SFTPImportJob = apps.get_model('integrations', 'SFTPImportJob')
+    ImportRowError = apps.get_model('integrations', 'ImportRowError')
+    for job in SFTPImportJob.objects.exclude(error_details=[]).only('id', 'error_details').iterator():
+        ImportRowError.objects.bulk_create(
+            [
+                ImportRowError(
+                    job_id=job.id,
+                    line=error.get('line', 0),
+                    error_type=error_type(error),
+                    error=error.get('error', ''),
+                    data=error.get('data') or {},
+                )
+                for error in job.error_details
+            ],
+            batch_size=1000,
+        )
+
+
+def error_type(error):
+    # The old blob didn't record a type; row-level database errors were rare enough to file under validation
+    message = error.get('error', '')
+    if message.startswith('Fatal:'):
+        return 'fatal'
+    if message.startswith('Missing required columns'):
+        return 'header'
+    return 'validation'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0003_delta_import'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRowError',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line', models.IntegerField(help_text='File line number; 1 is the header, 0 a job-level failure')),
+                ('error_type', models.CharField(choices=[('header', 'Header'), ('validation', 'Validation'), ('database', 'Database'), ('fatal', 'Fatal')], max_length=20)),
+                ('error', models.TextField()),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='errors', to='integrations.sftpimportjob')),
+            ],
+            options={
+                'ordering': ['line', 'id'],
+                'indexes': [models.Index(fields=['job', 'line', 'id'], name='idx_import_error_job_line'), models.Index(fields=['job', 'error_type', 'line', 'id'], name='idx_import_error_job_type')],
+            },
+        ),
+        migrations.RunPython(copy_error_details, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='sftpimportjob',
+            name='error_details',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0004_import_row_errors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='duplicate_records',
+            field=models.IntegerField(default=0, help_text='Rows not imported because their external_ref occurs more than once in the file'),
+        ),
+        migrations.AlterField(
+            model_name='importrowerror',
+            name='error_type',
+            field=models.CharField(choices=[('header', 'Header'), ('validation', 'Validation'), ('database', 'Database'), ('duplicate', 'Duplicate'), ('fatal', 'Fatal')], max_length=20),
+        ),
+    ]
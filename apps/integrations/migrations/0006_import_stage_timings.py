@@ -0,0 +1,48 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0005_duplicate_records'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='activity_seconds',
+            field=models.FloatField(default=0, help_text='Time writing import Activities'),
+        ),
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='batch_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='download_seconds',
+            field=models.FloatField(default=0, help_text='Time to fetch the file from SFTP'),
+        ),
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='parse_seconds',
+            field=models.FloatField(default=0, help_text='Time reading and splitting rows'),
+        ),
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='peak_rss_bytes',
+            field=models.BigIntegerField(default=0, help_text='Highest worker RSS seen between batches'),
+        ),
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='upsert_seconds',
+            field=models.FloatField(default=0, help_text='Time writing debtors, accounts and audit entries'),
+        ),
+        migrations.AddField(
+            model_name='sftpimportjob',
+            name='validate_seconds',
+            field=models.FloatField(default=0, help_text='Time validating rows'),
+        ),
+    ]
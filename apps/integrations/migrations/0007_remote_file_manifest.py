@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('integrations', '0006_import_stage_timings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RemoteFileEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('remote_dir', models.CharField(max_length=500)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField()),
+                ('mtime', models.BigIntegerField(help_text='Modification time on the server, in epoch seconds')),
+                ('status', models.CharField(choices=[('seen', 'Seen'), ('imported', 'Imported')], default='seen', max_length=20)),
+                ('first_seen_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('agency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='remote_files', to='accounts.agency')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('agency', 'remote_dir', 'name'), name='uniq_remote_file_entry')],
+            },
+        ),
+    ]
@@ -1,7 +1,9 @@
 """SFTP integration models."""
 import uuid
+from collections.abc import Iterable
 
 from django.db import models
+from django.utils import timezone
 
 
 class SFTPImportJob(models.Model):
@@ -18,11 +20,26 @@ class SFTPImportJob(models.Model):
     source_host = models.CharField(max_length=255)
     file_name = models.CharField(max_length=255)
     file_path_s3 = models.CharField(max_length=500, null=True, blank=True, help_text="S3 path after upload")
+    file_hash = models.CharField(max_length=64, blank=True, default="", help_text="SHA-256 of the file content")
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING, db_index=True)
     total_records = models.IntegerField(default=0)
     processed_ok = models.IntegerField(default=0)
     processed_errors = models.IntegerField(default=0)
-    error_details = models.JSONField(default=list, blank=True, help_text="Error list by line number")
+    inserted_records = models.IntegerField(default=0)
+    updated_records = models.IntegerField(default=0)
+    unchanged_records = models.IntegerField(default=0, help_text="Rows identical to what was last imported")
+    duplicate_records = models.IntegerField(
+        default=0, help_text="Rows not imported because their external_ref occurs more than once in the file"
+    )
+    download_seconds = models.FloatField(default=0, help_text="Time to fetch the file from SFTP")
+    parse_seconds = models.FloatField(default=0, help_text="Time reading and splitting rows")
+    validate_seconds = models.FloatField(default=0, help_text="Time validating rows")
+    upsert_seconds = models.FloatField(default=0, help_text="Time writing debtors, accounts and audit entries")
+    activity_seconds = models.FloatField(default=0, help_text="Time writing import Activities")
+    batch_count = models.IntegerField(default=0)
+    peak_rss_bytes = models.BigIntegerField(default=0, help_text="Highest worker RSS seen between batches")
+    checkpoint_offset = models.BigIntegerField(default=0, help_text="Byte offset just past the last committed batch")
+    checkpoint_line = models.IntegerField(default=0, help_text="Line number of the last committed row")
     started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -37,3 +54,148 @@ class SFTPImportJob(models.Model):
 
     def __str__(self):
         return f"Import {self.file_name} ({self.status})"
+
+    @property
+    def duration_seconds(self) -> float | None:
+        if not (self.started_at and self.completed_at):
+            return None
+        return (self.completed_at - self.started_at).total_seconds()
+
+    @property
+    def rows_per_second(self) -> float:
+        duration = self.duration_seconds
+        return self.total_records / duration if duration else 0.0
+
+
+class ImportFingerprint(models.Model):
+    """Hash of the last imported version of a row, so unchanged rows can be skipped on re-import."""
+
+    agency = models.ForeignKey("accounts.Agency", on_delete=models.CASCADE, related_name="import_fingerprints")
+    external_ref = models.CharField(max_length=100)
+    fingerprint = models.CharField(max_length=32)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["agency", "external_ref"], name="uniq_import_fingerprint_ref"),
+        ]
+
+    def __str__(self):
+        return f"{self.external_ref} ({self.fingerprint})"
+
+
+class ImportRowError(models.Model):
+    """A row an import job could not import, kept out of the job row so it can be paged and streamed."""
+
+    class ErrorType(models.TextChoices):
+        HEADER = "header", "Header"
+        VALIDATION = "validation", "Validation"
+        DATABASE = "database", "Database"
+        DUPLICATE = "duplicate", "Duplicate"
+        FATAL = "fatal", "Fatal"
+
+    job = models.ForeignKey(SFTPImportJob, on_delete=models.CASCADE, related_name="errors")
+    line = models.IntegerField(help_text="File line number; 1 is the header, 0 a job-level failure")
+    error_type = models.CharField(max_length=20, choices=ErrorType.choices)
+    error = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ["line", "id"]
+        indexes = [
+            models.Index(fields=["job", "line", "id"], name="idx_import_error_job_line"),
+            models.Index(fields=["job", "error_type", "line", "id"], name="idx_import_error_job_type"),
+        ]
+
+    def __str__(self):
+        return f"Line {self.line}: {self.error_type}"
+
+    @classmethod
+    def record(cls, job: SFTPImportJob, errors: list[dict]) -> list["ImportRowError"]:
+        """Bulk-insert {"line", "error_type", "error", "data"} dicts for `job`."""
+        return cls.objects.bulk_create(
+            [
+                cls(
+                    job=job,
+                    line=error["line"],
+                    error_type=error["error_type"],
+                    error=error["error"],
+                    data=error.get("data") or {},
+                )
+                for error in errors
+            ],
+            batch_size=1000,
+        )
+
+
+class RemoteFileEntry(models.Model):
+    """A file last seen in an agency's SFTP directory, with the size and mtime it had then.
+
+    A file is imported only once two polls in a row have seen it with the same size
+    and mtime, so files still being uploaded are left alone, and only once per
+    version: an imported file that stays in the directory isn't picked up again
+    unless it changes.
+    """
+
+    class Status(models.TextChoices):
+        SEEN = "seen", "Seen"
+        IMPORTED = "imported", "Imported"
+
+    agency = models.ForeignKey("accounts.Agency", on_delete=models.CASCADE, related_name="remote_files")
+    remote_dir = models.CharField(max_length=500)
+    name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    mtime = models.BigIntegerField(help_text="Modification time on the server, in epoch seconds")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.SEEN)
+    first_seen_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["agency", "remote_dir", "name"], name="uniq_remote_file_entry"),
+        ]
+
+    def __str__(self):
+        return f"{self.remote_dir}/{self.name} ({self.status})"
+
+    @classmethod
+    def observe(
+        cls, agency, remote_dir: str, listing: dict[str, tuple[int, int]], complete: Iterable[str] = ()
+    ) -> list[str]:
+        """Compare a directory listing ({name: (size, mtime)}) with the last one and record it.
+
+        Returns the names that are ready to import: unchanged since the previous
+        poll and not imported yet. Files in `complete` (reported fully uploaded by
+        the server) are ready as soon as they are seen. New and changed files are
+        recorded, entries for files gone from the directory dropped. One SELECT
+        and at most three writes.
+        """
+        complete = set(complete)
+        entries = {entry.name: entry for entry in cls.objects.filter(agency=agency, remote_dir=remote_dir)}
+        ready, created, changed = [], [], []
+        for name, (size, mtime) in listing.items():
+            entry = entries.get(name)
+            if entry is None:
+                created.append(cls(agency=agency, remote_dir=remote_dir, name=name, size=size, mtime=mtime))
+            elif (entry.size, entry.mtime) != (size, mtime):
+                entry.size, entry.mtime, entry.status = size, mtime, cls.Status.SEEN
+                entry.updated_at = timezone.now()
+                changed.append(entry)
+            elif entry.status == cls.Status.IMPORTED:
+                continue
+            else:  # unchanged since the previous poll
+                ready.append(name)
+                continue
+            if name in complete:  # new or changed, but reported fully uploaded
+                ready.append(name)
+
+        cls.objects.bulk_create(created, batch_size=1000)
+        cls.objects.bulk_update(changed, ["size", "mtime", "status", "updated_at"], batch_size=1000)
+        gone = [entry.pk for name, entry in entries.items() if name not in listing]
+        if gone:
+            cls.objects.filter(pk__in=gone).delete()
+        return sorted(ready)
+
+    @classmethod
+    def mark_imported(cls, agency, remote_dir: str, name: str):
+        cls.objects.filter(agency=agency, remote_dir=remote_dir, name=name).update(status=cls.Status.IMPORTED)
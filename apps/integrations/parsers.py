@@ -1,13 +1,27 @@
 """CSV parser with Pydantic validation for SFTP imports."""
 import csv
 import logging
+import re
+import time
+from collections.abc import Iterator
 from decimal import Decimal, InvalidOperation
 from typing import Any
 
+from django.conf import settings
 from pydantic import BaseModel, EmailStr, field_validator
 
+from .chunking import LineReader, iter_lines
+from .sources import PARQUET, detect_format, iter_parquet_batches
+
 logger = logging.getLogger(__name__)
 
+DUE_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def missing_columns_error(missing_required: set[str]) -> dict:
+    """The error reported on line 1 when the header lacks required columns."""
+    return {"line": 1, "error_type": "header", "error": f"Missing required columns: {missing_required}", "data": {}}
+
 
 class ImportRecordSchema(BaseModel):
     """Pydantic schema for validating each CSV row."""
@@ -64,16 +78,19 @@ class ImportRecordSchema(BaseModel):
     @field_validator("due_date")
     @classmethod
     def due_date_format(cls, v: str) -> str:
-        if v:
-            import re
-
-            if not re.match(r"^\d{4}-\d{2}-\d{2}$", v):
-                raise ValueError("due_date must be in YYYY-MM-DD format")
+        if v and not DUE_DATE_RE.match(v):
+            raise ValueError("due_date must be in YYYY-MM-DD format")
         return v
 
 
 class CSVParser:
-    """Parses CSV files and validates each row with Pydantic."""
+    """Parses CSV files and validates each row with Pydantic.
+
+    With validator="columnar" (or SFTP_IMPORT_VALIDATOR=columnar) chunks are checked
+    column by column instead (see validators.ColumnarValidator); results are identical.
+
+    Reads plain, gzip- and zip-compressed CSV and Parquet files (see sources).
+    """
 
     EXPECTED_HEADERS = {
         "external_ref",
@@ -86,41 +103,187 @@ class CSVParser:
         "creditor_name",
         "account_type",
     }
+    REQUIRED_HEADERS = {"external_ref", "debtor_name", "original_amount"}
+
+    def __init__(self, validator: str = ""):
+        self.validator = validator or settings.SFTP_IMPORT_VALIDATOR
+        # Resume point after the last chunk yielded by iter_chunks (see its docstring)
+        self.offset = 0
+        self.next_line = 2
+        # Time spent reading and validating the last chunk yielded by iter_chunks
+        self.parse_seconds = 0.0
+        self.validate_seconds = 0.0
 
     def parse(self, file_path: str) -> tuple[list[ImportRecordSchema], list[dict]]:
         """Parse a CSV file. Returns (valid_records, errors).
 
         Errors contain line number and reason for each invalid row.
+        Loads the whole file into memory — use `iter_chunks` for large files.
         """
         valid_records = []
         errors = []
-
-        with open(file_path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-
-            # Validate headers
-            if reader.fieldnames:
-                missing = self.EXPECTED_HEADERS - set(reader.fieldnames)
-                extra_required = {"external_ref", "debtor_name", "original_amount"}
-                missing_required = missing & extra_required
-                if missing_required:
-                    errors.append(
-                        {"line": 1, "error": f"Missing required columns: {missing_required}", "data": {}}
-                    )
-                    return [], errors
-
-            for line_num, row in enumerate(reader, start=2):
-                try:
-                    record = ImportRecordSchema(**row)
-                    valid_records.append(record)
-                except Exception as e:
-                    errors.append(
-                        {
-                            "line": line_num,
-                            "error": str(e),
-                            "data": dict(row),
-                        }
-                    )
+        for records, chunk_errors in self.iter_chunks(file_path):
+            valid_records.extend(record for _, record in records)
+            errors.extend(chunk_errors)
 
         logger.info("Parsed %d valid records, %d errors from %s", len(valid_records), len(errors), file_path)
         return valid_records, errors
+
+    def iter_chunks(
+        self,
+        file_path: str,
+        chunk_size: int = 1000,
+        start: int = 0,
+        end: int | None = None,
+        first_line: int = 2,
+    ) -> Iterator[tuple[list[tuple[int, ImportRecordSchema]], list[dict]]]:
+        """Stream a CSV file in chunks of `chunk_size` data rows.
+
+        Yields (records, errors) per chunk, where records are (line, record) pairs,
+        so memory stays bounded by the chunk size regardless of file size.
+        Line 1 is the header; the first data row is line 2.
+
+        `start`/`end` restrict parsing to a line-aligned byte range (see
+        chunking.plan_chunks); the header is then read from the top of the file
+        and `first_line` gives the line number of the range's first record.
+
+        After each chunk is yielded, `self.offset` is the byte offset just past it
+        and `self.next_line` the line number of the record that follows — pass
+        them back as `start`/`first_line` to continue where the chunk left off.
+        `self.parse_seconds`/`self.validate_seconds` are the time the chunk took
+        to read and to validate.
+
+        Parquet files have no bytes to seek to: there `start`/`self.offset` count
+        records, and records are numbered as if the file were a CSV with a header.
+        """
+        if detect_format(file_path) == PARQUET:
+            yield from self._iter_parquet_chunks(file_path, chunk_size, start, first_line)
+            return
+        if self.validator == "columnar":
+            yield from self._iter_columnar_chunks(file_path, chunk_size, start, end, first_line)
+            return
+
+        lines = LineReader(file_path, start, end)
+        if start:
+            header = next(csv.reader(iter_lines(file_path)), None)
+            reader = csv.DictReader(lines, fieldnames=header)
+        else:
+            reader = csv.DictReader(lines)
+
+        # Validate headers
+        if reader.fieldnames:
+            missing_required = self.REQUIRED_HEADERS - set(reader.fieldnames)
+            if missing_required:
+                yield [], [missing_columns_error(missing_required)]
+                return
+
+        records = []
+        errors = []
+        parse_seconds = validate_seconds = 0.0
+        started = time.perf_counter()
+        for line_num, row in enumerate(reader, start=first_line):
+            parsed = time.perf_counter()
+            parse_seconds += parsed - started
+            try:
+                records.append((line_num, ImportRecordSchema(**row)))
+            except Exception as e:
+                errors.append(
+                    {
+                        "line": line_num,
+                        "error_type": "validation",
+                        "error": str(e),
+                        "data": dict(row),
+                    }
+                )
+            started = time.perf_counter()
+            validate_seconds += started - parsed
+            if len(records) + len(errors) >= chunk_size:
+                self.offset, self.next_line = lines.position, line_num + 1
+                self.parse_seconds, self.validate_seconds = parse_seconds, validate_seconds
+                yield records, errors
+                records, errors = [], []
+                parse_seconds = validate_seconds = 0.0
+                started = time.perf_counter()
+
+        if records or errors:
+            self.offset, self.next_line = lines.position, line_num + 1
+            self.parse_seconds = parse_seconds + time.perf_counter() - started
+            self.validate_seconds = validate_seconds
+            yield records, errors
+
+    def _iter_columnar_chunks(
+        self, file_path: str, chunk_size: int, start: int, end: int | None, first_line: int
+    ) -> Iterator[tuple[list[tuple[int, Any]], list[dict]]]:
+        """iter_chunks for the columnar validator: plain csv.reader rows, validated a chunk at a time."""
+        from .validators import ColumnarValidator
+
+        lines = LineReader(file_path, start, end)
+        if start:
+            header = next(csv.reader(iter_lines(file_path)), [])
+            reader = csv.reader(lines)
+        else:
+            reader = csv.reader(lines)
+            header = next(reader, [])
+
+        missing_required = self.REQUIRED_HEADERS - set(header)
+        if header and missing_required:
+            yield [], [missing_columns_error(missing_required)]
+            return
+
+        validator = ColumnarValidator(header)
+        rows = []
+        started = time.perf_counter()
+        for row in reader:
+            if not row:  # csv.DictReader skips blank lines without numbering them
+                continue
+            rows.append(row)
+            if len(rows) >= chunk_size:
+                self.offset, self.next_line = lines.position, first_line + len(rows)
+                yield self._timed_validate(validator, rows, first_line, started)
+                first_line += len(rows)
+                rows = []
+                started = time.perf_counter()
+
+        if rows:
+            self.offset, self.next_line = lines.position, first_line + len(rows)
+            yield self._timed_validate(validator, rows, first_line, started)
+
+    def _timed_validate(self, validator, rows: list[list[str]], first_line: int, read_started: float) -> tuple:
+        """validator.validate(rows, first_line), setting parse_seconds (since `read_started`) and validate_seconds."""
+        parsed = time.perf_counter()
+        result = validator.validate(rows, first_line)
+        self.parse_seconds, self.validate_seconds = parsed - read_started, time.perf_counter() - parsed
+        return result
+
+    def _iter_parquet_chunks(
+        self, file_path: str, chunk_size: int, start: int, first_line: int
+    ) -> Iterator[tuple[list[tuple[int, Any]], list[dict]]]:
+        """iter_chunks for Parquet: one record batch per chunk, validated like CSV rows."""
+        from .validators import ColumnarValidator
+
+        validator = None
+        started = time.perf_counter()
+        for header, rows in iter_parquet_batches(file_path, batch_size=chunk_size, start=start):
+            parsed = time.perf_counter()
+            if validator is None:
+                missing_required = self.REQUIRED_HEADERS - set(header)
+                if missing_required:
+                    yield [], [missing_columns_error(missing_required)]
+                    return
+                validator = ColumnarValidator(header)
+            if self.validator == "columnar":
+                records, errors = validator.validate(rows, first_line)
+            else:
+                records, errors = [], []
+                for line_num, row in enumerate(rows, start=first_line):
+                    record, error = validator.validate_row(row, line_num)
+                    if error:
+                        errors.append(error)
+                    else:
+                        records.append((line_num, record))
+            start += len(rows)
+            first_line += len(rows)
+            self.offset, self.next_line = start, first_line
+            self.parse_seconds, self.validate_seconds = parsed - started, time.perf_counter() - parsed
+            yield records, errors
+            started = time.perf_counter()
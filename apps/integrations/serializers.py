@@ -1,7 +1,10 @@
 """DRF serializers for SFTP integration."""
+from django.db.models import Count
 from rest_framework import serializers
 
-from .models import SFTPImportJob
+from apps.accounts.models import Agency
+
+from .models import ImportRowError, SFTPImportJob
 
 
 class SFTPImportJobSerializer(serializers.ModelSerializer):
@@ -17,6 +20,10 @@ class SFTPImportJobSerializer(serializers.ModelSerializer):
             "total_records",
             "processed_ok",
             "processed_errors",
+            "inserted_records",
+            "updated_records",
+            "unchanged_records",
+            "duplicate_records",
             "started_at",
             "completed_at",
             "created_at",
@@ -27,6 +34,10 @@ class SFTPImportJobSerializer(serializers.ModelSerializer):
             "total_records",
             "processed_ok",
             "processed_errors",
+            "inserted_records",
+            "updated_records",
+            "unchanged_records",
+            "duplicate_records",
             "started_at",
             "completed_at",
             "created_at",
@@ -34,11 +45,40 @@ class SFTPImportJobSerializer(serializers.ModelSerializer):
 
 
 class SFTPImportJobDetailSerializer(SFTPImportJobSerializer):
+    error_counts = serializers.SerializerMethodField()
+    rows_per_second = serializers.FloatField(read_only=True)
+
     class Meta(SFTPImportJobSerializer.Meta):
-        fields = SFTPImportJobSerializer.Meta.fields + ["error_details"]
+        fields = SFTPImportJobSerializer.Meta.fields + [
+            "error_counts",
+            "download_seconds",
+            "parse_seconds",
+            "validate_seconds",
+            "upsert_seconds",
+            "activity_seconds",
+            "batch_count",
+            "peak_rss_bytes",
+            "rows_per_second",
+        ]
+
+    def get_error_counts(self, obj) -> dict[str, int]:
+        """Number of errors per error_type; the rows themselves are paged by the errors endpoint."""
+        counts = obj.errors.order_by().values_list("error_type").annotate(count=Count("id"))
+        return dict(counts)
+
+
+class ImportErrorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportRowError
+        fields = ["id", "line", "error_type", "error", "data"]
+
 
+class ImportValidationSerializer(serializers.Serializer):
+    """Input of a dry-run validation: the file, and the agency to match it against."""
 
-class ImportErrorSerializer(serializers.Serializer):
-    line = serializers.IntegerField()
-    error = serializers.CharField()
-    data = serializers.DictField(required=False)
+    file = serializers.FileField()
+    agency = serializers.PrimaryKeyRelatedField(
+        queryset=Agency.objects.filter(is_active=True),
+        required=False,
+        help_text="Defaults to the caller's own agency",
+    )
@@ -0,0 +1,153 @@
+"""Input formats accepted from SFTP: plain, gzip- or zip-compressed CSV, and Parquet.
+
+Compressed files are decompressed as they are read; the expanded CSV never touches
+disk. Parquet files are read one record batch at a time.
+
+A source is a local path, or a file still on the SFTP server (sftp_client.RemoteFile):
+anything with an `open()` that returns a seekable binary stream.
+"""
+import csv
+import datetime
+import gzip
+import io
+import logging
+import os
+import zipfile
+from collections.abc import Iterator
+from typing import BinaryIO
+
+logger = logging.getLogger(__name__)
+
+CSV = "csv"
+GZIP = "gzip"
+ZIP = "zip"
+PARQUET = "parquet"
+
+# File names SFTPClient.list_files picks up
+SUPPORTED_SUFFIXES = (".csv", ".csv.gz", ".zip", ".parquet")
+
+# What reading a corrupt or truncated file raises (gzip.BadGzipFile is an OSError; a
+# gzip stream cut short raises EOFError; pyarrow's ArrowInvalid is a ValueError)
+UNREADABLE_FILE_ERRORS = (OSError, EOFError, ValueError, zipfile.BadZipFile)
+
+_MAGIC = [
+    (b"\x1f\x8b", GZIP),
+    (b"PK\x03\x04", ZIP),
+    (b"PAR1", PARQUET),
+]
+
+
+def is_local(file_path) -> bool:
+    return isinstance(file_path, str | os.PathLike)
+
+
+def open_source(file_path) -> BinaryIO:
+    """Open a source's raw bytes: a local path, or a RemoteFile read over SFTP."""
+    if is_local(file_path):
+        return open(file_path, "rb")
+    return file_path.open()
+
+
+def detect_format(file_path) -> str:
+    """Format of a source, from its leading bytes (temp copies keep no reliable suffix)."""
+    with open_source(file_path) as f:
+        head = f.read(4)
+    for magic, file_format in _MAGIC:
+        if head.startswith(magic):
+            return file_format
+    return CSV
+
+
+def open_binary(file_path) -> BinaryIO:
+    """Open a CSV source for reading as (decompressed) bytes.
+
+    The stream is seekable: for gzip and zip members a forward seek decompresses
+    and discards, so byte offsets always refer to the decompressed CSV.
+    """
+    file_format = detect_format(file_path)
+    if file_format == ZIP and not is_local(file_path):
+        # The archive's index is at the end of the file, so it can't be read front to back
+        raise ValueError(f"{file_path} is a zip file, which can only be imported from a local copy")
+    if file_format == GZIP:
+        if is_local(file_path):
+            return gzip.open(file_path, "rb")
+        raw = file_path.open()
+        stream = gzip.GzipFile(fileobj=raw, mode="rb")
+        stream.myfileobj = raw  # closed along with the GzipFile, as gzip.open does for paths
+        return stream
+    if file_format == ZIP:
+        with zipfile.ZipFile(file_path) as archive:
+            # The member keeps the archive's file handle open after the ZipFile is closed
+            return archive.open(_zip_member(archive, file_path))
+    if file_format == PARQUET:
+        raise ValueError(f"{file_path} is a Parquet file, not CSV")
+    return open_source(file_path)
+
+
+def _zip_member(archive: zipfile.ZipFile, file_path: str) -> str:
+    members = [name for name in archive.namelist() if name.lower().endswith(".csv") and not name.endswith("/")]
+    if len(members) != 1:
+        raise ValueError(f"{file_path} must contain exactly one .csv file, found {len(members)}")
+    return members[0]
+
+
+def iter_rows(file_path) -> Iterator[list[str]]:
+    """Yield the header, then every row, as lists of strings, whatever the format."""
+    if detect_format(file_path) == PARQUET:
+        header = None
+        for batch_header, rows in iter_parquet_batches(file_path):
+            if header is None:
+                header = batch_header
+                yield header
+            yield from rows
+        if header is None:
+            yield parquet_header(file_path)
+        return
+
+    with io.TextIOWrapper(open_binary(file_path), encoding="utf-8", newline="") as f:
+        yield from csv.reader(f)
+
+
+def parquet_header(file_path: str) -> list[str]:
+    return _parquet_file(file_path).schema_arrow.names
+
+
+def iter_parquet_batches(
+    file_path: str, batch_size: int = 1000, start: int = 0
+) -> Iterator[tuple[list[str], list[list[str]]]]:
+    """Yield (header, rows) per Parquet record batch, skipping the first `start` records.
+
+    Values are rendered the way they would appear in a CSV export (None as "",
+    dates as YYYY-MM-DD), so rows go through the same validation as CSV rows.
+    """
+    parquet = _parquet_file(file_path)
+    header = parquet.schema_arrow.names
+    skip = start
+    for batch in parquet.iter_batches(batch_size=batch_size):
+        if skip >= batch.num_rows:
+            skip -= batch.num_rows
+            continue
+        if skip:
+            batch, skip = batch.slice(skip), 0
+        columns = [[_to_text(value) for value in column.to_pylist()] for column in batch.columns]
+        yield header, [list(row) for row in zip(*columns, strict=True)]
+
+
+def _parquet_file(file_path: str):
+    if not is_local(file_path):
+        raise ValueError(f"{file_path} is a Parquet file, which can only be imported from a local copy")
+    try:
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ValueError("Parquet imports need the pyarrow package") from e
+    return pyarrow.parquet.ParquetFile(file_path)
+
+
+def _to_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat() if value.time() == datetime.time() else value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value)
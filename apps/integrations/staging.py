@@ -0,0 +1,364 @@
+"""COPY-based import engine: stage the raw CSV in PostgreSQL, then validate and merge in SQL."""
+import json
+import logging
+import time
+from contextlib import closing
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.accounts.models import Account, Agency
+from apps.audit.middleware import get_audit_ip, get_audit_user
+from apps.audit.signals import capture_bulk_pre_save, save_audited
+
+from . import metrics
+from .chunking import FIRST_WINS, REJECT, duplicate_policy
+from .models import ImportRowError, SFTPImportJob
+from .parsers import CSVParser, missing_columns_error
+from .sources import is_local, iter_rows
+
+logger = logging.getLogger(__name__)
+
+# Staging column order (the CSV may order its columns differently)
+STAGING_COLUMNS = [
+    "external_ref",
+    "debtor_name",
+    "debtor_ssn_last4",
+    "debtor_email",
+    "debtor_phone",
+    "original_amount",
+    "due_date",
+    "creditor_name",
+    "account_type",
+]
+
+# Error of a row with more fields than the header, set while copying (see _copy_file)
+EXTRA_FIELDS_ERROR = "Row has more fields than the header"
+
+# Mirrors ImportRecordSchema's validators, plus the column limits the Python path
+# only discovers when the INSERT fails. First failing rule wins, as in Pydantic.
+# Rows already rejected by _copy_file keep their error.
+VALIDATE_SQL = """
+UPDATE {table} SET error = CASE
+    WHEN num_nulls({columns}) > 0
+        THEN 'Row has fewer fields than the header'
+    WHEN external_ref = '' OR length(external_ref) > 100
+        THEN 'external_ref is required and must be <= 100 chars'
+    WHEN debtor_name = ''
+        THEN 'debtor_name is required'
+    WHEN NOT pg_input_is_valid(original_amount, 'numeric') OR original_amount::numeric = 'NaN'
+        THEN 'original_amount must be a valid decimal'
+    WHEN original_amount::numeric <= 0
+        THEN 'original_amount must be positive'
+    WHEN NOT pg_input_is_valid(original_amount, 'numeric(12,2)')
+        THEN 'original_amount must be less than 10000000000'
+    WHEN debtor_ssn_last4 <> '' AND debtor_ssn_last4 !~ '^[0-9]{{4}}$'
+        THEN 'debtor_ssn_last4 must be exactly 4 digits'
+    WHEN debtor_email <> '' AND position('@' IN debtor_email) = 0
+        THEN 'Invalid email format'
+    WHEN due_date <> '' AND due_date !~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$'
+        THEN 'due_date must be in YYYY-MM-DD format'
+    WHEN due_date <> '' AND NOT pg_input_is_valid(due_date, 'date')
+        THEN 'due_date is not a valid calendar date'
+    WHEN length(btrim(debtor_name)) > 255
+        THEN 'debtor_name must be at most 255 characters'
+    WHEN length(btrim(debtor_email)) > 254
+        THEN 'debtor_email must be at most 254 characters'
+    WHEN length(debtor_phone) > 20
+        THEN 'debtor_phone must be at most 20 characters'
+END
+WHERE error IS NULL
+"""
+
+# Flags every occurrence of a repeated external_ref except the one the policy keeps
+# (`keep` is a window ORDER BY; under the reject policy no occurrence is kept).
+# Only valid rows count as occurrences, as in BatchImporter: an invalid last
+# occurrence doesn't displace a valid earlier one.
+DUPLICATES_SQL = """
+UPDATE {table} s SET duplicate = true
+FROM (
+    SELECT line,
+        row_number() OVER (PARTITION BY btrim(external_ref) ORDER BY {keep}) AS position,
+        count(*) OVER (PARTITION BY btrim(external_ref)) AS occurrences
+    FROM {table}
+    WHERE external_ref IS NOT NULL AND error IS NULL
+) d
+WHERE s.line = d.line AND d.occurrences > 1 AND (d.position > 1 OR %(reject)s)
+"""
+
+# Valid rows, one per external_ref: duplicates were resolved by DUPLICATES_SQL
+SOURCE_SQL = """
+SELECT
+    btrim(external_ref) AS external_ref,
+    btrim(debtor_name) AS full_name,
+    debtor_ssn_last4 AS ssn_last4,
+    NULLIF(btrim(debtor_email), '') AS email,
+    NULLIF(debtor_phone, '') AS phone,
+    original_amount::numeric(12, 2) AS amount,
+    NULLIF(due_date, '')::date AS due_date
+FROM {table}
+WHERE error IS NULL AND NOT duplicate
+"""
+
+MERGE_DEBTORS_SQL = """
+INSERT INTO accounts_debtor (id, external_ref, full_name, ssn_last4, email, phone, created_at)
+SELECT gen_random_uuid(), external_ref, full_name, ssn_last4, email, phone, now()
+FROM ({source}) src
+ON CONFLICT (external_ref) DO UPDATE SET
+    full_name = EXCLUDED.full_name,
+    ssn_last4 = EXCLUDED.ssn_last4,
+    email = EXCLUDED.email,
+    phone = EXCLUDED.phone
+"""
+
+# One statement upserts the accounts and writes their import Activities and audit
+# entries. All CTEs share one snapshot, so `previous` sees the rows as they were.
+MERGE_ACCOUNTS_SQL = """
+WITH src AS ({source}),
+previous AS (
+    SELECT a.* FROM accounts_account a JOIN src USING (external_ref)
+),
+upserted AS (
+    INSERT INTO accounts_account (
+        id, agency_id, debtor_id, external_ref, original_amount, current_balance,
+        status, priority, due_date, created_at, updated_at
+    )
+    SELECT gen_random_uuid(), %(agency_id)s, d.id, src.external_ref, src.amount, src.amount,
+        'new', 0, src.due_date, now(), now()
+    FROM src JOIN accounts_debtor d USING (external_ref)
+    ON CONFLICT (external_ref) DO UPDATE SET
+        agency_id = EXCLUDED.agency_id,
+        debtor_id = EXCLUDED.debtor_id,
+        original_amount = EXCLUDED.original_amount,
+        current_balance = EXCLUDED.current_balance,
+        due_date = EXCLUDED.due_date,
+        updated_at = EXCLUDED.updated_at
+    RETURNING *
+),
+activities AS (
+    INSERT INTO accounts_activity (id, account_id, activity_type, description, metadata, created_at)
+    SELECT gen_random_uuid(), u.id, 'import', %(description)s, %(metadata)s::jsonb, now()
+    FROM upserted u LEFT JOIN previous p USING (id)
+    WHERE p.id IS NULL
+),
+-- The stored fingerprints describe the values before this merge: drop them, so the
+-- batch engine's next import of these refs compares against nothing and rewrites them
+fingerprints AS (
+    DELETE FROM integrations_importfingerprint f
+    USING src
+    WHERE f.agency_id = %(agency_id)s AND f.external_ref = src.external_ref
+)
+INSERT INTO audit_auditlog (user_id, action, content_type_id, object_id, changes, ip_address, created_at)
+SELECT %(user_id)s,
+    CASE WHEN p.id IS NULL THEN 'create' ELSE 'update' END,
+    %(content_type_id)s,
+    u.id,
+    CASE WHEN p.id IS NULL THEN jsonb_build_object('new', to_jsonb(u))
+    ELSE jsonb_strip_nulls(jsonb_build_object(
+        'agency_id', CASE WHEN p.agency_id IS DISTINCT FROM u.agency_id
+            THEN jsonb_build_object('old', p.agency_id, 'new', u.agency_id) END,
+        'debtor_id', CASE WHEN p.debtor_id IS DISTINCT FROM u.debtor_id
+            THEN jsonb_build_object('old', p.debtor_id, 'new', u.debtor_id) END,
+        'original_amount', CASE WHEN p.original_amount IS DISTINCT FROM u.original_amount
+            THEN jsonb_build_object('old', p.original_amount::text, 'new', u.original_amount::text) END,
+        'current_balance', CASE WHEN p.current_balance IS DISTINCT FROM u.current_balance
+            THEN jsonb_build_object('old', p.current_balance::text, 'new', u.current_balance::text) END,
+        'due_date', CASE WHEN p.due_date IS DISTINCT FROM u.due_date
+            THEN jsonb_build_object('old', p.due_date, 'new', u.due_date) END,
+        'updated_at', jsonb_build_object('old', p.updated_at, 'new', u.updated_at)
+    ))
+    END,
+    %(ip_address)s,
+    now()
+FROM upserted u LEFT JOIN previous p USING (id)
+"""
+
+
+class CopyStagingImporter:
+    """Imports a CSV file through an UNLOGGED staging table instead of Python row loops.
+
+    - Streams rows into the staging table with COPY FROM STDIN (psycopg3)
+    - Validates every row with one UPDATE mirroring ImportRecordSchema
+    - Resolves repeated external_refs per the agency's duplicate policy with one
+      window-function UPDATE
+    - Merges Debtors, Accounts, import Activities and audit entries in two statements,
+      dropping the merged refs' ImportFingerprints (rows aren't fingerprinted in SQL)
+    - Records the file's SHA-256, so the batch engine skips the same file next time
+    - Copies invalid rows straight from the staging table into ImportRowError
+    - Times the COPY (parse), validation and merge (upsert) stages; Activities are
+      written by the merge statement, so activity_seconds stays 0
+    """
+
+    def __init__(self, agency: Agency, import_job: SFTPImportJob):
+        self.agency = agency
+        self.import_job = import_job
+        self.table = connection.ops.quote_name(f"import_staging_{import_job.id.hex}")
+        self.policy = duplicate_policy(agency)
+
+    def import_file(self, file_path: str) -> SFTPImportJob:
+        """Stage, validate and merge a CSV file."""
+        # Job saves are audited against these values rather than a re-SELECT per save
+        from .importers import file_sha256
+
+        before = capture_bulk_pre_save([self.import_job])
+        if not self.import_job.file_hash and is_local(file_path):
+            self.import_job.file_hash = file_sha256(file_path)
+        self.import_job.status = SFTPImportJob.Status.PROCESSING
+        self.import_job.started_at = timezone.now()
+        save_audited(self.import_job, before, update_fields=["status", "started_at", "file_hash"])
+        before = capture_bulk_pre_save([self.import_job])
+        self.import_job.errors.all().delete()  # left over from an attempt that was retried
+
+        stage_seconds = {}
+        try:
+            self._create_staging_table()
+            started = time.perf_counter()
+            errors = self._copy_file(file_path)
+            stage_seconds["parse"] = time.perf_counter() - started
+            if errors:
+                error_count = total = len(errors)  # a header error counts as one record, as in BatchImporter
+                duplicates = processed_ok = 0
+                ImportRowError.record(self.import_job, errors)
+            else:
+                started = time.perf_counter()
+                error_count, duplicates, total = self._validate()
+                stage_seconds["validate"] = time.perf_counter() - started
+                # Rejected duplicates are among the errors; superseded ones are neither OK nor errors
+                processed_ok = total - error_count - (0 if self.policy == REJECT else duplicates)
+                if processed_ok:
+                    started = time.perf_counter()
+                    with transaction.atomic():
+                        self._merge()
+                    stage_seconds["upsert"] = time.perf_counter() - started
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+        self.import_job.total_records = total
+        self.import_job.processed_ok = processed_ok
+        self.import_job.processed_errors = error_count
+        self.import_job.duplicate_records = duplicates
+        for stage, seconds in stage_seconds.items():
+            setattr(self.import_job, f"{stage}_seconds", seconds)
+        self.import_job.batch_count = 1
+        self.import_job.peak_rss_bytes = metrics.current_rss_bytes()
+        if processed_ok == 0 and error_count:
+            self.import_job.status = SFTPImportJob.Status.FAILED
+        else:
+            self.import_job.status = SFTPImportJob.Status.COMPLETED
+        self.import_job.completed_at = timezone.now()
+        save_audited(
+            self.import_job,
+            before,
+            update_fields=[
+                "total_records",
+                "processed_ok",
+                "processed_errors",
+                "duplicate_records",
+                "parse_seconds",
+                "validate_seconds",
+                "upsert_seconds",
+                "batch_count",
+                "peak_rss_bytes",
+                "status",
+                "completed_at",
+            ],
+        )
+        metrics.observe_batch(stage_seconds, total)
+        metrics.observe_job(self.import_job, self.agency)
+
+        logger.info(
+            "Import job %s completed via COPY staging: %d OK, %d duplicates, %d errors out of %d total",
+            self.import_job.id,
+            processed_ok,
+            duplicates,
+            error_count,
+            total,
+        )
+        return self.import_job
+
+    def _create_staging_table(self):
+        columns = ", ".join(f"{name} text" for name in STAGING_COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+            cursor.execute(
+                f"CREATE UNLOGGED TABLE {self.table} (line integer PRIMARY KEY, {columns}, "
+                "duplicate boolean NOT NULL DEFAULT false, error text, error_type text)"
+            )
+
+    def _copy_file(self, file_path: str) -> list[dict]:
+        """COPY the file into the staging table. Returns header errors, if any.
+
+        Rows go through csv.reader rather than raw bytes, so a ragged row becomes a
+        row error instead of aborting the whole COPY, and each row keeps its line number.
+        Lines are numbered as CSVParser numbers them: blank lines are skipped and
+        don't count. Compressed CSV and Parquet files are read through sources.iter_rows.
+        """
+        with closing(iter_rows(file_path)) as rows:
+            header = next(rows, [])
+            missing_required = CSVParser.REQUIRED_HEADERS - set(header)
+            if header and missing_required:
+                return [missing_columns_error(missing_required)]
+
+            # Position of each staging column in the file; absent optional columns stage as ''
+            positions = [header.index(name) if name in header else None for name in STAGING_COLUMNS]
+            width = len(header)
+            copy_sql = f"COPY {self.table} (line, {', '.join(STAGING_COLUMNS)}, error) FROM STDIN"
+            with connection.cursor() as cursor, cursor.copy(copy_sql) as copy:
+                line_num = 1
+                for row in rows:
+                    if not row:  # blank lines are skipped by csv.DictReader and don't get a line number
+                        continue
+                    line_num += 1
+                    error = EXTRA_FIELDS_ERROR if len(row) > width else None
+                    if len(row) < width:
+                        row = row + [None] * (width - len(row))
+                    copy.write_row([line_num] + ["" if pos is None else row[pos] for pos in positions] + [error])
+        return []
+
+    def _validate(self) -> tuple[int, int, int]:
+        """Flag invalid and duplicate rows in SQL and copy errors into ImportRowError.
+
+        Returns (errors, duplicates, total rows), where duplicates are the valid rows
+        left out by the duplicate policy; under the reject policy they are errors too.
+        """
+        data = ", ".join(f"'{name}', {name}" for name in STAGING_COLUMNS)
+        keep = "line" if self.policy == FIRST_WINS else "line DESC"
+        with connection.cursor() as cursor:
+            cursor.execute(VALIDATE_SQL.format(table=self.table, columns=", ".join(STAGING_COLUMNS)))
+            cursor.execute(DUPLICATES_SQL.format(table=self.table, keep=keep), {"reject": self.policy == REJECT})
+            cursor.execute(f"SELECT count(*), count(*) FILTER (WHERE duplicate AND error IS NULL) FROM {self.table}")
+            total, duplicates = cursor.fetchone()
+            if self.policy == REJECT:
+                cursor.execute(
+                    f"UPDATE {self.table} SET error = 'external_ref ' || btrim(external_ref) "
+                    "|| ' appears more than once in the file', error_type = %s WHERE duplicate AND error IS NULL",
+                    [ImportRowError.ErrorType.DUPLICATE],
+                )
+            cursor.execute(
+                f"INSERT INTO {ImportRowError._meta.db_table} (job_id, line, error_type, error, data) "
+                f"SELECT %s, line, coalesce(error_type, %s), error, jsonb_build_object({data}) FROM {self.table} "
+                "WHERE error IS NOT NULL",
+                [self.import_job.id, ImportRowError.ErrorType.VALIDATION],
+            )
+            errors = cursor.rowcount
+        return errors, duplicates, total
+
+    def _merge(self):
+        """Upsert valid staged rows into accounts_debtor / accounts_account."""
+        source = SOURCE_SQL.format(table=self.table)
+        user = get_audit_user()
+        with connection.cursor() as cursor:
+            cursor.execute(MERGE_DEBTORS_SQL.format(source=source))
+            cursor.execute(
+                MERGE_ACCOUNTS_SQL.format(source=source),
+                {
+                    "agency_id": self.agency.id,
+                    "description": f"Account imported from SFTP file {self.import_job.file_name}",
+                    "metadata": json.dumps({"import_job_id": str(self.import_job.id)}),
+                    "user_id": user.pk if user and user.is_authenticated else None,
+                    "content_type_id": ContentType.objects.get_for_model(Account).id,
+                    "ip_address": get_audit_ip(),
+                },
+            )
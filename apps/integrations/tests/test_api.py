@@ -0,0 +1,194 @@
+"""Integration tests for import job API endpoints."""
+import csv
+import io
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from rest_framework import status
+
+from apps.accounts.models import Account
+from apps.accounts.tests.factories import AccountFactory, AgencyFactory
+from apps.integrations.models import ImportRowError, SFTPImportJob
+
+
+def _job_with_errors(agency, count: int = 60) -> SFTPImportJob:
+    job = SFTPImportJob.objects.create(agency=agency, source_host="sftp.test", file_name="accounts.csv")
+    ImportRowError.objects.bulk_create(
+        ImportRowError(
+            job=job,
+            line=line,
+            error_type=ImportRowError.ErrorType.DATABASE if line % 10 == 0 else ImportRowError.ErrorType.VALIDATION,
+            error=f"Error on line {line}",
+            data={"external_ref": f"ACC-{line:03d}"},
+        )
+        for line in range(count + 1, 1, -1)  # inserted out of order
+    )
+    return job
+
+
+@pytest.mark.django_db
+class TestImportErrorsAPI:
+    def test_errors_keyset_paginated_by_line(self, authenticated_admin_client, agency):
+        job = _job_with_errors(agency)
+
+        response = authenticated_admin_client.get(f"/api/v1/imports/{job.id}/errors/")
+        assert response.status_code == status.HTTP_200_OK
+        first_page = [error["line"] for error in response.data["results"]]
+        response = authenticated_admin_client.get(response.data["next"])
+        second_page = [error["line"] for error in response.data["results"]]
+
+        assert first_page + second_page == list(range(2, 62))
+        assert response.data["next"] is None
+
+    def test_errors_filtered_by_type(self, authenticated_admin_client, agency):
+        job = _job_with_errors(agency)
+
+        response = authenticated_admin_client.get(f"/api/v1/imports/{job.id}/errors/?error_type=database")
+
+        assert [error["line"] for error in response.data["results"]] == [10, 20, 30, 40, 50, 60]
+        assert response.data["results"][0]["data"] == {"external_ref": "ACC-010"}
+
+    def test_errors_rejects_unknown_type(self, authenticated_admin_client, agency):
+        job = _job_with_errors(agency, count=1)
+
+        response = authenticated_admin_client.get(f"/api/v1/imports/{job.id}/errors/?error_type=bogus")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_download_streams_csv(self, authenticated_admin_client, agency):
+        job = _job_with_errors(agency)
+
+        response = authenticated_admin_client.get(f"/api/v1/imports/{job.id}/errors/download/?error_type=database")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"] == "text/csv"
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        assert rows[0] == ["line", "error_type", "error", "data"]
+        assert rows[1] == ["10", "database", "Error on line 10", '{"external_ref": "ACC-010"}']
+        assert len(rows) == 7
+
+    def test_detail_counts_errors_by_type(self, authenticated_admin_client, agency):
+        job = _job_with_errors(agency)
+
+        response = authenticated_admin_client.get(f"/api/v1/imports/{job.id}/")
+
+        assert response.data["error_counts"] == {"validation": 54, "database": 6}
+
+    def test_detail_shows_stage_timings(self, authenticated_admin_client, agency):
+        started = timezone.now()
+        job = SFTPImportJob.objects.create(
+            agency=agency,
+            source_host="test",
+            file_name="test.csv",
+            total_records=1000,
+            parse_seconds=1.5,
+            upsert_seconds=2.5,
+            batch_count=1,
+            started_at=started,
+            completed_at=started + timedelta(seconds=4),
+        )
+
+        response = authenticated_admin_client.get(f"/api/v1/imports/{job.id}/")
+
+        assert (response.data["parse_seconds"], response.data["upsert_seconds"]) == (1.5, 2.5)
+        assert response.data["rows_per_second"] == 250.0
+
+    def test_errors_hidden_from_other_agencies(self, authenticated_admin_client):
+        job = _job_with_errors(AgencyFactory(), count=1)
+
+        response = authenticated_admin_client.get(f"/api/v1/imports/{job.id}/errors/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestImportValidationAPI:
+    def test_validate_reports_without_importing(self, authenticated_admin_client, agency):
+        AccountFactory(agency=agency, external_ref="ACC-1")
+        upload = SimpleUploadedFile(
+            "accounts.csv", b"external_ref,debtor_name,original_amount\nACC-1,John,100\nACC-2,Jane,100\nACC-3,,100\n"
+        )
+
+        # An admin with a collector profile always validates against their own agency
+        response = authenticated_admin_client.post(
+            "/api/v1/imports/validate/", {"file": upload, "agency": str(AgencyFactory().id)}, format="multipart"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["agency"] == str(agency.id)
+        assert (response.data["expected_inserts"], response.data["expected_updates"]) == (1, 1)
+        assert response.data["errors"][0]["line"] == 4
+        assert Account.objects.count() == 1
+        assert not SFTPImportJob.objects.exists()
+
+    @pytest.mark.parametrize("name", ["accounts.csv.gz", "accounts.zip"])
+    def test_corrupt_upload_is_a_bad_request(self, authenticated_admin_client, name):
+        import gzip
+
+        content = gzip.compress(b"external_ref,debtor_name,original_amount\nACC-1,John,100\n")[:-12]  # truncated
+        if name.endswith(".zip"):
+            content = b"PK\x03\x04" + content  # zip magic, no archive behind it
+
+        response = authenticated_admin_client.post(
+            "/api/v1/imports/validate/", {"file": SimpleUploadedFile(name, content)}, format="multipart"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "file" in response.data
+
+    def test_validate_requires_agency_admin(self, authenticated_collector_client):
+        upload = SimpleUploadedFile("accounts.csv", b"external_ref,debtor_name,original_amount\n")
+
+        response = authenticated_collector_client.post("/api/v1/imports/validate/", {"file": upload})
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestImportTriggerAPI:
+    def test_trigger_returns_the_poll_in_flight(self, authenticated_admin_client, monkeypatch):
+        from django.core.cache import cache
+
+        from apps.integrations.leases import POLL_ALL, Lease
+        from tasks.sftp_tasks import sftp_poll_all_agencies
+
+        queued = []
+        monkeypatch.setattr(
+            sftp_poll_all_agencies, "apply_async", lambda task_id: queued.append(task_id) or MagicMock(id=task_id)
+        )
+        cache.delete(Lease(POLL_ALL, "").key)
+
+        first = authenticated_admin_client.post("/api/v1/imports/trigger/")
+        second = authenticated_admin_client.post("/api/v1/imports/trigger/")
+
+        assert (first.status_code, first.data["status"]) == (202, "triggered")
+        assert (second.status_code, second.data) == (200, {"task_id": first.data["task_id"], "status": "in_progress"})
+        assert queued == [first.data["task_id"]]
+        cache.delete(Lease(POLL_ALL, "").key)
+
+    def test_queued_poll_keeps_its_lease_past_the_running_ttl(self, authenticated_admin_client, monkeypatch, settings):
+        from django.core.cache import cache
+
+        from apps.integrations.leases import POLL_ALL, Lease
+        from tasks.sftp_tasks import sftp_poll_all_agencies
+
+        settings.SFTP_POLL_LEASE_SECONDS = 1
+        settings.SFTP_POLL_QUEUED_LEASE_SECONDS = 30
+        queued = []
+        monkeypatch.setattr(
+            sftp_poll_all_agencies, "apply_async", lambda task_id: queued.append(task_id) or MagicMock(id=task_id)
+        )
+        cache.delete(Lease(POLL_ALL, "").key)
+
+        first = authenticated_admin_client.post("/api/v1/imports/trigger/")
+        time.sleep(1.2)  # the queue is backed up: the poll hasn't started yet
+        second = authenticated_admin_client.post("/api/v1/imports/trigger/")
+
+        assert second.data == {"task_id": first.data["task_id"], "status": "in_progress"}
+        assert len(queued) == 1
+        cache.delete(Lease(POLL_ALL, "").key)
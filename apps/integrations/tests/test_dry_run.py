@@ -0,0 +1,103 @@
+"""Tests for validate-only (dry run) imports."""
+import json
+import os
+import tempfile
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from apps.accounts.models import Account, Activity, Debtor
+from apps.accounts.tests.factories import AgencyFactory
+from apps.audit.models import AuditLog
+from apps.integrations.importers import BatchImporter, dry_run
+from apps.integrations.models import ImportFingerprint, SFTPImportJob
+
+HEADER = "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type\n"
+
+
+def _write_csv(content: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    return path
+
+
+def _rows(refs_amounts: list[tuple[str, str]]) -> str:
+    return "".join(f"{ref},Person {ref},1234,,,{amount},2024-01-15,Bank,medical\n" for ref, amount in refs_amounts)
+
+
+@pytest.mark.django_db
+class TestDryRun:
+    def test_report_matches_the_import_that_follows(self, monkeypatch):
+        monkeypatch.setattr("apps.integrations.importers.BATCH_SIZE", 3)
+        agency = AgencyFactory()
+        first = _write_csv(HEADER + _rows([("ACC-1", "100"), ("ACC-2", "100"), ("ACC-3", "100")]))
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="first.csv")
+        BatchImporter(agency, job).import_file(first)
+
+        second = _write_csv(
+            HEADER
+            + _rows([("ACC-1", "100"), ("ACC-2", "250"), ("ACC-4", "100"), ("ACC-5", "-1"), ("ACC-4", "300")])
+        )
+        writes = (Account.objects.count(), Debtor.objects.count(), Activity.objects.count(), AuditLog.objects.count())
+
+        report = dry_run(agency, second)
+
+        assert writes == (
+            Account.objects.count(),
+            Debtor.objects.count(),
+            Activity.objects.count(),
+            AuditLog.objects.count(),
+        )
+        assert ImportFingerprint.objects.count() == 3
+        expected = (
+            report["total_records"],
+            report["expected_inserts"],
+            report["expected_updates"],
+            report["expected_unchanged"],
+            report["duplicate_records"],
+            report["expected_errors"],
+        )
+        assert expected == (5, 1, 1, 1, 1, 1)
+        assert report["error_counts"] == {"validation": 1}
+        assert [error["line"] for error in report["errors"]] == [5]
+        assert report["parse_rows_per_second"] > 0
+
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="second.csv")
+        result = BatchImporter(agency, job).import_file(second)
+
+        actual = (
+            result.total_records,
+            result.inserted_records,
+            result.updated_records,
+            result.unchanged_records,
+            result.duplicate_records,
+            result.processed_errors,
+        )
+        assert actual == expected
+        os.unlink(first)
+        os.unlink(second)
+
+    def test_missing_columns_reported_as_header_error(self):
+        path = _write_csv("external_ref,debtor_name\nACC-1,John\n")
+
+        report = dry_run(AgencyFactory(), path)
+
+        assert (report["total_records"], report["error_counts"]) == (1, {"header": 1})
+        os.unlink(path)
+
+    def test_management_command(self):
+        agency = AgencyFactory(name="Dry Run Agency")
+        path = _write_csv(HEADER + _rows([("ACC-1", "100"), ("ACC-2", "x")]))
+
+        out = StringIO()
+        call_command("validate_import", path, agency="Dry Run Agency", stdout=out)
+        assert "Inserts:    1" in out.getvalue()
+        assert "line 3 [validation]" in out.getvalue()
+
+        out = StringIO()
+        call_command("validate_import", path, agency=str(agency.id), json=True, stdout=out)
+        assert json.loads(out.getvalue())["expected_errors"] == 1
+        assert not Account.objects.exists()
+        os.unlink(path)
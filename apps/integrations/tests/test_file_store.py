@@ -0,0 +1,97 @@
+"""Tests for the shared import file store."""
+import io
+import os
+import tempfile
+
+import pytest
+from django.core.files.storage import storages
+
+from apps.integrations import file_store
+from apps.integrations.importers import file_sha256
+
+
+def _write(content: bytes) -> str:
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    return path
+
+
+class TestFileStore:
+    def test_stage_is_content_addressed(self, import_file_store):
+        first, second, other = _write(b"a,b\n1,2\n"), _write(b"a,b\n1,2\n"), _write(b"a,b\n3,4\n")
+
+        key, digest = file_store.stage(first, "agency-1")
+
+        assert (key, digest) == (f"agency-1/{file_sha256(first)}", file_sha256(first))
+        assert file_store.stage(second, "agency-1") == (key, digest)
+        assert file_store.stage(other, "agency-1")[0] != key
+        assert len(os.listdir(import_file_store / "agency-1")) == 2
+        with file_store.local_copy(key) as path:
+            assert path == str(import_file_store / key)
+        assert os.path.exists(path)  # the stored file itself, not a copy
+        for path in (first, second, other):
+            os.unlink(path)
+
+    def test_remote_storage_is_read_through_a_temporary_copy(self, settings):
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "imports": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        }
+        source = _write(b"a,b\n1,2\n")
+        key, _ = file_store.stage(source, "agency-1")
+        os.unlink(source)
+
+        with file_store.local_copy(key) as path:
+            with open(path, "rb") as f:
+                assert f.read() == b"a,b\n1,2\n"
+        assert not os.path.exists(path)
+        assert storages["imports"].exists(key)
+
+
+class _FakeS3Object:
+    """The part of a boto3 S3 Object that RangeReader uses, counting the bytes it serves."""
+
+    def __init__(self, content: bytes):
+        self.key = "imports/agency-1/digest"
+        self.content = content
+        self.content_length = len(content)
+        self.fetched = 0
+
+    def get(self, Range: str) -> dict:  # noqa: N803 (boto3's keyword)
+        start, end = map(int, Range.removeprefix("bytes=").split("-"))
+        data = self.content[start : end + 1]
+        self.fetched += len(data)
+        return {"Body": io.BytesIO(data)}
+
+
+@pytest.mark.django_db
+class TestRangeSource:
+    def test_chunk_reads_only_its_range_from_s3(self, monkeypatch):
+        from apps.accounts.models import Account
+        from apps.accounts.tests.factories import AgencyFactory
+        from apps.integrations.importers import BatchImporter
+        from apps.integrations.models import SFTPImportJob
+
+        monkeypatch.setattr(file_store, "RANGE_READ_BYTES", 4096)
+        header = "external_ref,debtor_name,original_amount\n"
+        content = (header + "".join(f"ACC-{i:05d},Person {i},100.00\n" for i in range(5000))).encode()
+        obj = _FakeS3Object(content)
+        start = content.index(b"ACC-04000")
+        agency = AgencyFactory()
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="big.csv")
+
+        errors = BatchImporter(agency, job).import_range(file_store.StoredObject(obj), start, len(content), 4002, {})
+
+        assert errors == 0
+        assert Account.objects.count() == 1000
+        assert Account.objects.order_by("external_ref").first().external_ref == "ACC-04000"
+        assert obj.fetched < len(content) // 3
+
+    def test_local_storage_reads_the_stored_file(self, import_file_store):
+        source = _write(b"a,b\n1,2\n")
+        key, _ = file_store.stage(source, "agency-1")
+        os.unlink(source)
+
+        with file_store.range_source(key) as path:
+            assert path == str(import_file_store / key)
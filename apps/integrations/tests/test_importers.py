@@ -1,13 +1,16 @@
 """Tests for batch import logic."""
 import os
 import tempfile
+from decimal import Decimal
 
 import pytest
 
 from apps.accounts.models import Account, Activity, Debtor
 from apps.accounts.tests.factories import AgencyFactory
+from apps.audit.models import AuditLog
+from apps.integrations import file_store
 from apps.integrations.importers import BatchImporter
-from apps.integrations.models import SFTPImportJob
+from apps.integrations.models import ImportRowError, SFTPImportJob
 
 
 def _write_csv(content: str) -> str:
@@ -89,3 +92,296 @@ class TestBatchImporter:
         assert Debtor.objects.first().full_name == "John D. Doe"
         os.unlink(path1)
         os.unlink(path2)
+
+    def test_db_error_isolated_by_bisection(self):
+        """A row that passes validation but fails in the DB is isolated without losing its batch."""
+        agency = AgencyFactory()
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="test.csv")
+
+        lines = [
+            "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type"
+        ]
+        for i in range(10):
+            phone = "5" * 30 if i == 6 else f"555-{i:04d}"  # debtor.phone is varchar(20)
+            lines.append(f"ACC-{i:03d},Person {i},1234,p{i}@email.com,{phone},100.00,2024-01-15,Hospital,medical")
+        path = _write_csv("\n".join(lines) + "\n")
+
+        result = BatchImporter(agency, job).import_file(path)
+
+        assert result.processed_ok == 9
+        assert result.processed_errors == 1
+        error = result.errors.get()
+        assert (error.line, error.error_type) == (8, ImportRowError.ErrorType.DATABASE)
+        assert error.data["external_ref"] == "ACC-006"
+        assert Account.objects.count() == 9
+        assert Activity.objects.filter(activity_type=Activity.ActivityType.IMPORT).count() == 9
+        os.unlink(path)
+
+    def test_batch_query_count_is_constant(self, django_assert_max_num_queries):
+        """Upserting a batch costs a fixed number of statements, not a few per row."""
+        agency = AgencyFactory()
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="test.csv")
+
+        lines = [
+            "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type"
+        ]
+        for i in range(200):
+            lines.append(f"ACC-{i:03d},Person {i},1234,p{i}@email.com,555-{i:04d},100.00,2024-01-15,Hospital,medical")
+        path = _write_csv("\n".join(lines) + "\n")
+
+        with django_assert_max_num_queries(21):
+            result = BatchImporter(agency, job).import_file(path)
+
+        assert result.processed_ok == 200
+        os.unlink(path)
+
+    def test_duplicates_are_collapsed_before_upsert(self, django_assert_max_num_queries):
+        """A ref repeated within a batch is upserted once, instead of failing ON CONFLICT and being bisected."""
+        agency = AgencyFactory()
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="test.csv")
+
+        lines = [
+            "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type"
+        ]
+        for i in range(200):
+            lines.append(f"ACC-{i % 150:03d},Person {i},1234,,,100.00,2024-01-15,Hospital,medical")
+        path = _write_csv("\n".join(lines) + "\n")
+
+        with django_assert_max_num_queries(21):
+            result = BatchImporter(agency, job).import_file(path)
+
+        assert (result.processed_ok, result.inserted_records, result.duplicate_records) == (150, 150, 50)
+        assert Debtor.objects.get(external_ref="ACC-000").full_name == "Person 150"
+        assert not result.errors.exists()
+        os.unlink(path)
+
+    def test_job_status_changes_are_audited(self):
+        agency = AgencyFactory()
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="test.csv")
+        path = _write_csv(
+            "external_ref,debtor_name,original_amount\n" + "".join(f"ACC-{i},Person {i},100\n" for i in range(3))
+        )
+
+        BatchImporter(agency, job).import_file(path)
+
+        started, finished = AuditLog.objects.filter(object_id=job.pk, action=AuditLog.Action.UPDATE).order_by("id")
+        assert started.changes["status"] == {"old": "pending", "new": "processing"}
+        assert started.changes["file_hash"]["old"] == ""
+        assert finished.changes["status"] == {"old": "processing", "new": "completed"}
+        os.unlink(path)
+
+    def test_stage_timings_saved_on_job_and_exported(self, monkeypatch):
+        from prometheus_client import REGISTRY
+
+        monkeypatch.setattr("apps.integrations.importers.BATCH_SIZE", 2)
+        agency = AgencyFactory()
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="test.csv")
+        path = _write_csv(
+            "external_ref,debtor_name,original_amount\n" + "".join(f"ACC-{i},Person {i},100\n" for i in range(5))
+        )
+
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0
+
+        batches = sample("debtflow_sftp_import_batch_seconds_count")
+        activity_rows = sample("debtflow_sftp_import_stage_rows_total", stage="activity")
+        jobs = sample("debtflow_sftp_import_jobs_total", agency=agency.name, status="completed")
+
+        result = BatchImporter(agency, job).import_file(path)
+
+        assert result.batch_count == 3
+        assert min(result.parse_seconds, result.validate_seconds, result.upsert_seconds, result.activity_seconds) > 0
+        assert result.peak_rss_bytes > 0
+        assert result.rows_per_second > 0
+        assert sample("debtflow_sftp_import_batch_seconds_count") - batches == 3
+        assert sample("debtflow_sftp_import_stage_rows_total", stage="activity") - activity_rows == 5
+        assert sample("debtflow_sftp_import_jobs_total", agency=agency.name, status="completed") - jobs == 1
+        assert sample("debtflow_sftp_import_records_total", agency=agency.name, status="ok") == 5
+        os.unlink(path)
+
+    def test_reimport_keeps_workflow_fields_and_audits_changes(self):
+        agency = AgencyFactory()
+        header = "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type\n"
+
+        job1 = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="test1.csv")
+        path1 = _write_csv(header + "ACC-001,John Doe,1234,john@email.com,555-0100,1500.00,2024-01-15,Hospital,medical\n")
+        BatchImporter(agency, job1).import_file(path1)
+
+        account = Account.objects.get(external_ref="ACC-001")
+        created_at = account.created_at
+        Account.objects.filter(pk=account.pk).update(status=Account.Status.IN_CONTACT, priority=7)
+
+        job2 = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="test2.csv")
+        path2 = _write_csv(header + "ACC-001,John Doe,1234,john@email.com,555-0100,1750.00,2024-01-15,Hospital,medical\n")
+        BatchImporter(agency, job2).import_file(path2)
+
+        account.refresh_from_db()
+        assert account.status == Account.Status.IN_CONTACT
+        assert account.priority == 7
+        assert account.created_at == created_at
+        assert account.original_amount == Decimal("1750.00")
+        assert Activity.objects.filter(account=account, activity_type=Activity.ActivityType.IMPORT).count() == 1
+
+        logs = AuditLog.objects.filter(object_id=account.pk)
+        assert logs.filter(action=AuditLog.Action.CREATE).count() == 1
+        update = logs.get(action=AuditLog.Action.UPDATE)
+        assert update.changes["original_amount"] == {"old": "1500.00", "new": "1750.00"}
+        assert "status" not in update.changes
+        assert "created_at" not in update.changes
+        os.unlink(path1)
+        os.unlink(path2)
+
+    def test_error_lines_exact_across_batches(self, monkeypatch):
+        """Line numbers stay exact when parse errors and DB errors land in different batches."""
+        monkeypatch.setattr("apps.integrations.importers.BATCH_SIZE", 4)
+        agency = AgencyFactory()
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="test.csv")
+
+        lines = [
+            "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type"
+        ]
+        for i in range(10):
+            amount = "-5" if i == 1 else "100.00"
+            phone = "5" * 30 if i == 6 else "555-0100"
+            lines.append(f"ACC-{i:03d},Person {i},1234,p{i}@email.com,{phone},{amount},2024-01-15,Hospital,medical")
+        path = _write_csv("\n".join(lines) + "\n")
+
+        result = BatchImporter(agency, job).import_file(path)
+
+        assert result.total_records == 10
+        assert result.processed_ok == 8
+        assert list(result.errors.values_list("line", "error_type")) == [(3, "validation"), (8, "database")]
+        assert result.errors.last().data["external_ref"] == "ACC-006"
+        os.unlink(path)
+
+    def _interrupt_chunk(self, monkeypatch, call: int):
+        """Make the `call`-th _import_chunk (1-based) raise SoftTimeLimitExceeded, once."""
+        from celery.exceptions import SoftTimeLimitExceeded
+
+        original = BatchImporter._import_chunk
+        calls = []
+
+        def interrupted(importer, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == call:
+                raise SoftTimeLimitExceeded()
+            return original(importer, *args, **kwargs)
+
+        monkeypatch.setattr(BatchImporter, "_import_chunk", interrupted)
+
+    def _checkpoint_csv(self) -> str:
+        lines = [
+            "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type"
+        ]
+        for i in range(10):
+            amount = "-5" if i in (1, 8) else "100.00"
+            lines.append(f"ACC-{i:03d},Person {i},1234,p{i}@email.com,555-0100,{amount},2024-01-15,Hospital,medical")
+        return _write_csv("\n".join(lines) + "\n")
+
+    def test_resumes_from_checkpoint(self, monkeypatch):
+        """An interrupted import picks up after its last committed batch without double-counting."""
+        from celery.exceptions import SoftTimeLimitExceeded
+
+        monkeypatch.setattr("apps.integrations.importers.BATCH_SIZE", 4)
+        self._interrupt_chunk(monkeypatch, call=2)
+        agency = AgencyFactory()
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="test.csv")
+        path = self._checkpoint_csv()
+
+        with pytest.raises(SoftTimeLimitExceeded):
+            BatchImporter(agency, job).import_file(path)
+
+        job.refresh_from_db()
+        assert job.status == SFTPImportJob.Status.PROCESSING
+        assert job.checkpoint_line == 5
+        assert (job.total_records, job.processed_ok, job.processed_errors) == (4, 3, 1)
+        assert Account.objects.count() == 3
+
+        result = BatchImporter(agency, job).import_file(path)
+
+        assert result.status == SFTPImportJob.Status.COMPLETED
+        assert (result.total_records, result.processed_ok, result.processed_errors) == (10, 8, 2)
+        assert list(result.errors.values_list("line", flat=True)) == [3, 10]
+        assert Account.objects.count() == 8
+        assert Activity.objects.filter(activity_type=Activity.ActivityType.IMPORT).count() == 8
+        assert AuditLog.objects.filter(object_id__in=Account.objects.values("pk")).count() == 8  # one create each
+        os.unlink(path)
+
+    def test_soft_time_limit_continues_in_new_task(self, monkeypatch, caplog):
+        from config.celery import app
+        from tasks.sftp_tasks import process_import_file
+
+        monkeypatch.setattr("apps.integrations.importers.BATCH_SIZE", 4)
+        self._interrupt_chunk(monkeypatch, call=3)
+        agency = AgencyFactory()
+        path = self._checkpoint_csv()
+
+        file_key, file_hash = file_store.stage(path, str(agency.id))
+        os.unlink(path)
+
+        caplog.set_level("INFO")
+        app.conf.task_always_eager = True
+        try:
+            process_import_file(str(agency.id), file_key, "big.csv", "sftp.test", file_hash=file_hash)
+        finally:
+            app.conf.task_always_eager = False
+
+        job = SFTPImportJob.objects.get(file_name="big.csv")  # the continuation reused the job
+        assert f"Import job {job.id} hit the soft time limit after line 9" in caplog.text
+        assert job.status == SFTPImportJob.Status.COMPLETED
+        assert (job.total_records, job.processed_ok, job.processed_errors) == (10, 8, 2)
+        assert list(job.errors.values_list("line", flat=True)) == [3, 10]
+        assert (job.file_path_s3, job.file_hash) == (file_key, file_hash)
+
+    def test_delta_import_skips_identical_files_and_unchanged_rows(self):
+        agency = AgencyFactory()
+        header = "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type\n"
+        rows = [f"ACC-{i:03d},Person {i},1234,p{i}@email.com,555-0100,100.00,2024-01-15,Hospital,medical\n" for i in range(5)]
+        bad = "ACC-BAD,,,,,100.00,,,\n"  # no debtor_name
+        path1 = _write_csv(header + "".join(rows) + bad)
+        first = BatchImporter(agency, SFTPImportJob.objects.create(agency=agency, file_name="day1.csv")).import_file(path1)
+        assert (first.inserted_records, first.updated_records, first.unchanged_records) == (5, 0, 0)
+
+        # Same content again: the file is skipped before parsing
+        path2 = _write_csv(header + "".join(rows) + bad)
+        account_audits = AuditLog.objects.filter(object_id__in=Account.objects.values("pk"))
+        audit_count = account_audits.count()
+        second = BatchImporter(agency, SFTPImportJob.objects.create(agency=agency, file_name="day2.csv")).import_file(path2)
+        assert second.status == SFTPImportJob.Status.COMPLETED
+        assert (second.processed_ok, second.unchanged_records) == (5, 5)
+        assert second.file_hash == first.file_hash
+        assert list(second.errors.values_list("line", "error")) == list(first.errors.values_list("line", "error"))
+        assert account_audits.count() == audit_count
+
+        # One row changed (100.0 is the same amount as 100.00), one deleted account, one new row
+        Account.objects.get(external_ref="ACC-004").delete()
+        rows[0] = rows[0].replace("Person 0", "Person Zero")
+        rows[1] = rows[1].replace("100.00", "100.0")
+        rows.append("ACC-005,Person 5,1234,p5@email.com,555-0100,100.00,2024-01-15,Hospital,medical\n")
+        path3 = _write_csv(header + "".join(rows))
+        third = BatchImporter(agency, SFTPImportJob.objects.create(agency=agency, file_name="day3.csv")).import_file(path3)
+
+        assert (third.inserted_records, third.updated_records, third.unchanged_records) == (2, 1, 3)
+        assert third.processed_ok == 6
+        assert Debtor.objects.get(external_ref="ACC-000").full_name == "Person Zero"
+        assert Account.objects.filter(external_ref="ACC-004").exists()
+        unchanged = Account.objects.get(external_ref="ACC-002")
+        assert not AuditLog.objects.filter(object_id=unchanged.pk, action=AuditLog.Action.UPDATE).exists()
+        for path in (path1, path2, path3):
+            os.unlink(path)
+
+    def test_older_identical_file_is_applied_again(self):
+        """Only the latest import counts as identical: an older snapshot re-sent later is imported."""
+        agency = AgencyFactory()
+        header = "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type\n"
+        old = header + "ACC-001,John Doe,1234,,,100.00,,,\n"
+        new = header + "ACC-001,John Doe,1234,,,250.00,,,\n"
+
+        for i, content in enumerate([old, new, old]):
+            path = _write_csv(content)
+            job = SFTPImportJob.objects.create(agency=agency, file_name=f"day{i}.csv")
+            result = BatchImporter(agency, job).import_file(path)
+            os.unlink(path)
+
+        assert (result.updated_records, result.unchanged_records) == (1, 0)
+        assert Account.objects.get(external_ref="ACC-001").original_amount == Decimal("100.00")
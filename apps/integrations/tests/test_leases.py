@@ -0,0 +1,66 @@
+"""Tests for cache-backed poll leases."""
+import time
+
+import pytest
+from django.core.cache import cache
+
+from apps.integrations.leases import Lease
+
+
+@pytest.fixture(autouse=True)
+def clear_lease():
+    cache.delete("lease:test")
+    yield
+    cache.delete("lease:test")
+
+
+class TestLease:
+    def test_one_holder_at_a_time(self):
+        first, second = Lease("test", "task-1", ttl=30), Lease("test", "task-2", ttl=30)
+
+        assert first.acquire()
+        assert first.acquire()  # already ours
+        assert not second.acquire()
+        assert second.holder() == "task-1"
+
+        second.release()  # not the holder: no effect
+        assert first.holder() == "task-1"
+        first.release()
+        assert second.acquire()
+
+    def test_holder_adopts_a_lease_taken_for_it_at_its_own_ttl(self):
+        assert Lease("test", "task-1", ttl=30).acquire()  # taken on the queued task's behalf
+
+        assert Lease("test", "task-1", ttl=1).acquire()
+        assert not Lease("test", "task-2", ttl=1).acquire()
+        time.sleep(1.1)
+        assert Lease("test", "task-2", ttl=1).acquire()
+
+    def test_stale_holder_cannot_renew_or_release_a_retaken_lease(self, monkeypatch):
+        stale = Lease("test", "task-1", ttl=1)
+        assert stale.acquire()
+        time.sleep(1.1)
+        assert Lease("test", "task-2", ttl=30).acquire()
+        # Even if the stale holder still read itself as the holder just before acting
+        monkeypatch.setattr(cache, "get", lambda key, default=None: "task-1")
+
+        assert not stale.renew()
+        stale.release()
+
+        monkeypatch.undo()
+        assert Lease("test", "task-2").holder() == "task-2"
+
+    def test_heartbeat_keeps_lease_past_its_ttl(self):
+        lease = Lease("test", "task-1", ttl=1)
+        assert lease.acquire()
+
+        with lease.held():
+            time.sleep(1.5)
+            assert lease.holder() == "task-1"
+        assert lease.holder() is None
+
+    def test_lease_of_a_dead_holder_expires(self):
+        assert Lease("test", "task-1", ttl=1).acquire()
+        time.sleep(1.1)
+
+        assert Lease("test", "task-2", ttl=1).acquire()
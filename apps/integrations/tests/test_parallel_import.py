@@ -0,0 +1,156 @@
+"""Tests for splitting large files and importing them across Celery workers."""
+import os
+import tempfile
+from decimal import Decimal
+
+import pytest
+
+from apps.accounts.models import Account, Debtor
+from apps.accounts.tests.factories import AgencyFactory
+from apps.integrations import file_store
+from apps.integrations.chunking import REJECTED, find_duplicates, plan_chunks, ref_key
+from apps.integrations.importers import BatchImporter
+from apps.integrations.models import SFTPImportJob
+from apps.integrations.parsers import CSVParser
+
+HEADER = "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type"
+
+
+def _write_csv(content: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    return path
+
+
+def _sample_rows(count: int) -> list[str]:
+    rows = []
+    for i in range(count):
+        amount = "-1" if i % 17 == 5 else f"{100 + i}.00"
+        rows.append(f"ACC-{i:04d},Person {i},1234,p{i}@email.com,555-0100,{amount},2024-01-15,Hospital,medical")
+    return rows
+
+
+class TestPlanChunks:
+    def test_chunks_cover_file_on_record_boundaries(self):
+        path = _write_csv("\n".join([HEADER] + _sample_rows(100)) + "\n")
+
+        chunks, winners = plan_chunks(path, chunk_bytes=1000)
+
+        assert len(chunks) > 5
+        assert winners == {}
+        assert chunks[0]["first_line"] == 2
+        assert chunks[-1]["end"] == os.path.getsize(path)
+        for previous, chunk in zip(chunks, chunks[1:], strict=False):
+            assert chunk["start"] == previous["end"]
+
+        lines = []
+        for chunk in chunks:
+            for records, errors in CSVParser().iter_chunks(
+                path, start=chunk["start"], end=chunk["end"], first_line=chunk["first_line"]
+            ):
+                lines.extend(line for line, _ in records)
+                lines.extend(error["line"] for error in errors)
+        assert sorted(lines) == list(range(2, 102))
+        os.unlink(path)
+
+    def test_quoted_newlines_are_not_split(self):
+        rows = [f'ACC-{i:03d},"Person\n{i}",1234,,,100.00,,,' for i in range(50)]
+        path = _write_csv("\n".join([HEADER] + rows) + "\n")
+
+        chunks, _ = plan_chunks(path, chunk_bytes=200)
+
+        names = []
+        for chunk in chunks:
+            for records, errors in CSVParser().iter_chunks(
+                path, start=chunk["start"], end=chunk["end"], first_line=chunk["first_line"]
+            ):
+                assert errors == []
+                names.extend((line, record.debtor_name) for line, record in records)
+        assert names == [(i + 2, f"Person\n{i}") for i in range(50)]
+        os.unlink(path)
+
+    @pytest.mark.parametrize("policy, line", [("last", 5), ("first", 2), ("reject", REJECTED)])
+    def test_duplicate_refs_resolve_per_policy(self, policy, line):
+        rows = ["ACC-001,A,,,,1.00,,,", "ACC-002,B,,,,1.00,,,", " ACC-001 ,C,,,,1.00,,,", "", "ACC-001,D,,,,1.00,,,"]
+        path = _write_csv("\n".join([HEADER] + rows) + "\n")
+
+        chunks, winners = plan_chunks(path, chunk_bytes=10, policy=policy)
+
+        assert winners == {ref_key("ACC-001"): line}
+        assert find_duplicates(path, policy) == winners
+        # Each chunk carries only the refs it holds
+        assert [chunk["winners"] for chunk in chunks] == [winners, {}, winners, winners]
+        os.unlink(path)
+
+    @pytest.mark.parametrize("policy, line", [("last", 3), ("first", 2), ("reject", REJECTED)])
+    def test_invalid_occurrences_do_not_count(self, policy, line):
+        rows = ["ACC-001,A,,,,1.00,,,", "ACC-001,B,,,,2.00,,,", "ACC-001,C,,,,-1,,,"]
+        rows += ["ACC-002,D,,,,1.00,,,", "ACC-002,E,,,,not-a-number,,,"]
+        path = _write_csv("\n".join([HEADER] + rows) + "\n")
+
+        assert find_duplicates(path, policy) == {ref_key("ACC-001"): line}
+        os.unlink(path)
+
+
+@pytest.mark.django_db
+class TestParallelImport:
+    def test_ranges_imported_out_of_order_match_serial_import(self):
+        rows = _sample_rows(120)
+        rows[100] = "ACC-0007,Late Winner,1234,,,999.00,2024-01-15,Hospital,medical"  # duplicate of row 7
+        rows[110] = "ACC-0020,Invalid Repeat,1234,,,-5,2024-01-15,Hospital,medical"  # doesn't supersede row 20
+        content = "\n".join([HEADER] + rows) + "\n"
+        path = _write_csv(content)
+        agency = AgencyFactory()
+
+        serial_job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="serial.csv")
+        serial = BatchImporter(agency, serial_job).import_file(path)
+        Account.objects.all().delete()
+        Debtor.objects.all().delete()
+
+        parallel_job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="parallel.csv")
+        importer = BatchImporter(agency, parallel_job)
+        importer.start()
+        chunks, _ = plan_chunks(path, chunk_bytes=1500)
+        for chunk in reversed(chunks):  # the chunk holding the later duplicate commits first
+            importer.import_range(path, chunk["start"], chunk["end"], chunk["first_line"], chunk["winners"])
+        parallel = importer.finish()
+
+        assert len(chunks) > 3
+        assert parallel.status == serial.status == SFTPImportJob.Status.COMPLETED
+        assert parallel.total_records == serial.total_records == 120
+        assert parallel.processed_ok == serial.processed_ok
+        assert parallel.processed_errors == serial.processed_errors
+        parallel_lines = list(parallel.errors.values_list("line", flat=True))
+        assert parallel_lines == list(serial.errors.values_list("line", flat=True))
+        assert Account.objects.get(external_ref="ACC-0007").original_amount == Decimal("999.00")
+        assert Debtor.objects.get(external_ref="ACC-0007").full_name == "Late Winner"
+        assert Account.objects.get(external_ref="ACC-0020").original_amount == Decimal("120.00")
+        os.unlink(path)
+
+    def test_process_import_file_dispatches_chord(self, settings, caplog):
+        from config.celery import app
+        from tasks.sftp_tasks import process_import_file
+
+        settings.SFTP_PARALLEL_IMPORT_MIN_BYTES = 1
+        settings.SFTP_PARALLEL_IMPORT_CHUNK_BYTES = 1000
+        app.conf.task_always_eager = True
+        agency = AgencyFactory()
+        path = _write_csv("\n".join([HEADER] + _sample_rows(60)) + "\n")
+
+        file_key, _ = file_store.stage(path, str(agency.id))
+        os.unlink(path)
+
+        caplog.set_level("INFO", logger="tasks.sftp_tasks")
+        try:
+            process_import_file(str(agency.id), file_key, "big.csv", "sftp.test")
+        finally:
+            app.conf.task_always_eager = False
+
+        job = SFTPImportJob.objects.get(file_name="big.csv")
+        assert f"Import job {job.id} split into" in caplog.text
+        assert job.status == SFTPImportJob.Status.COMPLETED
+        assert job.total_records == 60
+        assert job.processed_errors == 4
+        assert job.processed_ok == 56
+        assert list(job.errors.values_list("line", flat=True)) == [7, 24, 41, 58]
@@ -1,6 +1,7 @@
 """Tests for CSV parser and Pydantic validation."""
 import os
 import tempfile
+import tracemalloc
 
 import pytest
 
@@ -130,3 +131,52 @@ class TestCSVParser:
         assert len(records) == 5000
         assert len(errors) == 0
         os.unlink(path)
+
+    def test_iter_chunks_keeps_line_numbers(self):
+        lines = ["external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type"]
+        for i in range(25):
+            amount = "-1" if i in (3, 17) else "100.00"
+            lines.append(f"ACC-{i:03d},Person {i},1234,p{i}@email.com,555-0100,{amount},2024-01-01,Creditor,medical")
+        path = self._write_csv("\n".join(lines))
+
+        chunks = list(CSVParser().iter_chunks(path, chunk_size=10))
+
+        assert [len(records) + len(errors) for records, errors in chunks] == [10, 10, 5]
+        all_lines = [line for records, _ in chunks for line, _ in records]
+        error_lines = [error["line"] for _, errors in chunks for error in errors]
+        assert error_lines == [5, 19]
+        assert sorted(all_lines + error_lines) == list(range(2, 27))
+        first_line, first_record = chunks[1][0][0]
+        assert first_line == 12
+        assert first_record.external_ref == "ACC-010"
+        os.unlink(path)
+
+    def test_iter_chunks_missing_required_columns(self):
+        path = self._write_csv("external_ref,debtor_name\nACC-001,John\n")
+
+        chunks = list(CSVParser().iter_chunks(path))
+
+        assert len(chunks) == 1
+        assert chunks[0][0] == []
+        assert chunks[0][1][0]["line"] == 1
+        os.unlink(path)
+
+    def test_iter_chunks_memory_is_flat(self):
+        """Peak memory while streaming doesn't grow with the number of rows."""
+        header = "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type"
+
+        def peak_for(rows: int) -> int:
+            lines = [header] + [
+                f"ACC-{i:06d},Person {i},1234,p{i}@email.com,555-0100,100.00,2024-01-01,Creditor,medical"
+                for i in range(rows)
+            ]
+            path = self._write_csv("\n".join(lines))
+            tracemalloc.start()
+            for _ in CSVParser().iter_chunks(path, chunk_size=500):
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            os.unlink(path)
+            return peak
+
+        assert peak_for(20000) < 1.5 * peak_for(2000)
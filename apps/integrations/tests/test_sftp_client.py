@@ -1,13 +1,30 @@
 """Tests for SFTP client wrapper."""
+import gzip
 import os
+import shutil
+import tempfile
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from apps.integrations.sftp_client import SFTPClient
+from apps.accounts.models import Account
+from apps.accounts.tests.factories import AgencyFactory
+from apps.integrations import file_store
+from apps.integrations.importers import BatchImporter
+from apps.integrations.models import RemoteFileEntry, SFTPImportJob
+from apps.integrations.sftp_client import READ_REQUEST_BYTES, RemoteFile, SFTPClient, pool
+from apps.integrations.staging import CopyStagingImporter
+
+HEADER = "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type\n"
 
 
 class TestSFTPClient:
+    @pytest.fixture(autouse=True)
+    def create_connection(self):
+        with patch("apps.integrations.sftp_client.socket.create_connection") as create_connection:
+            yield create_connection
+        pool.close_all()
+
     def test_init_with_explicit_params(self):
         client = SFTPClient(host="sftp.example.com", port=2222, username="user", password="pass")
         assert client.host == "sftp.example.com"
@@ -16,20 +33,25 @@ class TestSFTPClient:
         assert client.password == "pass"
 
     @patch("apps.integrations.sftp_client.paramiko")
-    def test_connect_creates_transport(self, mock_paramiko):
+    def test_connect_creates_transport(self, mock_paramiko, create_connection):
         mock_transport = MagicMock()
+        mock_sftp = MagicMock()
         mock_paramiko.Transport.return_value = mock_transport
-        mock_paramiko.SFTPClient.from_transport.return_value = MagicMock()
+        mock_paramiko.SFTPClient.from_transport.return_value = mock_sftp
 
-        client = SFTPClient(host="localhost", port=22, username="user", password="pass")
+        client = SFTPClient(host="localhost", port=22, username="user", password="pass", connect_timeout=5, read_timeout=30)
         client.connect()
 
-        mock_paramiko.Transport.assert_called_once_with(("localhost", 22))
+        create_connection.assert_called_once_with(("localhost", 22), timeout=5)
+        mock_paramiko.Transport.assert_called_once_with(create_connection.return_value)
+        assert (mock_transport.banner_timeout, mock_transport.auth_timeout) == (5, 5)
         mock_transport.connect.assert_called_once_with(username="user", password="pass")
         mock_paramiko.SFTPClient.from_transport.assert_called_once_with(mock_transport)
+        mock_sftp.get_channel.return_value.settimeout.assert_called_once_with(30)
 
     @patch("apps.integrations.sftp_client.paramiko")
-    def test_disconnect_closes_connections(self, mock_paramiko):
+    def test_disconnect_closes_connections(self, mock_paramiko, settings):
+        settings.SFTP_POOL_IDLE_SECONDS = 0
         mock_transport = MagicMock()
         mock_sftp = MagicMock()
         mock_paramiko.Transport.return_value = mock_transport
@@ -43,7 +65,8 @@ class TestSFTPClient:
         mock_transport.close.assert_called_once()
 
     @patch("apps.integrations.sftp_client.paramiko")
-    def test_context_manager(self, mock_paramiko):
+    def test_context_manager(self, mock_paramiko, settings):
+        settings.SFTP_POOL_IDLE_SECONDS = 0
         mock_transport = MagicMock()
         mock_sftp = MagicMock()
         mock_paramiko.Transport.return_value = mock_transport
@@ -56,16 +79,79 @@ class TestSFTPClient:
         mock_transport.close.assert_called_once()
 
     @patch("apps.integrations.sftp_client.paramiko")
-    def test_list_files_returns_csv_only(self, mock_paramiko):
+    def test_pool_reuses_transport_until_idle(self, mock_paramiko, settings):
+        settings.SFTP_POOL_IDLE_SECONDS = 300
+        transport = MagicMock()
+        mock_paramiko.Transport.return_value = transport
+
+        with SFTPClient(host="localhost", port=22, username="user", password="pass"):
+            with SFTPClient(host="localhost", port=22, username="user", password="pass"):
+                pass
+        with SFTPClient(host="localhost", port=22, username="user", password="pass"):
+            pass
+
+        mock_paramiko.Transport.assert_called_once()  # one handshake and login for all three
+        transport.set_keepalive.assert_called_once_with(settings.SFTP_KEEPALIVE_SECONDS)
+        assert mock_paramiko.SFTPClient.from_transport.call_count == 3
+        transport.close.assert_not_called()
+
+        settings.SFTP_POOL_IDLE_SECONDS = 0
+        with SFTPClient(host="localhost", port=22, username="other", password="pass"):
+            pass
+        transport.close.assert_called()  # both idle transports evicted
+
+    @patch("apps.integrations.sftp_client.paramiko")
+    def test_pool_replaces_broken_transport(self, mock_paramiko):
+        stale, fresh = MagicMock(), MagicMock()
+        mock_paramiko.Transport.side_effect = [stale, fresh]
+        mock_paramiko.SSHException = Exception
+
+        with SFTPClient(host="localhost", port=22, username="user", password="pass"):
+            pass
+        stale.send_ignore.side_effect = EOFError
+        with SFTPClient(host="localhost", port=22, username="user", password="pass") as client:
+            assert client._transport is fresh
+
+        stale.close.assert_called_once()
+        fresh.close.assert_not_called()
+
+    @patch("apps.integrations.sftp_client.paramiko")
+    def test_download_files_over_parallel_channels(self, mock_paramiko):
+        channels = [MagicMock() for _ in range(4)]
+        mock_paramiko.SFTPClient.from_transport.side_effect = channels
+        mock_paramiko.Transport.return_value = MagicMock()
+
+        with SFTPClient(host="localhost", port=22, username="user", password="pass") as client:
+            downloads = list(client.download_files([f"/upload/{i}.csv" for i in range(5)], channels=3))
+        for _, local, _ in downloads:
+            os.unlink(local)
+
+        assert sorted(remote for remote, _, _ in downloads) == [f"/upload/{i}.csv" for i in range(5)]
+        assert all(local.endswith(remote.rsplit("/", 1)[1]) for remote, local, _ in downloads)
+        channels[0].get.assert_not_called()  # the client's own channel stays free
+        assert sum(channel.get.call_count for channel in channels[1:]) == 5
+        assert all(channel.close.called for channel in channels)
+        mock_paramiko.Transport.assert_called_once()
+
+    @patch("apps.integrations.sftp_client.paramiko")
+    def test_list_files_returns_import_files_only(self, mock_paramiko):
         mock_sftp = MagicMock()
-        mock_sftp.listdir.return_value = ["data.csv", "readme.txt", "import.csv", "photo.jpg"]
+        mock_sftp.listdir.return_value = [
+            "data.csv",
+            "readme.txt",
+            "import.CSV.gz",
+            "photo.jpg",
+            "big.zip",
+            "p.parquet",
+            "x.gz",
+        ]
         mock_paramiko.Transport.return_value = MagicMock()
         mock_paramiko.SFTPClient.from_transport.return_value = mock_sftp
 
         with SFTPClient(host="localhost", port=22, username="user", password="pass") as client:
             files = client.list_files("/upload")
 
-        assert files == ["data.csv", "import.csv"]
+        assert files == ["data.csv", "import.CSV.gz", "big.zip", "p.parquet"]
 
     @patch("apps.integrations.sftp_client.paramiko")
     def test_list_files_empty_dir(self, mock_paramiko):
@@ -99,8 +185,11 @@ class TestSFTPClient:
 
         with SFTPClient(host="localhost", port=22, username="user", password="pass") as client:
             local_path = client.download_file("/upload/test.csv")
+        os.unlink(local_path)
 
         assert local_path.endswith("test.csv")
+        # A plain temporary file, which unlinking leaves nothing behind of
+        assert os.path.dirname(local_path) == tempfile.gettempdir()
         mock_sftp.get.assert_called_once()
 
     @patch("apps.integrations.sftp_client.paramiko")
@@ -115,3 +204,339 @@ class TestSFTPClient:
 
         mock_sftp.mkdir.assert_called_once_with("/upload/processed")
         mock_sftp.rename.assert_called_once_with("/upload/test.csv", "/upload/processed/test.csv")
+
+
+class LocalSFTP:
+    """Stands in for paramiko.SFTPClient: serves local files and records every readv() window."""
+
+    def __init__(self):
+        self.windows = []
+
+    def open(self, path, mode="r"):
+        return LocalSFTPFile(path, self.windows)
+
+
+class LocalSFTPFile:
+    def __init__(self, path, windows):
+        self._file = open(path, "rb")  # noqa: SIM115
+        self._windows = windows
+        self.closed = False
+
+    def stat(self):
+        return os.stat(self._file.name)
+
+    def readv(self, chunks):
+        self._windows.append(sum(size for _, size in chunks))
+        for offset, size in chunks:
+            self._file.seek(offset)
+            yield self._file.read(size)
+
+    def close(self):
+        self._file.close()
+        self.closed = True
+
+
+def _write(content: bytes, suffix: str = ".csv") -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    return path
+
+
+def _rows(refs: list[str], amount: str = "100.00") -> str:
+    return "".join(f"{ref},Person {ref},1234,,,{amount},2024-01-15,Bank,medical\n" for ref in refs)
+
+
+class TestRemoteFile:
+    def test_reads_in_bounded_growing_windows(self, settings):
+        settings.SFTP_STREAM_WINDOW_BYTES = 4 * READ_REQUEST_BYTES
+        content = os.urandom(20 * READ_REQUEST_BYTES + 123)
+        path = _write(content)
+        sftp = LocalSFTP()
+
+        with RemoteFile(sftp, path).open() as f:
+            assert f.read(10) == content[:10]
+            assert f.read() == content[10:]
+
+        blocks = [1, 2, 4, 4, 4, 4]  # then what's left: 1 block and 123 bytes
+        assert sftp.windows == [n * READ_REQUEST_BYTES for n in blocks] + [READ_REQUEST_BYTES + 123]
+        os.unlink(path)
+
+    def test_seek_and_close(self, settings):
+        settings.SFTP_STREAM_WINDOW_BYTES = READ_REQUEST_BYTES
+        content = b"".join(f"line {i}\n".encode() for i in range(20000))
+        path = _write(content)
+        sftp = LocalSFTP()
+        remote = RemoteFile(sftp, path)
+
+        f = remote.open()
+        f.seek(100000)
+        assert f.readline() == content[100000:].split(b"\n")[0] + b"\n"
+        assert f.tell() == content.index(b"\n", 100000) + 1
+        f.close()
+        assert f.raw.closed
+        assert str(remote) == f"sftp:{path}"
+        os.unlink(path)
+
+
+@pytest.mark.django_db
+class TestStreamedImport:
+    @pytest.mark.parametrize("policy", ["first", "last"])
+    def test_streamed_import_matches_downloaded(self, monkeypatch, settings, policy):
+        """Read once, batch by batch, a file still imports like its local copy, duplicates included."""
+        monkeypatch.setattr("apps.integrations.importers.BATCH_SIZE", 3)
+        settings.SFTP_IMPORT_DUPLICATE_POLICY = policy
+        content = HEADER + _rows(["A", "B", "A", "C", "B"]) + _rows(["D", "E", "A"], amount="250.00")
+        results = []
+        for source in ("local", "remote"):
+            agency = AgencyFactory()
+            job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="accounts.csv.gz")
+            path = _write(gzip.compress(content.encode()), ".csv.gz")
+            file_path = path if source == "local" else RemoteFile(LocalSFTP(), path)
+
+            result = BatchImporter(agency, job).import_file(file_path)
+
+            balances = dict(Account.objects.filter(agency=agency).values_list("external_ref", "original_amount"))
+            results.append((result.status, result.total_records, balances, bool(result.file_hash)))
+            os.unlink(path)
+
+        assert results[0][:3] == results[1][:3]
+        assert sorted(results[1][2]) == ["A", "B", "C", "D", "E"]
+        assert str(results[1][2]["A"]) == ("100.00" if policy == "first" else "250.00")
+        assert (results[0][3], results[1][3]) == (True, False)  # not hashed: that would take a second read
+
+    def test_copy_engine_streams(self):
+        agency = AgencyFactory()
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="accounts.csv")
+        path = _write((HEADER + _rows(["A", "B"]) + _rows(["C"], amount="-1")).encode())
+
+        result = CopyStagingImporter(agency, job).import_file(RemoteFile(LocalSFTP(), path))
+
+        assert (result.total_records, result.processed_ok, result.processed_errors) == (3, 2, 1)
+        os.unlink(path)
+
+    def test_interrupted_stream_continues_from_local_copy(self, monkeypatch):
+        from celery.exceptions import SoftTimeLimitExceeded
+
+        from config.celery import app
+        from tasks.sftp_tasks import stream_import_file
+
+        monkeypatch.setattr("apps.integrations.importers.BATCH_SIZE", 2)
+        original = BatchImporter._import_chunk
+        calls = []
+
+        def interrupted(importer, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:  # the stream's second batch
+                raise SoftTimeLimitExceeded()
+            return original(importer, *args, **kwargs)
+
+        monkeypatch.setattr(BatchImporter, "_import_chunk", interrupted)
+
+        agency = AgencyFactory()
+        path = _write((HEADER + _rows(["A", "B", "C", "D", "E"])).encode())
+        client = MagicMock()
+        client.__enter__.return_value = client
+        client.open_file.side_effect = lambda remote_path: RemoteFile(LocalSFTP(), remote_path)
+        client.download_file.side_effect = lambda remote_path: shutil.copy(remote_path, path + ".local")
+        monkeypatch.setattr("tasks.sftp_tasks._sftp_client", lambda sftp_config: client)
+
+        app.conf.task_always_eager = True
+        try:
+            stream_import_file(str(agency.id), path, "accounts.csv", "sftp.test")
+        finally:
+            app.conf.task_always_eager = False
+
+        job = SFTPImportJob.objects.get(file_name="accounts.csv")
+        assert job.status == SFTPImportJob.Status.COMPLETED
+        assert (job.total_records, job.processed_ok, job.batch_count) == (5, 5, 3)
+        assert Account.objects.count() == 5
+        client.download_file.assert_called_once_with(path)
+        assert not os.path.exists(path + ".local")
+        os.unlink(path)
+
+    def test_first_wins_past_the_seen_refs_limit_continues_from_local_copy(self, monkeypatch, settings):
+        from config.celery import app
+        from tasks.sftp_tasks import stream_import_file
+
+        monkeypatch.setattr("apps.integrations.importers.BATCH_SIZE", 2)
+        settings.SFTP_IMPORT_DUPLICATE_POLICY = "first"
+        settings.SFTP_STREAM_MAX_SEEN_REFS = 3
+        agency = AgencyFactory()
+        path = _write((HEADER + _rows(["A", "B", "C"]) + _rows(["A"], amount="250.00") + _rows(["D"])).encode())
+        client = MagicMock()
+        client.__enter__.return_value = client
+        client.open_file.side_effect = lambda remote_path: RemoteFile(LocalSFTP(), remote_path)
+        client.download_file.side_effect = lambda remote_path: shutil.copy(remote_path, path + ".local")
+        monkeypatch.setattr("tasks.sftp_tasks._sftp_client", lambda sftp_config: client)
+
+        app.conf.task_always_eager = True
+        try:
+            stream_import_file(str(agency.id), path, "accounts.csv", "sftp.test")
+        finally:
+            app.conf.task_always_eager = False
+
+        job = SFTPImportJob.objects.get(file_name="accounts.csv")
+        assert (job.status, job.total_records, job.processed_ok, job.duplicate_records) == ("completed", 5, 4, 1)
+        assert str(Account.objects.get(external_ref="A").original_amount) == "100.00"
+        client.download_file.assert_called_once_with(path)
+        os.unlink(path)
+
+    def test_poll_claims_streamable_files(self, monkeypatch):
+        from tasks import sftp_tasks
+
+        agency = AgencyFactory(settings={"sftp": {"enabled": True, "stream": True, "remote_dir": "/in"}})
+        client = MagicMock()
+        client.__enter__.return_value = client
+        client.list_entries.return_value = {"a.csv": (10, 1700000000), "b.zip": (4, 1700000000)}
+        downloaded_path = _write(b"PK\x03\x04", ".zip")
+        client.download_files.side_effect = lambda paths: [(path, downloaded_path, 0.5) for path in paths]
+        monkeypatch.setattr(sftp_tasks, "_sftp_client", lambda sftp_config: client)
+        streamed, downloaded = MagicMock(), MagicMock()
+        monkeypatch.setattr(sftp_tasks.stream_import_file, "delay", streamed)
+        monkeypatch.setattr(sftp_tasks.process_import_file, "delay", downloaded)
+
+        assert sftp_tasks._poll_agency(agency, agency.settings["sftp"]) == []  # not known to be stable yet
+        assert sftp_tasks._poll_agency(agency, agency.settings["sftp"]) == ["a.csv", "b.zip"]
+
+        streamed.assert_called_once_with(str(agency.id), "/in/processed/a.csv", "a.csv", "localhost")
+        client.download_files.assert_called_with(["/in/b.zip"])
+        file_key, file_hash = file_store.stage(_write(b"PK\x03\x04", ".zip"), str(agency.id))
+        downloaded.assert_called_once_with(
+            str(agency.id), file_key, "b.zip", "localhost", download_seconds=0.5, file_hash=file_hash
+        )
+        assert not os.path.exists(downloaded_path)  # the staged copy replaces it
+
+
+@pytest.mark.django_db
+class TestRemoteFileManifest:
+    def test_files_are_ready_once_stable_and_imported_once(self):
+        agency = AgencyFactory()
+
+        def observe(listing):
+            return RemoteFileEntry.observe(agency, "/in", listing)
+
+        assert observe({"a.csv": (100, 1), "b.csv": (50, 1)}) == []
+        # a.csv unchanged; b.csv still growing; c.csv new
+        assert observe({"a.csv": (100, 1), "b.csv": (80, 2), "c.csv": (10, 2)}) == ["a.csv"]
+        RemoteFileEntry.mark_imported(agency, "/in", "a.csv")
+        assert observe({"a.csv": (100, 1), "b.csv": (80, 2), "c.csv": (10, 2)}) == ["b.csv", "c.csv"]
+        RemoteFileEntry.mark_imported(agency, "/in", "b.csv")
+        RemoteFileEntry.mark_imported(agency, "/in", "c.csv")
+
+        # a.csv is replaced by a new version; c.csv was moved away
+        assert observe({"a.csv": (120, 3), "b.csv": (80, 2)}) == []
+        assert observe({"a.csv": (120, 3), "b.csv": (80, 2)}) == ["a.csv"]
+        assert set(RemoteFileEntry.objects.values_list("name", flat=True)) == {"a.csv", "b.csv"}
+        assert observe({}) == []
+        assert not RemoteFileEntry.objects.exists()
+
+    def test_files_reported_complete_are_ready_when_first_seen(self):
+        agency = AgencyFactory()
+        RemoteFileEntry.observe(agency, "/in", {"old.csv": (5, 1)})
+        RemoteFileEntry.mark_imported(agency, "/in", "old.csv")
+
+        listing = {"old.csv": (5, 1), "new.csv": (10, 2), "other.csv": (3, 2)}
+        ready = RemoteFileEntry.observe(agency, "/in", listing, complete=["old.csv", "new.csv"])
+
+        assert ready == ["new.csv"]  # other.csv waits for the next poll, old.csv was imported
+
+    def test_poll_agency_takes_the_notified_file_now(self, monkeypatch):
+        from tasks import sftp_tasks
+
+        agency = AgencyFactory(settings={"sftp": {"enabled": True, "remote_dir": "/in"}})
+        client = MagicMock()
+        client.__enter__.return_value = client
+        client.list_entries.return_value = {"a.csv": (10, 1700000000), "b.csv": (4, 1700000000)}
+        client.download_files.side_effect = lambda paths: [(path, _write(b"x", ".csv"), 0.1) for path in paths]
+        monkeypatch.setattr(sftp_tasks, "_sftp_client", lambda sftp_config: client)
+        monkeypatch.setattr(sftp_tasks.process_import_file, "delay", MagicMock())
+
+        result = sftp_tasks.sftp_poll_agency(str(agency.id), ["a.csv"])
+
+        assert result == {"agency": str(agency.id), "files": ["a.csv"]}
+        client.download_files.assert_called_once_with(["/in/a.csv"])
+        assert RemoteFileEntry.objects.get(name="b.csv").status == RemoteFileEntry.Status.SEEN
+
+    @patch("apps.integrations.sftp_client.socket.create_connection")
+    @patch("apps.integrations.sftp_client.paramiko")
+    def test_list_entries_uses_one_listdir_attr(self, mock_paramiko, create_connection):
+        import stat
+
+        mock_sftp = MagicMock()
+        mock_sftp.listdir_attr.return_value = [
+            MagicMock(filename="a.csv", st_size=10, st_mtime=5, st_mode=stat.S_IFREG),
+            MagicMock(filename="dir.csv", st_size=0, st_mtime=5, st_mode=stat.S_IFDIR),
+            MagicMock(filename="notes.txt", st_size=3, st_mtime=5, st_mode=stat.S_IFREG),
+        ]
+        mock_paramiko.SFTPClient.from_transport.return_value = mock_sftp
+
+        with SFTPClient(host="localhost", port=22, username="user", password="pass") as client:
+            assert client.list_entries("/in") == {"a.csv": (10, 5)}
+        pool.close_all()
+
+        mock_sftp.listdir_attr.assert_called_once_with("/in")
+        mock_sftp.stat.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestPollAllAgencies:
+    def test_polls_concurrently_within_limits(self, monkeypatch, settings):
+        import threading
+        import time
+
+        from tasks import sftp_tasks
+
+        settings.SFTP_POLL_CONCURRENCY = 3
+        settings.SFTP_POLL_PER_HOST = 2
+        hosts = ["a.example.com"] * 4 + ["b.example.com"] * 4
+        agencies = [
+            AgencyFactory(name=f"Agency {i}", settings={"sftp": {"enabled": True, "host": host}})
+            for i, host in enumerate(hosts)
+        ]
+        AgencyFactory(name="No SFTP")
+        lock = threading.Lock()
+        running, peaks = [], {"all": 0, "a.example.com": 0, "b.example.com": 0}
+
+        def poll(agency, sftp_config):
+            with lock:
+                running.append(sftp_config["host"])
+                peaks["all"] = max(peaks["all"], len(running))
+                peaks[sftp_config["host"]] = max(peaks[sftp_config["host"]], running.count(sftp_config["host"]))
+            time.sleep(0.05)
+            with lock:
+                running.remove(sftp_config["host"])
+            if agency.name == "Agency 5":
+                raise ConnectionError("timed out")
+            return [f"{agency.name}.csv"]
+
+        monkeypatch.setattr(sftp_tasks, "_poll_agency", poll)
+        started = time.perf_counter()
+
+        result = sftp_tasks.sftp_poll_all_agencies()
+
+        assert time.perf_counter() - started < 8 * 0.05
+        assert peaks == {"all": 3, "a.example.com": 2, "b.example.com": 2}
+        assert result["polled"] == 8
+        expected = [{"agency": str(agency.id), "files": [f"{agency.name}.csv"]} for agency in agencies]
+        expected[5] = {"agency": str(agencies[5].id), "error": "timed out"}
+        assert sorted(result["results"], key=str) == sorted(expected, key=str)
+
+    def test_agency_already_being_polled_is_skipped(self, monkeypatch):
+        from django.core.cache import cache
+
+        from apps.integrations.leases import Lease, agency_poll
+        from tasks import sftp_tasks
+
+        busy = AgencyFactory(settings={"sftp": {"enabled": True, "host": "a.example.com"}})
+        idle = AgencyFactory(settings={"sftp": {"enabled": True, "host": "a.example.com"}})
+        assert Lease(agency_poll(busy.id), "other-task").acquire()
+        polled = []
+        monkeypatch.setattr(sftp_tasks, "_poll_agency", lambda agency, sftp_config: polled.append(agency.id) or [])
+
+        result = sftp_tasks.sftp_poll_all_agencies()
+
+        assert polled == [idle.id]
+        assert {"agency": str(busy.id), "in_progress": "other-task"} in result["results"]
+        assert Lease(agency_poll(idle.id), "").holder() is None  # released after the poll
+        cache.delete(Lease(agency_poll(busy.id), "").key)
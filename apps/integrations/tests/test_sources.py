@@ -0,0 +1,163 @@
+"""Tests for compressed and Parquet import sources."""
+import gzip
+import os
+import tempfile
+import zipfile
+from decimal import Decimal
+
+import pytest
+
+from apps.accounts.models import Account
+from apps.accounts.tests.factories import AgencyFactory
+from apps.integrations.importers import BatchImporter
+from apps.integrations.models import SFTPImportJob
+from apps.integrations.parsers import CSVParser
+from apps.integrations.sources import CSV, GZIP, PARQUET, ZIP, detect_format, iter_rows
+from apps.integrations.staging import CopyStagingImporter
+
+HEADER = "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type\n"
+CONTENT = HEADER + "".join(
+    f"ACC-{i:03d},Person {i},1234,p{i}@email.com,555-0100,{'-5' if i == 3 else '100.00'},2024-01-15,Bank,medical\n"
+    for i in range(10)
+)
+
+
+def _write(content: bytes, suffix: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    return path
+
+
+def _gzip(content: str) -> str:
+    return _write(gzip.compress(content.encode()), ".csv.gz")
+
+
+def _zip(members: dict[str, str]) -> str:
+    fd, path = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return path
+
+
+def _parse(path: str, **kwargs) -> tuple[list, list]:
+    records, errors = [], []
+    for chunk_records, chunk_errors in CSVParser().iter_chunks(path, **kwargs):
+        records.extend((line, record.model_dump(mode="json")) for line, record in chunk_records)
+        errors.extend((error["line"], error["error"]) for error in chunk_errors)
+    return records, errors
+
+
+class TestSources:
+    def test_detect_format(self):
+        paths = {
+            CSV: _write(CONTENT.encode(), ".csv"),
+            GZIP: _gzip(CONTENT),
+            ZIP: _zip({"accounts.csv": CONTENT}),
+        }
+        for file_format, path in paths.items():
+            assert detect_format(path) == file_format
+            os.unlink(path)
+
+    @pytest.mark.parametrize("validator", ["pydantic", "columnar"])
+    def test_compressed_csv_parses_like_plain(self, settings, validator):
+        settings.SFTP_IMPORT_VALIDATOR = validator
+        plain = _write(CONTENT.encode(), ".csv")
+        compressed = [_gzip(CONTENT), _zip({"export/accounts.csv": CONTENT, "export/": ""})]
+
+        expected = _parse(plain, chunk_size=4)
+        for path in compressed:
+            assert _parse(path, chunk_size=4) == expected
+            assert list(iter_rows(path)) == list(iter_rows(plain))
+            os.unlink(path)
+        assert len(expected[0]) == 9
+        os.unlink(plain)
+
+    def test_zip_needs_exactly_one_csv(self):
+        path = _zip({"a.csv": CONTENT, "b.csv": CONTENT})
+
+        with pytest.raises(ValueError, match="exactly one .csv"):
+            list(iter_rows(path))
+        os.unlink(path)
+
+
+@pytest.mark.django_db
+class TestCompressedImports:
+    def test_gzip_import_resumes_from_checkpoint(self, monkeypatch):
+        """Checkpoint offsets refer to the decompressed CSV, so a gzip import resumes mid-file."""
+        monkeypatch.setattr("apps.integrations.importers.BATCH_SIZE", 4)
+        agency = AgencyFactory()
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="accounts.csv.gz")
+        path = _gzip(CONTENT)
+        parser = CSVParser()
+        chunks = parser.iter_chunks(path, chunk_size=4)
+        next(chunks)
+        SFTPImportJob.objects.filter(pk=job.pk).update(
+            checkpoint_offset=parser.offset, checkpoint_line=parser.next_line - 1, total_records=4, processed_ok=3
+        )
+        job.refresh_from_db()
+
+        result = BatchImporter(agency, job).import_file(path)
+
+        assert (result.total_records, result.processed_ok, result.processed_errors) == (10, 9, 0)
+        assert sorted(Account.objects.values_list("external_ref", flat=True)) == [f"ACC-{i:03d}" for i in range(4, 10)]
+        os.unlink(path)
+
+    def test_copy_engine_reads_zip(self):
+        agency = AgencyFactory()
+        job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name="accounts.zip")
+        path = _zip({"accounts.csv": CONTENT})
+
+        result = CopyStagingImporter(agency, job).import_file(path)
+
+        assert (result.total_records, result.processed_ok) == (10, 9)
+        assert list(result.errors.values_list("line", flat=True)) == [5]
+        os.unlink(path)
+
+
+class TestParquet:
+    @pytest.fixture
+    def parquet_path(self):
+        pa = pytest.importorskip("pyarrow")
+        pq = pytest.importorskip("pyarrow.parquet")
+        import datetime
+
+        table = pa.table(
+            {
+                "external_ref": [f"ACC-{i:03d}" for i in range(10)],
+                "debtor_name": [f"Person {i}" for i in range(10)],
+                "original_amount": [Decimal("-5") if i == 3 else Decimal("100.50") for i in range(10)],
+                "due_date": [datetime.date(2024, 1, 15)] * 9 + [None],
+            }
+        )
+        fd, path = tempfile.mkstemp(suffix=".parquet")
+        os.close(fd)
+        pq.write_table(table, path, row_group_size=3)
+        yield path
+        os.unlink(path)
+
+    def test_detect_format(self, parquet_path):
+        assert detect_format(parquet_path) == PARQUET
+
+    @pytest.mark.parametrize("validator", ["pydantic", "columnar"])
+    def test_parquet_rows_validate_like_csv(self, settings, parquet_path, validator):
+        settings.SFTP_IMPORT_VALIDATOR = validator
+
+        records, errors = _parse(parquet_path, chunk_size=4)
+
+        assert [line for line, _ in records] == [2, 3, 4, 6, 7, 8, 9, 10, 11]
+        assert records[0][1]["original_amount"] == "100.50"
+        assert records[0][1]["due_date"] == "2024-01-15"
+        assert records[-1][1]["due_date"] == ""
+        assert [line for line, _ in errors] == [5]
+
+    def test_parquet_resumes_from_record_offset(self, parquet_path):
+        parser = CSVParser()
+        chunks = parser.iter_chunks(parquet_path, chunk_size=4)
+        next(chunks)
+
+        records, _ = _parse(parquet_path, start=parser.offset, first_line=parser.next_line)
+
+        assert [line for line, _ in records] == [6, 7, 8, 9, 10, 11]
@@ -0,0 +1,200 @@
+"""Tests for the COPY staging import engine."""
+import os
+import tempfile
+from decimal import Decimal
+
+import pytest
+
+from apps.accounts.models import Account, Activity, Debtor
+from apps.accounts.tests.factories import AgencyFactory
+from apps.audit.models import AuditLog
+from apps.integrations.importers import BatchImporter
+from apps.integrations.models import ImportRowError, SFTPImportJob
+from apps.integrations.staging import CopyStagingImporter
+
+HEADER = "external_ref,debtor_name,debtor_ssn_last4,debtor_email,debtor_phone,original_amount,due_date,creditor_name,account_type\n"
+
+
+def _write_csv(content: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    return path
+
+
+def _import(importer_class, content: str, file_name: str = "test.csv", agency=None) -> SFTPImportJob:
+    agency = agency or AgencyFactory()
+    job = SFTPImportJob.objects.create(agency=agency, source_host="test", file_name=file_name)
+    path = _write_csv(content)
+    try:
+        return importer_class(agency, job).import_file(path)
+    finally:
+        os.unlink(path)
+
+
+@pytest.mark.django_db
+class TestCopyStagingImporter:
+    def test_import_valid_file(self):
+        result = _import(
+            CopyStagingImporter,
+            HEADER
+            + "ACC-001,John Doe,1234,john@email.com,555-0100,1500.00,2024-01-15,Hospital X,medical\n"
+            + "ACC-002,Jane Smith,5678,jane@email.com,555-0200,3200.50,2024-02-20,Bank Y,credit_card\n",
+        )
+
+        assert result.status == SFTPImportJob.Status.COMPLETED
+        assert result.total_records == 2
+        assert result.processed_ok == 2
+        assert result.processed_errors == 0
+        assert Debtor.objects.get(external_ref="ACC-002").full_name == "Jane Smith"
+        account = Account.objects.get(external_ref="ACC-002")
+        assert account.agency == result.agency
+        assert account.current_balance == Decimal("3200.50")
+        assert Activity.objects.filter(activity_type=Activity.ActivityType.IMPORT).count() == 2
+        assert AuditLog.objects.filter(object_id=account.pk, action=AuditLog.Action.CREATE).exists()
+
+    def test_errors_match_batch_importer(self):
+        """Invalid rows are reported on the same lines as the Pydantic path."""
+        content = (
+            HEADER
+            + "ACC-001,John Doe,1234,john@email.com,555-0100,1500.00,2024-01-15,Hospital,medical\n"
+            + "ACC-002,,5678,jane@email.com,555-0200,100,2024-01-15,Bank,credit_card\n"
+            + "ACC-003,Bob,12a4,bob@email.com,555-0300,100,2024-01-15,Bank,credit_card\n"
+            + "ACC-004,Ann,1234,ann-at-email.com,555-0400,100,2024-01-15,Bank,credit_card\n"
+            + "ACC-005,Tom,1234,tom@email.com,555-0500,-3,2024-01-15,Bank,credit_card\n"
+            + "ACC-006,Sue,1234,sue@email.com,555-0600,abc,2024-01-15,Bank,credit_card\n"
+            + "ACC-007,Max,1234,max@email.com,555-0700,100,01/15/2024,Bank,credit_card\n"
+            + "ACC-008,Lee,1234,lee@email.com,555555555555555555555555,100,2024-01-15,Bank,credit_card\n"
+            + "ACC-009,Kim,1234\n"
+            + "ACC-010,Ray,1234,ray@email.com,555-1000,250.75,,Bank,credit_card\n"
+        )
+        copy_job = _import(CopyStagingImporter, content)
+        copy_lines = list(copy_job.errors.values_list("line", flat=True))
+        Activity.objects.all().delete()
+        Account.objects.all().delete()
+        Debtor.objects.all().delete()
+        batch_job = _import(BatchImporter, content)
+        batch_lines = list(batch_job.errors.values_list("line", flat=True))
+
+        assert copy_lines == batch_lines == [3, 4, 5, 6, 7, 8, 9, 10]
+        assert copy_job.processed_ok == batch_job.processed_ok == 2
+        first_error = copy_job.errors.first()
+        assert first_error.data["external_ref"] == "ACC-002"
+        assert first_error.error_type == ImportRowError.ErrorType.VALIDATION
+
+    def test_blank_lines_and_extra_fields_match_batch_importer(self):
+        content = (
+            HEADER
+            + "ACC-001,John Doe,1234,john@email.com,555-0100,1500.00,2024-01-15,Hospital,medical\n"
+            + "\n"
+            + "ACC-002,Jane,5678,jane@email.com,555-0200,100,2024-01-15,Bank,credit_card\n"
+            + "ACC-003,Bob,1234,bob@email.com,555-0300,100,2024-01-15,Bank,credit_card,extra\n"
+            + "ACC-004,,1234,ann@email.com,555-0400,100,2024-01-15,Bank,credit_card\n"
+            + "\n"
+        )
+        results = []
+        for importer_class in (CopyStagingImporter, BatchImporter):
+            job = _import(importer_class, content)
+            lines = list(job.errors.order_by("line").values_list("line", flat=True))
+            results.append((job.total_records, job.processed_ok, job.processed_errors, lines))
+            Activity.objects.all().delete()
+            Account.objects.all().delete()
+            Debtor.objects.all().delete()
+
+        assert results[0] == results[1] == (4, 2, 2, [4, 5])
+
+    def test_reimport_updates_without_duplicating(self):
+        agency = AgencyFactory()
+        _import(CopyStagingImporter, HEADER + "ACC-001,John Doe,1234,,,1500.00,,,\n", agency=agency)
+        account = Account.objects.get(external_ref="ACC-001")
+        Account.objects.filter(pk=account.pk).update(status=Account.Status.IN_CONTACT)
+
+        result = _import(CopyStagingImporter, HEADER + "ACC-001,John D. Doe,1234,,,1750.00,,,\n", agency=agency)
+
+        assert result.processed_ok == 1
+        assert Debtor.objects.get().full_name == "John D. Doe"
+        account.refresh_from_db()
+        assert account.status == Account.Status.IN_CONTACT
+        assert account.original_amount == Decimal("1750.00")
+        assert Activity.objects.filter(account=account).count() == 1
+        update = AuditLog.objects.get(object_id=account.pk, action=AuditLog.Action.UPDATE)
+        assert update.changes["original_amount"] == {"old": "1500.00", "new": "1750.00"}
+
+    @pytest.mark.parametrize("importer_class", [BatchImporter, CopyStagingImporter])
+    def test_invalid_last_occurrence_does_not_supersede(self, importer_class):
+        result = _import(
+            importer_class,
+            HEADER + "ACC-001,First,1234,,,100.00,,,\n" + "ACC-001,Second,1234,,,-1,,,\n",
+        )
+
+        assert (result.processed_ok, result.processed_errors, result.duplicate_records) == (1, 1, 0)
+        assert Account.objects.get().original_amount == Decimal("100.00")
+
+    def test_batch_reimport_after_copy_import_is_not_skipped(self):
+        """A COPY import drops the fingerprints it outdates, so re-importing the older values rewrites them."""
+        agency = AgencyFactory()
+        original = HEADER + "ACC-001,John Doe,1234,,,100.00,,,\n" + "ACC-002,Jane Roe,1234,,,200.00,,,\n"
+        _import(BatchImporter, original, agency=agency)
+        copy = _import(CopyStagingImporter, HEADER + "ACC-001,John Doe,1234,,,150.00,,,\n", agency=agency)
+
+        again = _import(BatchImporter, original, agency=agency)
+
+        assert copy.file_hash
+        assert (again.updated_records, again.unchanged_records) == (1, 1)
+        assert Account.objects.get(external_ref="ACC-001").original_amount == Decimal("100.00")
+
+    def test_duplicate_refs_last_row_wins(self):
+        result = _import(
+            CopyStagingImporter,
+            HEADER + "ACC-001,First,1234,,,100.00,,,\n" + "ACC-001,Second,1234,,,200.00,,,\n",
+        )
+
+        assert (result.processed_ok, result.duplicate_records) == (1, 1)
+        assert Debtor.objects.get().full_name == "Second"
+        assert Account.objects.get().original_amount == Decimal("200.00")
+
+    @pytest.mark.parametrize("importer_class", [BatchImporter, CopyStagingImporter])
+    @pytest.mark.parametrize(
+        "policy, winner, processed_ok, duplicate_lines",
+        [("first", "First", 2, []), ("last", "Third", 2, []), ("reject", None, 1, [2, 4, 5])],
+    )
+    def test_duplicate_policy(self, importer_class, policy, winner, processed_ok, duplicate_lines):
+        """Both engines resolve an external_ref repeated within the file the same way."""
+        agency = AgencyFactory(settings={"sftp": {"duplicate_policy": policy}})
+        content = (
+            HEADER
+            + "ACC-001,First,1234,,,100.00,,,\n"
+            + "ACC-002,Other,1234,,,100.00,,,\n"
+            + "ACC-001,Second,1234,,,200.00,,,\n"
+            + " ACC-001 ,Third,1234,,,300.00,,,\n"
+            + "ACC-003,Invalid,1234,,,-1,,,\n"
+        )
+
+        result = _import(importer_class, content, agency=agency)
+
+        assert (result.total_records, result.processed_ok) == (5, processed_ok)
+        assert result.duplicate_records == (len(duplicate_lines) or 2)
+        assert list(result.errors.values_list("line", "error_type")) == [
+            (line, ImportRowError.ErrorType.DUPLICATE) for line in duplicate_lines
+        ] + [(6, ImportRowError.ErrorType.VALIDATION)]
+        assert list(Debtor.objects.filter(external_ref="ACC-001").values_list("full_name", flat=True)) == (
+            [winner] if winner else []
+        )
+        assert Account.objects.count() == processed_ok
+
+    def test_missing_required_columns(self):
+        result = _import(CopyStagingImporter, "external_ref,debtor_name\nACC-001,John\n")
+
+        assert result.status == SFTPImportJob.Status.FAILED
+        assert result.errors.get().error_type == ImportRowError.ErrorType.HEADER
+        assert result.errors.get().line == 1
+        assert Account.objects.count() == 0
+
+    def test_staging_table_dropped(self):
+        from django.db import connection
+
+        result = _import(CopyStagingImporter, HEADER + "ACC-001,John Doe,1234,,,100.00,,,\n")
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [f"import_staging_{result.id.hex}"])
+            assert cursor.fetchone()[0] is None
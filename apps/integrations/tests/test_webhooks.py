@@ -0,0 +1,81 @@
+"""Tests for SFTP upload notifications."""
+import hashlib
+import hmac
+import json
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from apps.accounts.tests.factories import AgencyFactory
+from apps.integrations.webhooks import sftp_upload_notification
+
+
+def _signature(payload: bytes, secret: str, timestamp: int | None = None) -> str:
+    ts = timestamp or int(time.time())
+    sig = hmac.new(secret.encode(), f"{ts}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={ts},v1={sig}"
+
+
+def _notify(payload: bytes, signature: str):
+    request = RequestFactory().post("/api/v1/imports/notify/", data=payload, content_type="application/json")
+    request.META["HTTP_X_DEBTFLOW_SIGNATURE"] = signature
+    return sftp_upload_notification(request)
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    from tasks.sftp_tasks import sftp_poll_agency
+
+    delay = MagicMock(return_value=MagicMock(id="task-1"))
+    monkeypatch.setattr(sftp_poll_agency, "delay", delay)
+    return delay
+
+
+@pytest.mark.django_db
+class TestSFTPUploadNotification:
+    def test_signed_notification_queues_the_file(self, settings, queued):
+        settings.SFTP_NOTIFY_SECRET = "notify-secret"
+        agency = AgencyFactory(settings={"sftp": {"enabled": True, "remote_dir": "/in"}})
+        payload = json.dumps({"agency": str(agency.id), "path": "/in/urgent.csv"}).encode()
+        signature = _signature(payload, "notify-secret")
+        cache.delete(f"sftp_notify:{signature}")
+
+        response = _notify(payload, signature)
+        replay = _notify(payload, signature)
+
+        assert response.status_code == 202
+        assert json.loads(response.content) == {"status": "queued", "task_id": "task-1"}
+        queued.assert_called_once_with(str(agency.id), ["urgent.csv"])
+        assert json.loads(replay.content) == {"status": "already_queued"}
+
+    def test_agency_secret_is_required_when_set(self, settings, queued):
+        settings.SFTP_NOTIFY_SECRET = "notify-secret"
+        agency = AgencyFactory(settings={"sftp": {"enabled": True, "notify_secret": "agency-secret"}})
+        payload = json.dumps({"agency": str(agency.id), "path": "/upload/a.csv"}).encode()
+
+        assert _notify(payload, _signature(payload, "notify-secret")).status_code == 400
+        assert _notify(payload, _signature(payload, "agency-secret", int(time.time()) - 1)).status_code == 202
+
+    @pytest.mark.parametrize(
+        "timestamp_offset, path, status",
+        [(-600, "/upload/a.csv", 400), (0, "/etc/a.csv", 400), (0, "/upload/", 400)],
+    )
+    def test_rejected(self, settings, queued, timestamp_offset, path, status):
+        settings.SFTP_NOTIFY_SECRET = "notify-secret"
+        agency = AgencyFactory(settings={"sftp": {"enabled": True}})
+        payload = json.dumps({"agency": str(agency.id), "path": path}).encode()
+
+        response = _notify(payload, _signature(payload, "notify-secret", int(time.time()) + timestamp_offset))
+
+        assert response.status_code == status
+        queued.assert_not_called()
+
+    def test_agency_without_sftp_not_found(self, settings, queued):
+        settings.SFTP_NOTIFY_SECRET = "notify-secret"
+        payload = json.dumps({"agency": str(AgencyFactory().id), "path": "/upload/a.csv"}).encode()
+
+        assert _notify(payload, _signature(payload, "notify-secret")).status_code == 404
+        queued.assert_not_called()
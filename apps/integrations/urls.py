@@ -3,10 +3,13 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import ImportJobViewSet
+from .webhooks import sftp_upload_notification
 
 router = DefaultRouter()
 router.register("imports", ImportJobViewSet, basename="import-job")
 
 urlpatterns = [
+    # Before the router, whose imports/<pk>/ route would match it
+    path("imports/notify/", sftp_upload_notification, name="sftp-upload-notification"),
     path("", include(router.urls)),
 ]
@@ -0,0 +1,154 @@
+"""Columnar fast-path validation for SFTP import rows.
+
+Checks a whole chunk one column at a time instead of building a Pydantic model per
+row. The fast path only ever accepts rows ImportRecordSchema would accept; anything
+it flags is re-validated with ImportRecordSchema, so error messages are identical.
+"""
+from decimal import Decimal, InvalidOperation
+from functools import partial
+from typing import NamedTuple
+
+from .parsers import DUE_DATE_RE, ImportRecordSchema
+
+FIELDS = [
+    "external_ref",
+    "debtor_name",
+    "debtor_ssn_last4",
+    "debtor_email",
+    "debtor_phone",
+    "original_amount",
+    "due_date",
+    "creditor_name",
+    "account_type",
+]
+
+
+class ImportRecord(NamedTuple):
+    """A validated row from the columnar path — same fields and values as ImportRecordSchema."""
+
+    external_ref: str
+    debtor_name: str
+    debtor_ssn_last4: str
+    debtor_email: str
+    debtor_phone: str
+    original_amount: Decimal
+    due_date: str
+    creditor_name: str
+    account_type: str
+
+    def model_dump(self, mode: str = "python") -> dict:
+        data = self._asdict()
+        if mode == "json":
+            data["original_amount"] = str(self.original_amount)
+        return data
+
+
+# ImportRecord._make without the Python-level call per row
+_new_record = partial(tuple.__new__, ImportRecord)
+
+
+class ColumnarValidator:
+    """Validates chunks of csv.reader rows column by column.
+
+    A clean chunk is checked with one pass per column. Only when a chunk fails are
+    rows checked one at a time, and only the failing rows reach Pydantic.
+    """
+
+    def __init__(self, header: list[str]):
+        self.header = header
+        self.width = len(header)
+        # Last occurrence wins for duplicated header names, as in csv.DictReader
+        self.positions = {name: index for index, name in enumerate(header) if name in FIELDS}
+
+    def validate(self, rows: list[list[str]], first_line: int) -> tuple[list[tuple[int, ImportRecord]], list[dict]]:
+        """Validate consecutive rows starting at `first_line`. Returns (records, errors) like CSVParser."""
+        lines = range(first_line, first_line + len(rows))
+        built = self._validate_columns(rows)
+        if built is not None:
+            return list(zip(lines, built, strict=True)), []
+
+        records, errors = [], []
+        for line, row in zip(lines, rows, strict=True):
+            built = self._validate_columns([row])
+            if built is not None:
+                records.append((line, built[0]))
+                continue
+            record, error = self.validate_row(row, line)
+            if error:
+                errors.append(error)
+            else:
+                records.append((line, record))
+        return records, errors
+
+    def _validate_columns(self, rows: list[list[str]]) -> list[ImportRecord] | None:
+        """Check every row of a chunk one column at a time and build its records.
+
+        Returns None when any row might be invalid. Every check accepts a subset of
+        what ImportRecordSchema accepts, so the caller can fall back to Pydantic.
+        """
+        try:
+            columns = list(zip(*rows, strict=True))
+        except ValueError:  # ragged rows
+            return None
+        if len(columns) != self.width:
+            return None
+        size = len(rows)
+
+        def column(name: str) -> tuple:
+            position = self.positions.get(name)
+            return columns[position] if position is not None else ("",) * size
+
+        refs = column("external_ref")
+        names = column("debtor_name")
+        ssns = column("debtor_ssn_last4")
+        emails = column("debtor_email")
+        due_dates = column("due_date")
+        try:
+            amounts = list(map(Decimal, column("original_amount")))
+            # NaN compares by raising; infinity (which Pydantic rejects) would be the max
+            amounts_valid = min(amounts) > 0 and max(amounts).is_finite()
+        except InvalidOperation:
+            return None
+        valid = (
+            amounts_valid
+            and all(refs)
+            and max(map(len, refs)) <= 100
+            and all(names)
+            and all(map(str.isdigit, filter(None, ssns)))
+            and set(map(len, filter(None, ssns))) <= {4}
+            and all(not email or "@" in email for email in emails)
+            and all(map(DUE_DATE_RE.match, filter(None, set(due_dates))))
+        )
+        if not valid:
+            return None
+
+        return list(
+            map(
+                _new_record,
+                zip(
+                    map(str.strip, refs),
+                    map(str.strip, names),
+                    ssns,
+                    map(str.strip, emails),
+                    column("debtor_phone"),
+                    amounts,
+                    due_dates,
+                    column("creditor_name"),
+                    column("account_type"),
+                    strict=True,
+                ),
+            )
+        )
+
+    def validate_row(self, row: list[str], line: int) -> tuple[ImportRecordSchema | None, dict | None]:
+        """Validate one row with ImportRecordSchema, exactly as CSVParser's Pydantic path would."""
+        # Same dict csv.DictReader builds: extras under None, missing trailing fields as None
+        data = dict(zip(self.header, row, strict=False))
+        if len(row) > self.width:
+            data[None] = row[self.width :]
+        for name in self.header[len(row) :]:
+            data[name] = None
+        try:
+            return ImportRecordSchema(**data), None
+        except Exception as e:
+            return None, {"line": line, "error_type": "validation", "error": str(e), "data": data}
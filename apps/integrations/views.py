@@ -1,13 +1,47 @@
 """DRF views for SFTP import management."""
+import csv
+import json
+import os
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from apps.accounts.models import Agency
+from apps.accounts.pagination import KeysetCursorPagination
 from apps.accounts.permissions import IsAgencyAdmin
+from apps.accounts.principal import get_principal
 
+from .filters import ImportRowErrorFilter
+from .leases import POLL_ALL, Lease
 from .models import SFTPImportJob
-from .serializers import ImportErrorSerializer, SFTPImportJobDetailSerializer, SFTPImportJobSerializer
+from .serializers import (
+    ImportErrorSerializer,
+    ImportValidationSerializer,
+    SFTPImportJobDetailSerializer,
+    SFTPImportJobSerializer,
+)
+from .sources import UNREADABLE_FILE_ERRORS
+
+
+class ImportErrorPagination(KeysetCursorPagination):
+    """Keyset pagination over (line, id), served by the (job, line, id) index at any depth."""
+
+    ordering = ("line", "id")
+
+
+class _Echo:
+    """File-like object whose write() hands the row back, for streaming csv.writer output."""
+
+    def write(self, value: str) -> str:
+        return value
 
 
 class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
@@ -17,14 +51,13 @@ class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ["-created_at"]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_superuser:
+        principal = get_principal(self.request)
+        if principal.is_superuser:
             return SFTPImportJob.objects.all()
-        collector = getattr(user, "collector_profile", None)
-        if collector:
-            return SFTPImportJob.objects.filter(agency=collector.agency)
+        if principal.collector_id:
+            return SFTPImportJob.objects.filter(agency_id=principal.agency_id)
         # agency_admin without collector profile — show all jobs for their agencies
-        if user.groups.filter(name="agency_admin").exists():
+        if principal.is_agency_admin:
             return SFTPImportJob.objects.all()
         return SFTPImportJob.objects.none()
 
@@ -35,31 +68,84 @@ class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=["post"], url_path="trigger")
     def trigger(self, request):
-        """Manually trigger an SFTP import outside the normal schedule."""
+        """Manually trigger an SFTP import outside the normal schedule.
+
+        While a poll is queued or running, returns that poll's task id (200,
+        "in_progress") instead of starting another one. The queued poll's lease
+        lasts SFTP_POLL_QUEUED_LEASE_SECONDS, so it outlives a backed-up queue;
+        the poll shortens it to the usual TTL once it starts.
+        """
         from tasks.sftp_tasks import sftp_poll_all_agencies
 
-        task = sftp_poll_all_agencies.delay()
+        lease = Lease(POLL_ALL, str(uuid.uuid4()), ttl=settings.SFTP_POLL_QUEUED_LEASE_SECONDS)
+        if not lease.acquire():
+            return Response({"task_id": lease.holder(), "status": "in_progress"}, status=status.HTTP_200_OK)
+        task = sftp_poll_all_agencies.apply_async(task_id=lease.holder_id)
         return Response(
             {"task_id": task.id, "status": "triggered"},
             status=status.HTTP_202_ACCEPTED,
         )
 
+    @action(detail=False, methods=["post"], url_path="validate", parser_classes=[MultiPartParser])
+    def validate(self, request):
+        """Dry run: validate an uploaded file against the agency's accounts and report what an import would do.
+
+        Nothing is written. See importers.dry_run for the report.
+        """
+        from .importers import dry_run
+
+        serializer = ImportValidationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        principal = get_principal(request)
+        if principal.agency_id:
+            agency = Agency.objects.get(id=principal.agency_id)
+        else:
+            agency = serializer.validated_data.get("agency")
+        if agency is None:
+            raise ValidationError({"agency": ["This field is required."]})
+
+        upload = serializer.validated_data["file"]
+        # Formats are detected from content, but keep the suffix for readable logs
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(upload.name)[1])
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for block in upload.chunks():
+                    f.write(block)
+            report = dry_run(agency, path)
+        except UNREADABLE_FILE_ERRORS as e:  # corrupt or truncated file, missing pyarrow...
+            raise ValidationError({"file": [str(e)]}) from e
+        finally:
+            os.unlink(path)
+        return Response({"agency": str(agency.id), "file_name": upload.name, **report})
+
     @action(detail=True, methods=["get"], url_path="errors")
     def errors(self, request, pk=None):
-        """Paginated error list for a specific import job."""
+        """Cursor-paginated error list for a specific import job, optionally filtered by ?error_type=."""
+        errors = self._filter_errors(request, self.get_object())
+        paginator = ImportErrorPagination()
+        page = paginator.paginate_queryset(errors, request)  # not view=self: its `ordering` is for jobs
+        return paginator.get_paginated_response(ImportErrorSerializer(page, many=True).data)
+
+    @action(detail=True, methods=["get"], url_path="errors/download")
+    def download_errors(self, request, pk=None):
+        """Stream every error of a job as CSV, without loading them all into memory."""
         job = self.get_object()
-        errors = job.error_details or []
-        # Simple pagination
-        page_size = 50
-        page = int(request.query_params.get("page", 1))
-        start = (page - 1) * page_size
-        end = start + page_size
-        paginated = errors[start:end]
-        return Response(
-            {
-                "count": len(errors),
-                "page": page,
-                "page_size": page_size,
-                "results": ImportErrorSerializer(paginated, many=True).data,
-            }
-        )
+        errors = self._filter_errors(request, job).order_by("line", "id")
+        writer = csv.writer(_Echo())
+
+        def rows():
+            yield writer.writerow(["line", "error_type", "error", "data"])
+            for line, error_type, error, data in errors.values_list("line", "error_type", "error", "data").iterator(
+                chunk_size=2000
+            ):
+                yield writer.writerow([line, error_type, error, json.dumps(data)])
+
+        response = StreamingHttpResponse(rows(), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="import-{job.id}-errors.csv"'
+        return response
+
+    def _filter_errors(self, request, job):
+        filterset = ImportRowErrorFilter(request.query_params, queryset=job.errors.all())
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filterset.qs
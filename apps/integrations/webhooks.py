@@ -0,0 +1,99 @@
+"""Upload notifications from agencies' SFTP servers, so new files are imported without waiting for the next poll."""
+import hashlib
+import hmac
+import json
+import logging
+import posixpath
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from apps.accounts.models import Agency
+
+logger = logging.getLogger(__name__)
+
+# Signed notifications older (or newer) than this are refused, and a replay within it is ignored
+SIGNATURE_TOLERANCE_SECONDS = 300
+
+
+@csrf_exempt
+@require_POST
+def sftp_upload_notification(request):
+    """Receive a "file uploaded" notification and import that file now.
+
+    Sent by the agency's SFTP server (an upload hook) or a watcher next to it,
+    once a file is completely written: {"agency": <id>, "path": <remote path>}.
+
+    - Validates the HMAC-SHA256 signature (X-DebtFlow-Signature: t=<unix time>,v1=<hex>)
+      made with the agency's settings["sftp"]["notify_secret"], else SFTP_NOTIFY_SECRET
+    - Ignores replays of a notification via Redis
+    - Queues sftp_poll_agency for that agency and file; the scheduled poll still
+      picks up anything a lost notification missed
+    """
+    payload = request.body
+    try:
+        notification = json.loads(payload)
+        agency_id, path = str(notification["agency"]), str(notification["path"])
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return JsonResponse({"error": "Invalid payload"}, status=400)
+
+    agency = Agency.objects.filter(id=agency_id, is_active=True).first() if _is_uuid(agency_id) else None
+    sftp_config = agency.settings.get("sftp", {}) if agency else {}
+    secret = sftp_config.get("notify_secret") or settings.SFTP_NOTIFY_SECRET
+    sig_header = request.META.get("HTTP_X_DEBTFLOW_SIGNATURE", "")
+    if not _verify_signature(payload, sig_header, secret):
+        logger.warning("SFTP upload notification: invalid signature")
+        return JsonResponse({"error": "Invalid signature"}, status=400)
+
+    if agency is None or not sftp_config.get("enabled", False):
+        return JsonResponse({"error": "Unknown agency"}, status=404)
+    remote_dir = sftp_config.get("remote_dir", settings.SFTP_REMOTE_DIR)
+    directory, file_name = posixpath.split(path)
+    if posixpath.normpath(directory) != posixpath.normpath(remote_dir) or not file_name:
+        return JsonResponse({"error": f"Path must be a file in {remote_dir}"}, status=400)
+
+    # Idempotency: a notification can only be replayed while its timestamp is accepted
+    if not cache.add(f"sftp_notify:{sig_header}", True, timeout=2 * SIGNATURE_TOLERANCE_SECONDS):
+        logger.info("SFTP upload notification: duplicate for %s, skipping", path)
+        return JsonResponse({"status": "already_queued"})
+
+    from tasks.sftp_tasks import sftp_poll_agency
+
+    task = sftp_poll_agency.delay(str(agency.id), [file_name])
+    logger.info("SFTP upload notification: %s uploaded for agency %s, queued %s", path, agency.name, task.id)
+    return JsonResponse({"status": "queued", "task_id": task.id}, status=202)
+
+
+def _verify_signature(payload: bytes, sig_header: str, secret: str) -> bool:
+    """Verify the notification's HMAC-SHA256 signature of "<t>.<body>"."""
+    if not sig_header or not secret:
+        return False
+
+    try:
+        elements = dict(item.split("=", 1) for item in sig_header.split(","))
+        timestamp = elements.get("t", "")
+        signature = elements.get("v1", "")
+
+        if not timestamp or not signature:
+            return False
+
+        if abs(time.time() - int(timestamp)) > SIGNATURE_TOLERANCE_SECONDS:
+            return False
+
+        expected = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+    except (ValueError, KeyError):
+        return False
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
@@ -3,6 +3,7 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.local")
 
@@ -34,3 +35,17 @@ app.conf.beat_schedule = {
         "schedule": crontab(hour=2, minute=0, day_of_month="1"),
     },
 }
+
+
+@worker_process_init.connect
+def export_worker_metrics(**kwargs):
+    """Serve each worker process's Prometheus metrics (SFTP import stages...) on a port of WORKER_METRICS_PORTS.
+
+    The API's /metrics only sees metrics recorded in the API process.
+    """
+    from django.conf import settings
+    from django_prometheus.exports import SetupPrometheusEndpointOnPortRange
+
+    if settings.WORKER_METRICS_PORTS:
+        first, _, last = settings.WORKER_METRICS_PORTS.partition("-")
+        SetupPrometheusEndpointOnPortRange(range(int(first), int(last or first) + 1))
@@ -116,7 +116,7 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 # --- DRF ---
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.accounts.authentication.StatelessJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -141,6 +141,9 @@ REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "rest_framework.views.exception_handler",
 }
 
+# Seconds a request principal loaded from the database (not from token claims) is cached; see accounts.principal
+PRINCIPAL_CACHE_SECONDS = config("PRINCIPAL_CACHE_SECONDS", default=60, cast=int)
+
 # --- SimpleJWT ---
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(
@@ -153,6 +156,7 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "TOKEN_OBTAIN_SERIALIZER": "apps.accounts.auth.CustomTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "apps.accounts.auth.CustomTokenRefreshSerializer",
 }
 
 # --- DRF Spectacular ---
@@ -194,11 +198,66 @@ SFTP_PORT = config("SFTP_PORT", default=2222, cast=int)
 SFTP_USER = config("SFTP_USER", default="sftpuser")
 SFTP_PASSWORD = config("SFTP_PASSWORD", default="sftppass")
 SFTP_REMOTE_DIR = config("SFTP_REMOTE_DIR", default="/upload")
+# Seconds to wait for a server to accept, greet and authenticate us, and for any one SFTP request
+SFTP_CONNECT_TIMEOUT = config("SFTP_CONNECT_TIMEOUT", default=10, cast=float)
+SFTP_READ_TIMEOUT = config("SFTP_READ_TIMEOUT", default=60, cast=float)
+# Authenticated SSH connections are kept per worker process and reused until idle this long (0: never reused)
+SFTP_POOL_IDLE_SECONDS = config("SFTP_POOL_IDLE_SECONDS", default=300, cast=int)
+SFTP_KEEPALIVE_SECONDS = config("SFTP_KEEPALIVE_SECONDS", default=30, cast=int)
+# SFTP channels one poll downloads over in parallel, all on the same connection
+SFTP_TRANSFER_CHANNELS = config("SFTP_TRANSFER_CHANNELS", default=4, cast=int)
+# Agencies polled at once per beat cycle, and at most this many at once on the same server
+SFTP_POLL_CONCURRENCY = config("SFTP_POLL_CONCURRENCY", default=16, cast=int)
+SFTP_POLL_PER_HOST = config("SFTP_POLL_PER_HOST", default=2, cast=int)
+# TTL of the per-agency poll lease in Redis; a running poll renews it every third of that
+SFTP_POLL_LEASE_SECONDS = config("SFTP_POLL_LEASE_SECONDS", default=120, cast=int)
+# TTL of the POLL_ALL lease a manual trigger takes for the run it queues, until that run starts and renews it as above
+# (one beat interval, so a backed-up queue doesn't get a second run queued)
+SFTP_POLL_QUEUED_LEASE_SECONDS = config("SFTP_POLL_QUEUED_LEASE_SECONDS", default=900, cast=int)
+# Secret upload notifications (POST /imports/notify/) are signed with, unless the agency sets its own
+SFTP_NOTIFY_SECRET = config("SFTP_NOTIFY_SECRET", default="")
+# "batch" (Pydantic + bulk upserts) or "copy" (COPY into a staging table, merged in SQL)
+SFTP_IMPORT_ENGINE = config("SFTP_IMPORT_ENGINE", default="batch")
+# Row validation for the batch engine: "pydantic" (one model per row) or "columnar" (per chunk, same results)
+SFTP_IMPORT_VALIDATOR = config("SFTP_IMPORT_VALIDATOR", default="pydantic")
+# external_ref repeated within one file: "first" or "last" occurrence wins, or "reject" them all.
+# Agencies override it with settings["sftp"]["duplicate_policy"].
+SFTP_IMPORT_DUPLICATE_POLICY = config("SFTP_IMPORT_DUPLICATE_POLICY", default="last")
+# Bloom filter the duplicate pre-scan runs every ref through (chunking.DuplicateIndex): memory stays this size
+# whatever the file's size, and each ref the filter flags is checked exactly on a second pass
+SFTP_DUPLICATE_FILTER_BYTES = config("SFTP_DUPLICATE_FILTER_BYTES", default=8 * 1024 * 1024, cast=int)
+# Files at least this big are split into byte ranges and imported by a chord of
+# workers (batch engine only). 0 disables. Every worker must be able to read the file.
+SFTP_PARALLEL_IMPORT_MIN_BYTES = config("SFTP_PARALLEL_IMPORT_MIN_BYTES", default=0, cast=int)
+SFTP_PARALLEL_IMPORT_CHUNK_BYTES = config("SFTP_PARALLEL_IMPORT_CHUNK_BYTES", default=8 * 1024 * 1024, cast=int)
+# Import CSV and .csv.gz files straight from the SFTP server instead of downloading them first.
+# Agencies override it with settings["sftp"]["stream"]. The read-ahead buffer is at most one window.
+SFTP_STREAM_IMPORTS = config("SFTP_STREAM_IMPORTS", default=False, cast=bool)
+SFTP_STREAM_WINDOW_BYTES = config("SFTP_STREAM_WINDOW_BYTES", default=8 * 1024 * 1024, cast=int)
+# Distinct refs a streamed import under the "first" duplicate policy keeps in memory (about 100 bytes each);
+# past that it continues from a downloaded copy (chunking.StreamedDuplicates)
+SFTP_STREAM_MAX_SEEN_REFS = config("SFTP_STREAM_MAX_SEEN_REFS", default=500_000, cast=int)
+
+# Port range ("9101-9104") on which each Celery worker process serves its own Prometheus /metrics
+WORKER_METRICS_PORTS = config("WORKER_METRICS_PORTS", default="")
 
 # --- AWS S3 ---
 AWS_STORAGE_BUCKET_NAME = config("AWS_STORAGE_BUCKET_NAME", default="debtflow-files")
 AWS_S3_REGION_NAME = config("AWS_S3_REGION_NAME", default="us-east-1")
 
+# --- File storage ---
+# "imports": downloaded SFTP files, stored by content hash so any worker can import them
+# (apps/integrations/file_store.py). A local directory here; S3 in production.
+IMPORT_FILES_ROOT = config("IMPORT_FILES_ROOT", default=str(BASE_DIR / "var" / "imports"))
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    "imports": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": IMPORT_FILES_ROOT},
+    },
+}
+
 # --- Logging ---
 LOGGING = {
     "version": 1,
@@ -35,4 +35,11 @@ if SENTRY_DSN:
     )
 
 # File storage
-DEFAULT_FILE_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
+STORAGES = {
+    **STORAGES,  # noqa: F405
+    "default": {"BACKEND": "storages.backends.s3boto3.S3Boto3Storage"},
+    "imports": {
+        "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+        "OPTIONS": {"location": "imports", "file_overwrite": True},
+    },
+}
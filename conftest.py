@@ -6,6 +6,16 @@ from rest_framework.test import APIClient
 from apps.accounts.models import Agency, Collector
 
 
+def pytest_collection_modifyitems(config, items):
+    """Leave out `slow` tests (wall-clock benchmarks) unless the -m expression names them, e.g. `-m slow`."""
+    if "slow" in config.getoption("markexpr"):
+        return
+    slow = [item for item in items if "slow" in item.keywords]
+    if slow:
+        config.hook.pytest_deselected(items=slow)
+        items[:] = [item for item in items if "slow" not in item.keywords]
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -66,3 +76,16 @@ def authenticated_admin_client(api_client, admin_user):
 def authenticated_collector_client(api_client, collector_user):
     api_client.force_authenticate(user=collector_user)
     return api_client
+
+
+@pytest.fixture(autouse=True)
+def import_file_store(settings, tmp_path):
+    """Stage import files under the test's tmp_path instead of IMPORT_FILES_ROOT."""
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "imports": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": str(tmp_path / "imports")},
+        },
+    }
+    return tmp_path / "imports"
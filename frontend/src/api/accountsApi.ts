@@ -27,6 +27,28 @@ export const accountsApi = baseApi.injectEndpoints({
           : [{ type: 'Account', id: 'LIST' }],
     }),
 
+    getWorklist: builder.query<CursorPaginatedResponse<AccountListItem>, AccountFilterParams>({
+      query: (params) => ({
+        url: '/accounts/worklist/',
+        params,
+      }),
+      providesTags: (result) =>
+        result
+          ? [
+              ...result.results.map(({ id }) => ({ type: 'Account' as const, id })),
+              { type: 'Account', id: 'LIST' },
+            ]
+          : [{ type: 'Account', id: 'LIST' }],
+    }),
+
+    searchAccounts: builder.query<{ results: AccountListItem[] }, string>({
+      query: (q) => ({
+        url: '/accounts/search/',
+        params: { q },
+      }),
+      providesTags: [{ type: 'Account', id: 'LIST' }],
+    }),
+
     getAccount: builder.query<AccountDetail, string>({
       query: (id) => `/accounts/${id}/`,
       providesTags: (_result, _error, id) => [{ type: 'AccountDetail', id }],
@@ -116,6 +138,8 @@ export const accountsApi = baseApi.injectEndpoints({
 
 export const {
   useGetAccountsQuery,
+  useGetWorklistQuery,
+  useSearchAccountsQuery,
   useGetAccountQuery,
   useCreateAccountMutation,
   useUpdateAccountMutation,
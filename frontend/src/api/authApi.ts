@@ -29,10 +29,17 @@ export const authApi = baseApi.injectEndpoints({
         body,
       }),
     }),
+    logout: builder.mutation<void, { refresh: string | null }>({
+      query: (body) => ({
+        url: '/auth/logout/',
+        method: 'POST',
+        body,
+      }),
+    }),
     getMe: builder.query<UserProfile, void>({
       query: () => '/auth/me/',
     }),
   }),
 });
 
-export const { useLoginMutation, useGetMeQuery } = authApi;
+export const { useLoginMutation, useLogoutMutation, useGetMeQuery } = authApi;
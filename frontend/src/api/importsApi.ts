@@ -1,6 +1,6 @@
 import { baseApi } from './baseApi';
 import type { CursorPaginatedResponse } from '@/types/common';
-import type { ImportJob, ImportJobDetail, ImportErrorsResponse } from '@/types/importJob';
+import type { ImportJob, ImportJobDetail, ImportError, ImportErrorType } from '@/types/importJob';
 
 export const importsApi = baseApi.injectEndpoints({
   endpoints: (builder) => ({
@@ -23,10 +23,13 @@ export const importsApi = baseApi.injectEndpoints({
       providesTags: (_result, _error, id) => [{ type: 'ImportJob', id }],
     }),
 
-    getImportErrors: builder.query<ImportErrorsResponse, { id: string; page?: number }>({
-      query: ({ id, page = 1 }) => ({
+    getImportErrors: builder.query<
+      CursorPaginatedResponse<ImportError>,
+      { id: string; cursor?: string; error_type?: ImportErrorType }
+    >({
+      query: ({ id, ...params }) => ({
         url: `/imports/${id}/errors/`,
-        params: { page },
+        params,
       }),
     }),
 
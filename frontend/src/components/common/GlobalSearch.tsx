@@ -2,7 +2,7 @@ import { useState, useCallback, useRef, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Modal, Input, List, Typography, Tag } from 'antd';
 import { SearchOutlined } from '@ant-design/icons';
-import { useGetAccountsQuery } from '@/api/accountsApi';
+import { useSearchAccountsQuery } from '@/api/accountsApi';
 import { useDebounce } from '@/hooks/useDebounce';
 import { useAppDispatch, useAppSelector } from '@/store/hooks';
 import { setGlobalSearchVisible } from '@/store/uiSlice';
@@ -19,10 +19,7 @@ export function GlobalSearch() {
   const navigate = useNavigate();
   const inputRef = useRef<HTMLInputElement>(null);
 
-  const { data, isFetching } = useGetAccountsQuery(
-    { search: debouncedQuery },
-    { skip: debouncedQuery.length < 2 },
-  );
+  const { data, isFetching } = useSearchAccountsQuery(debouncedQuery, { skip: debouncedQuery.length < 2 });
 
   useEffect(() => {
     if (visible) {
@@ -58,7 +55,7 @@ export function GlobalSearch() {
         <Input
           ref={inputRef as never}
           prefix={<SearchOutlined />}
-          placeholder="Search accounts by name, ref, email..."
+          placeholder="Search accounts by name, ref, email, phone..."
           value={query}
           onChange={(e) => setQuery(e.target.value)}
           size="large"
@@ -1,19 +1,69 @@
-import { Table, Card, Typography } from 'antd';
+import { Table, Card, Typography, Button, Select, Space, Tag } from 'antd';
+import { DownloadOutlined } from '@ant-design/icons';
 import type { ColumnsType } from 'antd/es/table';
 import { useGetImportErrorsQuery } from '@/api/importsApi';
-import type { ImportError } from '@/types/importJob';
-import { useState } from 'react';
+import type { ImportError, ImportErrorType } from '@/types/importJob';
+import { useAppSelector } from '@/store/hooks';
+import { useCallback, useState } from 'react';
 
 const { Text } = Typography;
 
+const ERROR_TYPE_LABELS: Record<ImportErrorType, string> = {
+  header: 'Header',
+  validation: 'Validation',
+  database: 'Database',
+  duplicate: 'Duplicate',
+  fatal: 'Fatal',
+};
+
 interface ImportErrorListProps {
   jobId: string;
   totalErrors: number;
+  errorCounts: Partial<Record<ImportErrorType, number>>;
 }
 
-export function ImportErrorList({ jobId, totalErrors }: ImportErrorListProps) {
-  const [page, setPage] = useState(1);
-  const { data, isLoading } = useGetImportErrorsQuery({ id: jobId, page });
+export function ImportErrorList({ jobId, totalErrors, errorCounts }: ImportErrorListProps) {
+  const [cursor, setCursor] = useState<string | undefined>();
+  const [errorType, setErrorType] = useState<ImportErrorType | undefined>();
+  const [downloading, setDownloading] = useState(false);
+  const accessToken = useAppSelector((state) => state.auth.accessToken);
+  const { data, isLoading, isFetching } = useGetImportErrorsQuery({ id: jobId, cursor, error_type: errorType });
+
+  const extractCursor = useCallback((url: string | null) => {
+    if (!url) return undefined;
+    try {
+      const u = new URL(url, window.location.origin);
+      return u.searchParams.get('cursor') || undefined;
+    } catch {
+      return undefined;
+    }
+  }, []);
+
+  const onChangeType = (value: ImportErrorType | undefined) => {
+    setErrorType(value);
+    setCursor(undefined);
+  };
+
+  // The CSV is streamed by the API; fetch it with the JWT rather than a plain link
+  const onDownload = async () => {
+    setDownloading(true);
+    try {
+      const base = import.meta.env.VITE_API_BASE_URL || '/api/v1';
+      const query = errorType ? `?error_type=${errorType}` : '';
+      const response = await fetch(`${base}/imports/${jobId}/errors/download/${query}`, {
+        headers: accessToken ? { Authorization: `Bearer ${accessToken}` } : {},
+      });
+      if (!response.ok) return;
+      const url = URL.createObjectURL(await response.blob());
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `import-${jobId}-errors.csv`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } finally {
+      setDownloading(false);
+    }
+  };
 
   const columns: ColumnsType<ImportError> = [
     {
@@ -23,6 +73,13 @@ export function ImportErrorList({ jobId, totalErrors }: ImportErrorListProps) {
       width: 80,
       render: (val: number) => <Text code>{val}</Text>,
     },
+    {
+      title: 'Type',
+      dataIndex: 'error_type',
+      key: 'error_type',
+      width: 110,
+      render: (val: ImportErrorType) => <Tag>{ERROR_TYPE_LABELS[val]}</Tag>,
+    },
     {
       title: 'Error',
       dataIndex: 'error',
@@ -34,8 +91,8 @@ export function ImportErrorList({ jobId, totalErrors }: ImportErrorListProps) {
       dataIndex: 'data',
       key: 'data',
       width: 300,
-      render: (val: Record<string, unknown> | undefined) =>
-        val ? (
+      render: (val: Record<string, unknown>) =>
+        Object.keys(val).length ? (
           <Text code style={{ fontSize: 11 }}>
             {JSON.stringify(val).slice(0, 100)}
           </Text>
@@ -48,21 +105,47 @@ export function ImportErrorList({ jobId, totalErrors }: ImportErrorListProps) {
   if (totalErrors === 0) return null;
 
   return (
-    <Card title={`Import Errors (${totalErrors})`} style={{ marginTop: 16 }}>
+    <Card
+      title={`Import Errors (${totalErrors})`}
+      style={{ marginTop: 16 }}
+      extra={
+        <Space>
+          <Select<ImportErrorType>
+            allowClear
+            placeholder="All types"
+            style={{ width: 180 }}
+            value={errorType}
+            onChange={onChangeType}
+            options={(Object.keys(ERROR_TYPE_LABELS) as ImportErrorType[])
+              .filter((type) => errorCounts[type])
+              .map((type) => ({ value: type, label: `${ERROR_TYPE_LABELS[type]} (${errorCounts[type]})` }))}
+          />
+          <Button icon={<DownloadOutlined />} loading={downloading} onClick={onDownload}>
+            Download CSV
+          </Button>
+        </Space>
+      }
+    >
       <Table<ImportError>
         dataSource={data?.results || []}
         columns={columns}
-        rowKey={(record) => `${record.line}-${record.error}`}
-        loading={isLoading}
+        rowKey="id"
+        loading={isLoading || isFetching}
         size="small"
-        pagination={{
-          current: page,
-          total: totalErrors,
-          pageSize: 50,
-          onChange: setPage,
-          showSizeChanger: false,
-        }}
+        pagination={false}
       />
+      <div style={{ display: 'flex', justifyContent: 'center', padding: '16px 0', gap: 8 }}>
+        {data?.previous && (
+          <Button onClick={() => setCursor(extractCursor(data.previous))} disabled={isFetching}>
+            Previous
+          </Button>
+        )}
+        {data?.next && (
+          <Button type="primary" onClick={() => setCursor(extractCursor(data.next))} disabled={isFetching}>
+            Next
+          </Button>
+        )}
+      </div>
     </Card>
   );
 }
@@ -35,6 +35,18 @@ export function ImportJobDetailView({ job }: ImportJobDetailProps) {
         <Descriptions.Item label="Errors">
           <Text type={job.processed_errors > 0 ? 'danger' : undefined}>{job.processed_errors}</Text>
         </Descriptions.Item>
+        <Descriptions.Item label="Inserted">
+          <Text>{job.inserted_records}</Text>
+        </Descriptions.Item>
+        <Descriptions.Item label="Updated">
+          <Text>{job.updated_records}</Text>
+        </Descriptions.Item>
+        <Descriptions.Item label="Unchanged">
+          <Text type="secondary">{job.unchanged_records}</Text>
+        </Descriptions.Item>
+        <Descriptions.Item label="Duplicates">
+          <Text type={job.duplicate_records > 0 ? 'warning' : 'secondary'}>{job.duplicate_records}</Text>
+        </Descriptions.Item>
         <Descriptions.Item label="Progress" span={3}>
           <Progress percent={pct} style={{ width: 300 }} />
         </Descriptions.Item>
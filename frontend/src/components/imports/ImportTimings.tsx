@@ -0,0 +1,57 @@
+import { Card, Descriptions, Progress, Typography } from 'antd';
+import type { ImportJobDetail } from '@/types/importJob';
+
+const { Text } = Typography;
+
+const STAGES = [
+  { key: 'download_seconds', label: 'Download' },
+  { key: 'parse_seconds', label: 'Parse' },
+  { key: 'validate_seconds', label: 'Validate' },
+  { key: 'upsert_seconds', label: 'Upsert' },
+  { key: 'activity_seconds', label: 'Activity write' },
+] as const;
+
+function formatSeconds(value: number): string {
+  return value < 1 ? `${Math.round(value * 1000)} ms` : `${value.toFixed(1)} s`;
+}
+
+interface ImportTimingsProps {
+  job: ImportJobDetail;
+}
+
+export function ImportTimings({ job }: ImportTimingsProps) {
+  const total = STAGES.reduce((sum, stage) => sum + job[stage.key], 0);
+  if (total === 0) return null;
+
+  const writeSeconds = job.parse_seconds + job.validate_seconds + job.upsert_seconds + job.activity_seconds;
+
+  return (
+    <Card title="Where the time went" style={{ marginTop: 16 }}>
+      <Descriptions column={1} size="small">
+        {STAGES.map((stage) => (
+          <Descriptions.Item key={stage.key} label={stage.label}>
+            <Progress
+              percent={Math.round((job[stage.key] / total) * 100)}
+              format={() => formatSeconds(job[stage.key])}
+              style={{ width: 400 }}
+            />
+          </Descriptions.Item>
+        ))}
+      </Descriptions>
+      <Descriptions column={{ xs: 1, sm: 2, lg: 4 }} size="small" style={{ marginTop: 8 }}>
+        <Descriptions.Item label="Rows/sec">
+          <Text>{Math.round(job.rows_per_second)}</Text>
+        </Descriptions.Item>
+        <Descriptions.Item label="Batches">
+          <Text>{job.batch_count}</Text>
+        </Descriptions.Item>
+        <Descriptions.Item label="Avg Batch">
+          <Text>{job.batch_count ? formatSeconds(writeSeconds / job.batch_count) : '—'}</Text>
+        </Descriptions.Item>
+        <Descriptions.Item label="Peak RSS">
+          <Text>{job.peak_rss_bytes ? `${Math.round(job.peak_rss_bytes / (1024 * 1024))} MB` : '—'}</Text>
+        </Descriptions.Item>
+      </Descriptions>
+    </Card>
+  );
+}
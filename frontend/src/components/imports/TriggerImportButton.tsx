@@ -12,8 +12,12 @@ export function TriggerImportButton() {
       content: 'This will poll all configured SFTP servers for new files. Continue?',
       onConfirm: async () => {
         try {
-          await trigger().unwrap();
-          message.success('Import triggered. Check back shortly for results.');
+          const result = await trigger().unwrap();
+          if (result.status === 'in_progress') {
+            message.info('An SFTP poll is already running. Check back shortly for results.');
+          } else {
+            message.success('Import triggered. Check back shortly for results.');
+          }
         } catch {
           message.error('Failed to trigger import');
         }
@@ -3,15 +3,16 @@ import { useNavigate, useLocation } from 'react-router-dom';
 import { useAppDispatch, useAppSelector } from '@/store/hooks';
 import { setCredentials, logout as logoutAction } from '@/store/authSlice';
 import { baseApi } from '@/api/baseApi';
-import { useLoginMutation } from '@/api/authApi';
+import { useLoginMutation, useLogoutMutation } from '@/api/authApi';
 import type { LoginCredentials } from '@/types/auth';
 
 export function useAuth() {
   const dispatch = useAppDispatch();
   const navigate = useNavigate();
   const location = useLocation();
-  const { isAuthenticated, user } = useAppSelector((state) => state.auth);
+  const { isAuthenticated, user, refreshToken } = useAppSelector((state) => state.auth);
   const [loginMutation, { isLoading: isLoggingIn, error: loginError }] = useLoginMutation();
+  const [logoutMutation] = useLogoutMutation();
 
   const login = useCallback(
     async (credentials: LoginCredentials) => {
@@ -35,11 +36,17 @@ export function useAuth() {
     [loginMutation, dispatch, navigate, location.state],
   );
 
-  const logout = useCallback(() => {
+  const logout = useCallback(async () => {
+    try {
+      // Revoke the tokens server-side while the access token is still sent
+      await logoutMutation({ refresh: refreshToken }).unwrap();
+    } catch {
+      // Already expired or revoked: signing out locally is enough
+    }
     dispatch(logoutAction());
     dispatch(baseApi.util.resetApiState());
     navigate('/login');
-  }, [dispatch, navigate]);
+  }, [logoutMutation, refreshToken, dispatch, navigate]);
 
   return { isAuthenticated, user, login, logout, isLoggingIn, loginError };
 }
@@ -4,6 +4,7 @@ import { ArrowLeftOutlined } from '@ant-design/icons';
 import { useGetImportJobQuery } from '@/api/importsApi';
 import { ImportJobDetailView } from '@/components/imports/ImportJobDetail';
 import { ImportErrorList } from '@/components/imports/ImportErrorList';
+import { ImportTimings } from '@/components/imports/ImportTimings';
 import { ErrorFallback } from '@/components/common/ErrorFallback';
 
 export function ImportDetailPage() {
@@ -30,7 +31,8 @@ export function ImportDetailPage() {
         <Button icon={<ArrowLeftOutlined />} onClick={() => navigate('/imports')} type="text" />
       </Space>
       <ImportJobDetailView job={job} />
-      <ImportErrorList jobId={job.id} totalErrors={job.processed_errors} />
+      <ImportTimings job={job} />
+      <ImportErrorList jobId={job.id} totalErrors={job.processed_errors} errorCounts={job.error_counts} />
     </div>
   );
 }
@@ -1,7 +1,7 @@
 import { useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Card, Typography } from 'antd';
-import { useGetAccountsQuery } from '@/api/accountsApi';
+import { useGetWorklistQuery } from '@/api/accountsApi';
 import { useAccountFilters } from '@/hooks/useAccountFilters';
 import { useDebounce } from '@/hooks/useDebounce';
 import { useKeyboardShortcuts } from '@/hooks/useKeyboardShortcuts';
@@ -20,7 +20,7 @@ export function WorklistPage() {
   const debouncedFilters = useDebounce(filters, 300);
   const { selectedAccountId, selectedRowIndex } = useAppSelector((s) => s.worklist);
 
-  const { data, isLoading, isError, refetch } = useGetAccountsQuery(debouncedFilters);
+  const { data, isLoading, isError, refetch } = useGetWorklistQuery(debouncedFilters);
 
   const results = data?.results || [];
 
@@ -12,27 +12,36 @@ export interface ImportJob {
   total_records: number;
   processed_ok: number;
   processed_errors: number;
+  inserted_records: number;
+  updated_records: number;
+  unchanged_records: number;
+  duplicate_records: number;
   started_at: string | null;
   completed_at: string | null;
   created_at: string;
 }
 
-/** Matches SFTPImportJobDetailSerializer (adds error_details). */
+/** Matches ImportRowError.ErrorType choices. */
+export type ImportErrorType = 'header' | 'validation' | 'database' | 'duplicate' | 'fatal';
+
+/** Matches SFTPImportJobDetailSerializer (adds error counts per type and stage timings). */
 export interface ImportJobDetail extends ImportJob {
-  error_details: ImportError[];
+  error_counts: Partial<Record<ImportErrorType, number>>;
+  download_seconds: number;
+  parse_seconds: number;
+  validate_seconds: number;
+  upsert_seconds: number;
+  activity_seconds: number;
+  batch_count: number;
+  peak_rss_bytes: number;
+  rows_per_second: number;
 }
 
 /** Matches ImportErrorSerializer fields. */
 export interface ImportError {
+  id: number;
   line: number;
+  error_type: ImportErrorType;
   error: string;
-  data?: Record<string, unknown>;
-}
-
-/** Paginated error response from the errors endpoint. */
-export interface ImportErrorsResponse {
-  count: number;
-  next: string | null;
-  previous: string | null;
-  results: ImportError[];
+  data: Record<string, unknown>;
 }
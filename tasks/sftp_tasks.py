@@ -1,6 +1,10 @@
 """Celery tasks for SFTP polling and file import."""
+import asyncio
 import logging
 import os
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from celery import shared_task
 from django.conf import settings
@@ -14,47 +18,172 @@ def sftp_poll_all_agencies(self):
 
     Runs every 15 minutes via Celery Beat.
     For each agency: connects, lists new files, downloads, and triggers import.
+    Agencies are polled concurrently (see _poll_agencies), so one slow server
+    doesn't hold up the others.
+
+    Each agency is polled under a lease (leases.agency_poll), so a run that
+    overlaps another one — the beat schedule and a manual trigger — skips the
+    agencies the other run is polling instead of importing their files twice.
+    The run also holds the POLL_ALL lease if it is free, or adopts it if the
+    trigger endpoint took it for this run, which the endpoint reports instead of
+    queueing another run.
     """
     from apps.accounts.models import Agency
+    from apps.integrations.leases import POLL_ALL, Lease
 
-    agencies = Agency.objects.filter(is_active=True)
-    results = []
+    task_id = self.request.id or str(uuid.uuid4())
+    agencies = [
+        agency
+        for agency in Agency.objects.filter(is_active=True)
+        if agency.settings.get("sftp", {}).get("enabled", False)
+    ]
+    run = Lease(POLL_ALL, task_id)
+    if not run.acquire():
+        logger.info("Poll %s overlaps poll %s, skipping agencies it is polling", task_id, run.holder())
+        results = asyncio.run(_poll_agencies(agencies, task_id))
+    else:
+        with run.held():
+            results = asyncio.run(_poll_agencies(agencies, task_id))
+    return {"polled": len(results), "results": results}
 
-    for agency in agencies:
-        sftp_config = agency.settings.get("sftp", {})
-        if not sftp_config.get("enabled", False):
-            continue
 
-        try:
-            result = _poll_agency(agency, sftp_config)
-            results.append({"agency": str(agency.id), "files": result})
-        except Exception as e:
-            logger.exception("SFTP poll failed for agency %s", agency.name)
-            results.append({"agency": str(agency.id), "error": str(e)})
+async def _poll_agencies(agencies: list, task_id: str) -> list[dict]:
+    """Poll agencies at once: at most SFTP_POLL_CONCURRENCY in all and SFTP_POLL_PER_HOST per server.
 
-    return {"polled": len(results), "results": results}
+    paramiko is blocking, so each agency's poll runs in a thread of a pool sized
+    to the global cap; the event loop only decides who goes next. Results keep
+    the agencies' order; an agency another poll holds the lease on is reported
+    as {"agency", "in_progress": <that poll's task id>}.
+    """
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.SFTP_POLL_CONCURRENCY, thread_name_prefix="sftp-poll")
+    )
+    slots = asyncio.Semaphore(settings.SFTP_POLL_CONCURRENCY)
+    host_slots = defaultdict(lambda: asyncio.Semaphore(settings.SFTP_POLL_PER_HOST))
 
+    async def poll(agency) -> dict:
+        sftp_config = agency.settings["sftp"]
+        server = (sftp_config.get("host", settings.SFTP_HOST), sftp_config.get("port", settings.SFTP_PORT))
+        # Wait for the server before taking a global slot, so agencies queued on a busy server don't block others
+        async with host_slots[server], slots:
+            try:
+                return await asyncio.to_thread(_poll_agency_in_thread, agency, sftp_config, task_id)
+            except Exception as e:
+                logger.exception("SFTP poll failed for agency %s", agency.name)
+                return {"agency": str(agency.id), "error": str(e)}
 
-def _poll_agency(agency, sftp_config: dict) -> list[str]:
-    """Poll a single agency's SFTP server."""
-    from apps.integrations.sftp_client import SFTPClient
+    return await asyncio.gather(*(poll(agency) for agency in agencies))
+
+
+def _poll_agency_in_thread(agency, sftp_config: dict, task_id: str) -> dict:
+    """_poll_agency under the agency's lease, in a poller thread (which closes the database connection it opened)."""
+    from django.db import connections
+
+    from apps.integrations.leases import Lease, agency_poll
+
+    lease = Lease(agency_poll(agency.id), task_id)
+    try:
+        if not lease.acquire():
+            holder = lease.holder()
+            logger.info("Agency %s is already being polled by %s, skipping", agency.name, holder)
+            return {"agency": str(agency.id), "in_progress": holder}
+        with lease.held():
+            return {"agency": str(agency.id), "files": _poll_agency(agency, sftp_config)}
+    finally:
+        connections.close_all()
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=10)
+def sftp_poll_agency(self, agency_id: str, file_names: list[str]):
+    """Import files an agency's SFTP server reported uploaded (webhooks.sftp_upload_notification).
+
+    Polls just that agency and takes just those files, without waiting a poll
+    cycle for them to settle; the rest of the directory is left to
+    sftp_poll_all_agencies, which still sweeps every agency on schedule. If
+    another poll holds the agency's lease this retries shortly after, as that
+    poll may have listed the directory before the upload finished.
+    """
+    from apps.accounts.models import Agency
+    from apps.integrations.leases import Lease, agency_poll
+
+    agency = Agency.objects.get(id=agency_id)
+    lease = Lease(agency_poll(agency.id), self.request.id or str(uuid.uuid4()))
+    if not lease.acquire():
+        logger.info("Agency %s is already being polled by %s, retrying", agency.name, lease.holder())
+        raise self.retry()
+    with lease.held():
+        files = _poll_agency(agency, agency.settings["sftp"], only=file_names)
+    return {"agency": agency_id, "files": files}
+
+
+def _poll_agency(agency, sftp_config: dict, only: list[str] | None = None) -> list[str]:
+    """Poll a single agency's SFTP server.
+
+    Only files the manifest (RemoteFileEntry.observe) finds ready are taken: seen
+    with the same size and mtime by the previous poll, and not imported yet.
+    With `only`, just those of the named files that aren't imported yet are
+    taken, each as soon as it is listed (the server reported it complete).
+    They are downloaded and staged in the shared file store (file_store), so any
+    worker can import them, or, when the agency streams its imports
+    (_should_stream), claimed into processed_dir and imported from there by
+    `stream_import_file`.
+    """
+    from apps.integrations import file_store, metrics
+    from apps.integrations.models import RemoteFileEntry
 
     host = sftp_config.get("host", settings.SFTP_HOST)
-    port = sftp_config.get("port", settings.SFTP_PORT)
-    username = sftp_config.get("username", settings.SFTP_USER)
-    password = sftp_config.get("password", settings.SFTP_PASSWORD)
     remote_dir = sftp_config.get("remote_dir", settings.SFTP_REMOTE_DIR)
 
     processed_files = []
     processed_dir = sftp_config.get("processed_dir", f"{remote_dir}/processed")
+    stream = _should_stream(agency, sftp_config)
 
-    with SFTPClient(host=host, port=port, username=username, password=password) as client:
-        files = client.list_files(remote_dir)
+    with _sftp_client(sftp_config) as client:
+        listing = client.list_entries(remote_dir)
+        files = RemoteFileEntry.observe(agency, remote_dir, listing, complete=only or ())
+        if only is not None:
+            files = [name for name in files if name in only]
+        elif len(files) < len(listing):
+            logger.info(
+                "%d of %d files in %s are new, still changing or already imported",
+                len(listing) - len(files),
+                len(listing),
+                remote_dir,
+            )
+        downloads = []
         for file_name in files:
             remote_path = f"{remote_dir}/{file_name}"
-            local_path = client.download_file(remote_path)
-            process_import_file.delay(str(agency.id), local_path, file_name, host)
-            # Move processed file to avoid re-processing
+            if not (stream and file_name.lower().endswith(STREAMABLE_SUFFIXES)):
+                downloads.append(remote_path)
+                continue
+            # The import reads the file after this poll: claim it first, so the next poll doesn't pick it up again
+            processed_path = f"{processed_dir}/{file_name}"
+            try:
+                client.move_file(remote_path, processed_path)
+            except Exception:
+                logger.warning("Could not move %s to processed dir, leaving it for the next poll", remote_path)
+                continue
+            stream_import_file.delay(str(agency.id), processed_path, file_name, host)
+            RemoteFileEntry.mark_imported(agency, remote_dir, file_name)
+            processed_files.append(file_name)
+
+        # Several files download at once, over extra channels of the same connection
+        for remote_path, local_path, download_seconds in client.download_files(downloads):
+            file_name = remote_path.rsplit("/", 1)[-1]
+            metrics.observe_download(download_seconds)
+            file_key, file_hash = file_store.stage(local_path, str(agency.id))
+            os.unlink(local_path)
+            process_import_file.delay(
+                str(agency.id),
+                file_key,
+                file_name,
+                host,
+                download_seconds=download_seconds,
+                file_hash=file_hash,
+            )
+            RemoteFileEntry.mark_imported(agency, remote_dir, file_name)
+            # Move processed file out of the way (the manifest keeps it from being imported again otherwise)
             try:
                 client.move_file(remote_path, f"{processed_dir}/{file_name}")
             except Exception:
@@ -64,11 +193,47 @@ def _poll_agency(agency, sftp_config: dict) -> list[str]:
     return processed_files
 
 
+# Formats that can be parsed front to back while they are read off the server
+STREAMABLE_SUFFIXES = (".csv", ".csv.gz")
+
+
+def _sftp_client(sftp_config: dict):
+    from apps.integrations.sftp_client import SFTPClient
+
+    return SFTPClient(
+        host=sftp_config.get("host", settings.SFTP_HOST),
+        port=sftp_config.get("port", settings.SFTP_PORT),
+        username=sftp_config.get("username", settings.SFTP_USER),
+        password=sftp_config.get("password", settings.SFTP_PASSWORD),
+    )
+
+
+def _should_stream(agency, sftp_config: dict) -> bool:
+    """settings["sftp"]["stream"], else SFTP_STREAM_IMPORTS; never under the reject policy, which needs a pre-scan."""
+    from apps.integrations.chunking import REJECT, duplicate_policy
+
+    return bool(sftp_config.get("stream", settings.SFTP_STREAM_IMPORTS)) and duplicate_policy(agency) != REJECT
+
+
 @shared_task(bind=True, max_retries=2, default_retry_delay=120)
-def process_import_file(self, agency_id: str, file_path: str, file_name: str, source_host: str):
-    """Process a single downloaded SFTP file."""
+def stream_import_file(self, agency_id: str, remote_path: str, file_name: str, source_host: str):
+    """Import a CSV or .csv.gz file straight from the agency's SFTP server, without a local copy.
+
+    The file is parsed and imported while it is read (sftp_client.RemoteFile), so
+    the job takes about as long as the transfer. It skips the whole-file passes
+    of a downloaded import: no SHA-256 (identical files aren't skipped) and no
+    duplicate pre-scan (see chunking.StreamedDuplicates).
+
+    Only the first attempt streams. If it is interrupted (soft time limit, an
+    error, or more refs than chunking.StreamedDuplicates keeps), the file is
+    downloaded and staged after all and `process_import_file` resumes the job
+    from its checkpoint, with its usual retries.
+    """
+    from celery.exceptions import SoftTimeLimitExceeded
+
     from apps.accounts.models import Agency
-    from apps.integrations.importers import BatchImporter
+    from apps.integrations import file_store
+    from apps.integrations.importers import get_importer
     from apps.integrations.models import SFTPImportJob
 
     try:
@@ -77,21 +242,206 @@ def process_import_file(self, agency_id: str, file_path: str, file_name: str, so
         logger.error("Agency %s not found", agency_id)
         return
 
-    import_job = SFTPImportJob.objects.create(
-        agency=agency,
-        source_host=source_host,
-        file_name=file_name,
+    import_job, created = SFTPImportJob.objects.get_or_create(
+        id=self.request.id or uuid.uuid4(),
+        defaults={"agency": agency, "source_host": source_host, "file_name": file_name},
     )
+    if not created and import_job.status in (SFTPImportJob.Status.COMPLETED, SFTPImportJob.Status.FAILED):
+        logger.info("Import job %s already %s, skipping", import_job.id, import_job.status)
+        return
 
     try:
-        importer = BatchImporter(agency, import_job)
-        importer.import_file(file_path)
+        with _sftp_client(agency.settings.get("sftp", {})) as client:
+            if created:
+                try:
+                    get_importer(agency, import_job).import_file(client.open_file(remote_path))
+                    return
+                except SoftTimeLimitExceeded:
+                    logger.warning("Streamed import job %s hit the soft time limit", import_job.id)
+                except Exception as e:
+                    logger.warning("Streamed import job %s interrupted (%s)", import_job.id, e)
+            local_path = client.download_file(remote_path)
+        file_key, file_hash = file_store.stage(local_path, agency_id)
+        os.unlink(local_path)
     except Exception as e:
-        import_job.status = SFTPImportJob.Status.FAILED
-        import_job.error_details.append({"line": 0, "error": f"Fatal: {e}"})
-        import_job.save()
-        logger.exception("Import job %s failed", import_job.id)
-    finally:
-        # Clean up temp file
-        if os.path.exists(file_path):
-            os.unlink(file_path)
+        if self.request.retries < self.max_retries and not self.request.called_directly:
+            raise self.retry(exc=e) from e
+        _fail_job(import_job, e)
+        return
+
+    logger.info("Import job %s continues from a staged copy of %s", import_job.id, remote_path)
+    process_import_file.delay(agency_id, file_key, file_name, source_host, job_id=str(import_job.id))
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=120)
+def process_import_file(
+    self,
+    agency_id: str,
+    file_key: str,
+    file_name: str,
+    source_host: str,
+    job_id: str | None = None,
+    download_seconds: float = 0.0,
+    file_hash: str = "",
+):
+    """Import a file staged in the shared file store under `file_key` (see file_store).
+
+    Any worker can run it: the file is read from the store (a temporary local
+    copy where the store is remote). `file_hash` is the SHA-256 computed when the
+    file was staged, so a file identical to the agency's last import is skipped
+    without reading it again.
+
+    Large files (SFTP_PARALLEL_IMPORT_MIN_BYTES) are split into byte ranges and
+    handed to a chord of `import_file_chunk` tasks; `finalize_import_job` then
+    closes the job.
+
+    Serial imports checkpoint after every batch. The job is keyed by the task id,
+    so a retry picks up the same job and resumes from its checkpoint; on the soft
+    time limit the task re-queues itself with `job_id` to continue from there.
+    """
+    from celery.exceptions import SoftTimeLimitExceeded
+
+    from apps.accounts.models import Agency
+    from apps.integrations import file_store
+    from apps.integrations.importers import BatchImporter, get_importer
+    from apps.integrations.models import SFTPImportJob
+
+    try:
+        agency = Agency.objects.get(id=agency_id)
+    except Agency.DoesNotExist:
+        logger.error("Agency %s not found", agency_id)
+        return
+
+    import_job, created = SFTPImportJob.objects.get_or_create(
+        id=job_id or self.request.id or uuid.uuid4(),
+        defaults={
+            "agency": agency,
+            "source_host": source_host,
+            "file_name": file_name,
+            "file_path_s3": file_key,
+            "file_hash": file_hash,
+            "download_seconds": download_seconds,
+        },
+    )
+    if not created and import_job.status in (SFTPImportJob.Status.COMPLETED, SFTPImportJob.Status.FAILED):
+        logger.info("Import job %s already %s, skipping", import_job.id, import_job.status)
+        return
+    if import_job.file_path_s3 != file_key:  # continued from a streamed import
+        import_job.file_path_s3 = file_key
+        import_job.save(update_fields=["file_path_s3"])
+
+    with file_store.local_copy(file_key) as file_path:
+        try:
+            importer = get_importer(agency, import_job)
+            dispatched = False
+            if isinstance(importer, BatchImporter) and created and _should_import_in_parallel(file_path):
+                dispatched = _dispatch_parallel_import(importer, file_key, file_path)
+            if not dispatched:
+                importer.import_file(file_path)
+        except SoftTimeLimitExceeded:
+            import_job.refresh_from_db(fields=["checkpoint_line"])
+            logger.warning(
+                "Import job %s hit the soft time limit after line %d, continuing in a new task",
+                import_job.id,
+                import_job.checkpoint_line,
+            )
+            process_import_file.delay(agency_id, file_key, file_name, source_host, job_id=str(import_job.id))
+        except Exception as e:
+            if self.request.retries < self.max_retries and not self.request.called_directly:
+                logger.warning("Import job %s interrupted (%s), retrying from its checkpoint", import_job.id, e)
+                raise self.retry(exc=e) from e
+            _fail_job(import_job, e)
+
+
+def _fail_job(import_job, error: Exception):
+    from apps.integrations.models import ImportRowError, SFTPImportJob
+
+    import_job.refresh_from_db()  # counters were checkpointed with UPDATEs
+    import_job.status = SFTPImportJob.Status.FAILED
+    import_job.save()
+    ImportRowError.record(
+        import_job, [{"line": 0, "error_type": ImportRowError.ErrorType.FATAL, "error": f"Fatal: {error}"}]
+    )
+    logger.exception("Import job %s failed", import_job.id)
+
+
+def _should_import_in_parallel(file_path: str) -> bool:
+    from apps.integrations.sources import CSV, detect_format
+
+    threshold = settings.SFTP_PARALLEL_IMPORT_MIN_BYTES
+    # Compressed and Parquet files can't be entered mid-way, so every range would re-read the file up to its start
+    return threshold > 0 and os.path.getsize(file_path) >= threshold and detect_format(file_path) == CSV
+
+
+def _dispatch_parallel_import(importer, file_key: str, file_path: str) -> bool:
+    """Split the file and start the chord. Returns False if it should be imported serially."""
+    import csv
+
+    from celery import chord
+
+    from apps.integrations.chunking import duplicate_policy, iter_lines, plan_chunks
+    from apps.integrations.importers import file_sha256
+    from apps.integrations.parsers import CSVParser
+
+    header = next(csv.reader(iter_lines(file_path)), [])
+    if CSVParser.REQUIRED_HEADERS - set(header):
+        return False  # let the serial path report the header error once
+
+    if not importer.import_job.file_hash:
+        importer.import_job.file_hash = file_sha256(file_path)
+    if importer.find_identical_import():
+        return False  # the serial path skips it without hashing again
+
+    chunks, _ = plan_chunks(
+        file_path, settings.SFTP_PARALLEL_IMPORT_CHUNK_BYTES, duplicate_policy(importer.agency)
+    )
+    if len(chunks) < 2:
+        return False
+
+    job_id = str(importer.import_job.id)
+    importer.start()
+    logger.info("Import job %s split into %d chunks", job_id, len(chunks))
+    chord(import_file_chunk.s(job_id, file_key, chunk) for chunk in chunks)(finalize_import_job.s(job_id))
+    return True
+
+
+@shared_task
+def import_file_chunk(job_id: str, file_key: str, chunk: dict) -> int:
+    """Import one byte range of a large staged file (see chunking.plan_chunks). Returns the range's error count.
+
+    The range is read straight from the store (file_store.range_source): a chunk
+    task doesn't download the whole file to read its part of it.
+    """
+    from django.db.models import F
+
+    from apps.integrations import file_store
+    from apps.integrations.importers import BatchImporter
+    from apps.integrations.models import ImportRowError, SFTPImportJob
+
+    import_job = SFTPImportJob.objects.select_related("agency").get(id=job_id)
+    try:
+        with file_store.range_source(file_key) as source:
+            return BatchImporter(import_job.agency, import_job).import_range(
+                source, chunk["start"], chunk["end"], chunk["first_line"], chunk["winners"]
+            )
+    except Exception as e:
+        # Returning (rather than raising) keeps the chord alive so the job still gets closed
+        logger.exception("Import job %s chunk at byte %d failed", job_id, chunk["start"])
+        SFTPImportJob.objects.filter(pk=job_id).update(processed_errors=F("processed_errors") + 1)
+        error = {
+            "line": chunk["first_line"],
+            "error_type": ImportRowError.ErrorType.FATAL,
+            "error": f"Fatal: chunk starting at this line failed: {e}",
+        }
+        ImportRowError.record(import_job, [error])
+        return 1
+
+
+@shared_task
+def finalize_import_job(chunk_error_counts: list[int], job_id: str):
+    """Chord body: set the final job status."""
+    from apps.integrations.importers import BatchImporter
+    from apps.integrations.models import SFTPImportJob
+
+    import_job = SFTPImportJob.objects.select_related("agency").get(id=job_id)
+    BatchImporter(import_job.agency, import_job).finish()